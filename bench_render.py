@@ -0,0 +1,201 @@
+"""
+Benchmarks for the render pipeline.
+
+Times render_cabinet_to_bytes, render_cabinet (file to file),
+CabinetDesigner.draw and save_config/load_config on every templates/*.json
+design and on generated walls of 1, 10, 100 and 1000 columns, reporting mean
+and p95 latency, peak memory and output size per operation. Peak memory is
+what tracemalloc sees: Python allocations, not Pillow's pixel buffers.
+
+    python bench_render.py                          # run and print the table
+    python bench_render.py --save baseline.json     # also store the results
+    python bench_render.py --compare baseline.json  # flag regressions (exit 1)
+"""
+
+import os
+import io
+import sys
+import json
+import math
+import glob
+import time
+import fnmatch
+import argparse
+import tempfile
+import platform
+import tracemalloc
+import contextlib
+
+from simple_designer import CabinetDesigner
+import render_cabinet
+from render_cabinet import render_cabinet_to_bytes
+
+SYNTHETIC_SIZES = (1, 10, 100, 1000)
+MAX_CANVAS_WIDTH = 16000 # Pixels; wider walls are rendered at a reduced scale
+MIN_TIME = 0.5 # Seconds spent per operation before stopping early
+DEFAULT_THRESHOLD = 1.25 # Slowdown ratio reported as a regression
+
+def synthetic_design(columns, shelves=8):
+    """A wall of 40/60/80cm modules cycling through drawers, dividers and merges."""
+    total_h, bot_h = 240.0, 80.0
+    spacing = (total_h - bot_h) / (shelves + 1)
+    cols = []
+    for i in range(columns):
+        cols.append({
+            'width': (60, 80, 40)[i % 3],
+            'shelf_heights': [round(bot_h + spacing * k, 1) for k in range(1, shelves + 1)],
+            'vertical_dividers': [k for k in range(shelves + 1) if (i + k) % 4 == 0],
+            'has_top': True,
+            'merge_right': i % 5 == 3 and i < columns - 1,
+            'drawers': [{'height': 20.0}] * (i % 3),
+        })
+    return {'total_height': total_h, 'bottom_height': bot_h, 'plinth_height': 8.0, 'columns': cols}
+
+def bench_designs(template_dir="templates", sizes=SYNTHETIC_SIZES):
+    """Yields (name, design dict) for the bundled templates, then the synthetic walls."""
+    for path in sorted(glob.glob(os.path.join(template_dir, "*.json"))):
+        with open(path, 'r') as f:
+            yield os.path.splitext(os.path.basename(path))[0], json.load(f)
+    for n in sizes:
+        yield f"wall_{n}", synthetic_design(n)
+
+def render_scale(data):
+    """Render scale for a design, capped so the canvas stays within MAX_CANVAS_WIDTH."""
+    total_w = sum(c['width'] for c in data['columns'])
+    room = MAX_CANVAS_WIDTH - 2 * render_cabinet.MARGIN
+    return min(render_cabinet.SCALE, room / max(total_w, 1))
+
+def _operations(data, workdir):
+    """(name, callable) pairs; each callable returns the size of what it produced in bytes."""
+    scale = render_scale(data)
+    config_file = os.path.join(workdir, "design.json")
+    png_file = os.path.join(workdir, "render.png")
+    saved_file = os.path.join(workdir, "saved.json")
+    with open(config_file, 'w') as f:
+        json.dump(data, f)
+    designer = CabinetDesigner()
+    designer.load_dict(json.loads(json.dumps(data)))
+
+    def to_bytes():
+        return len(render_cabinet_to_bytes(data, scale))
+
+    def to_file():
+        render_cabinet.render_cabinet(config_file, png_file, scale)
+        return os.path.getsize(png_file)
+
+    def draw():
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            designer.draw()
+        return len(out.getvalue())
+
+    def save_config():
+        designer.save_config(saved_file)
+        return os.path.getsize(saved_file)
+
+    def load_config():
+        CabinetDesigner().load_config(config_file)
+        return os.path.getsize(config_file)
+
+    return [('render_cabinet_to_bytes', to_bytes), ('render_cabinet', to_file),
+            ('draw', draw), ('save_config', save_config), ('load_config', load_config)]
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+def measure(func, repeat=20, min_time=MIN_TIME):
+    """
+    Runs func up to repeat times (at least 3, stopping once min_time has been
+    spent), then once more under tracemalloc for the peak allocation.
+    """
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < repeat:
+        t = time.perf_counter()
+        size = func()
+        samples.append(time.perf_counter() - t)
+        if len(samples) >= 3 and time.perf_counter() - start > min_time:
+            break
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'mean_ms': sum(samples) / len(samples) * 1000, 'p95_ms': _p95(samples) * 1000,
+            'peak_kb': peak / 1024, 'bytes': size, 'runs': len(samples)}
+
+def run(pattern="*", ops="*", repeat=20, template_dir="templates", sizes=SYNTHETIC_SIZES):
+    """Benchmarks every design whose name matches pattern; returns {design: {operation: stats}}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, data in bench_designs(template_dir, sizes):
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+            results[name] = {}
+            # The designer and renderer print progress messages
+            with contextlib.redirect_stdout(io.StringIO()):
+                operations = _operations(data, workdir)
+            for op, func in operations:
+                if not fnmatch.fnmatch(op, ops):
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = measure(func, repeat)
+                results[name][op] = stats
+                print(f"{name:<18} {op:<24} {stats['mean_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                      f"{stats['peak_kb']:>10.0f} {stats['bytes']:>10}")
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Prints the mean-latency ratio to the baseline per operation; returns the regressions."""
+    regressions = []
+    print(f"\n{'design':<18} {'operation':<24} {'base ms':>9} {'now ms':>9} {'ratio':>7}")
+    for name, ops in results.items():
+        for op, stats in ops.items():
+            base = baseline.get(name, {}).get(op)
+            if not base:
+                continue
+            ratio = stats['mean_ms'] / max(base['mean_ms'], 1e-6)
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append((name, op, ratio))
+            print(f"{name:<18} {op:<24} {base['mean_ms']:>9.2f} {stats['mean_ms']:>9.2f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cabinet rendering, ASCII drawing and config I/O")
+    parser.add_argument("--designs", default="*", help="Only designs matching this pattern (e.g. 'wall_*')")
+    parser.add_argument("--ops", default="*", help="Only operations matching this pattern (e.g. 'render*')")
+    parser.add_argument("--repeat", type=int, default=20, help="Maximum runs per operation (default: 20)")
+    parser.add_argument("--sizes", help="Comma separated synthetic wall sizes (default: 1,10,100,1000)")
+    parser.add_argument("--save", metavar="FILE", help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Slowdown ratio counted as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    sizes = tuple(int(n) for n in args.sizes.split(",")) if args.sizes else SYNTHETIC_SIZES
+    print(f"{'design':<18} {'operation':<24} {'mean ms':>9} {'p95 ms':>9} {'peak KB':>10} {'bytes':>10}")
+    results = run(args.designs, args.ops, args.repeat, sizes=sizes)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=1, sort_keys=True)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get('results', {}), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} operation(s) slower than {args.threshold:g}x the baseline.")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Layout engine shared by every cabinet output (PNG, ASCII, ...).
+
+compute_layout() walks the columns once and produces a flat list of positioned
+primitives in cm. Coordinates have their origin at the bottom-left corner of
+the cabinet on the floor, with y pointing up. Backends only map these
+primitives to their own drawing calls, they never re-derive the geometry.
+"""
+
+from cabinet_model import GroupIndex, columns_from_dicts
+
+THICKNESS = 1.8 # cm (Material thickness)
+
+# Primitive kinds, in the order they are emitted for each merged group.
+# Rectangles: x, y is the bottom-left corner, w/h the size.
+RECT_KINDS = ('plinth', 'drawer', 'drawer_handle', 'door',
+              'side_panel', 'top_cap', 'countertop', 'divider', 'shelf')
+# 'floor'        : line at y=0 from x to x + w
+# 'door_split'   : vertical line at x from y to y + h (double door of 80cm bases)
+# 'knob'         : circle centred on x, y with radius w
+# 'width_label'  : text centred on x, below the floor
+# 'height_label' : text starting at x, vertically centred on y
+# 'title'        : overall dimensions text
+
+class Primitive:
+    __slots__ = ('kind', 'x', 'y', 'w', 'h', 'column', 'group', 'text')
+
+    def __init__(self, kind, x, y, w=0.0, h=0.0, column=None, group=None, text=None):
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.column = column
+        self.group = group
+        self.text = text
+
+    def __repr__(self):
+        return f"Primitive({self.kind!r}, x={self.x}, y={self.y}, w={self.w}, h={self.h})"
+
+class Group:
+    """A run of columns whose top sections are merged (merge_right chain)."""
+    __slots__ = ('index', 'start', 'end', 'x', 'width', 'has_top', 'shelves', 'dividers')
+
+    def __init__(self, index, start, end, x, width, has_top, shelves, dividers):
+        self.index = index
+        self.start = start # First column index
+        self.end = end # Last column index (inclusive)
+        self.x = x
+        self.width = width
+        self.has_top = has_top
+        self.shelves = shelves # Shelf heights of the master (first) column
+        self.dividers = dividers
+
+class Layout:
+    __slots__ = ('total_width', 'total_height', 'bottom_height', 'plinth_height',
+                 'column_widths', 'column_x', 'groups', 'primitives')
+
+    def __init__(self, total_width, total_height, bottom_height, plinth_height):
+        self.total_width = total_width
+        self.total_height = total_height
+        self.bottom_height = bottom_height
+        self.plinth_height = plinth_height
+        self.column_widths = []
+        self.column_x = []
+        self.groups = []
+        self.primitives = []
+
+    def of_kind(self, kind):
+        return [p for p in self.primitives if p.kind == kind]
+
+def compute_layout(data, groups=None):
+    """
+    Computes the layout of a design given as a config dict
+    (total_height, bottom_height, plinth_height, columns). Columns may be
+    Column objects or plain JSON dicts. groups is an optional, already built
+    GroupIndex for these columns.
+    """
+    total_h = data.get('total_height', 240.0)
+    bot_h = data.get('bottom_height', 80.0)
+    plinth_h = data.get('plinth_height', 8.0)
+    columns = columns_from_dicts(data.get('columns', []), total_h, bot_h)
+
+    if groups is None:
+        groups = GroupIndex(columns)
+
+    total_w = groups.total_width
+    layout = Layout(total_w, total_h, bot_h, plinth_h)
+    prims = layout.primitives
+    add = prims.append
+
+    add(Primitive('floor', 0.0, 0.0, total_w))
+
+    for g in range(len(groups)):
+        i, end = groups.span(g)
+        current_x = groups.group_x(g)
+        group_w = groups.group_width(g)
+        group_has_top = any(columns[k].has_top for k in range(i, end + 1))
+        master_col = columns[i]
+        group = Group(g, i, end, current_x, group_w, group_has_top,
+                      master_col.shelf_heights, master_col.vertical_dividers)
+        layout.groups.append(group)
+
+        # --- 1. Bottom Modules (Always individual) ---
+        for c in range(i, end + 1):
+            x_g = groups.column_x(c)
+            w_g = columns[c].width
+            layout.column_widths.append(w_g)
+            layout.column_x.append(x_g)
+
+            # Plinth (Recessed)
+            add(Primitive('plinth', x_g + 2, 0, w_g - 4, plinth_h, c, g))
+
+            # Drawers stack from the top of the base section downwards
+            base_y = plinth_h
+            current_y_top = bot_h
+            for d in columns[c].drawers:
+                d_h = d.height
+                d_y = current_y_top - d_h
+                add(Primitive('drawer', x_g, d_y, w_g, d_h, c, g))
+                add(Primitive('drawer_handle', x_g + w_g/2 - 5, d_y + d_h - 5, 10, 2, c, g))
+                current_y_top -= d_h
+
+            # Remaining space below the drawers is a door
+            remaining_h = current_y_top - base_y
+            if remaining_h > 1.0: # If notable space remains
+                add(Primitive('door', x_g, base_y, w_g, remaining_h, c, g))
+                knob_y = base_y + remaining_h - 10
+                if w_g == 80:
+                    add(Primitive('door_split', x_g + w_g/2, base_y, 0, remaining_h, c, g))
+                    add(Primitive('knob', x_g + w_g/2 - 3, knob_y, 1, column=c, group=g))
+                    add(Primitive('knob', x_g + w_g/2 + 3, knob_y, 1, column=c, group=g))
+                else:
+                    add(Primitive('knob', x_g + w_g - 5, knob_y, 1, column=c, group=g))
+
+            add(Primitive('width_label', x_g + w_g/2, 0, column=c, group=g, text=f"{w_g}cm"))
+
+        # --- 2. Top Module (Merged group) ---
+        if group_has_top:
+            # Side Panels (Outer)
+            add(Primitive('side_panel', current_x, bot_h, THICKNESS, total_h - bot_h, i, g))
+            add(Primitive('side_panel', current_x + group_w - THICKNESS, bot_h, THICKNESS, total_h - bot_h, end, g))
+
+            # Top Cap and Countertop (Full group width)
+            add(Primitive('top_cap', current_x, total_h - THICKNESS, group_w, THICKNESS, i, g))
+            add(Primitive('countertop', current_x, bot_h - THICKNESS, group_w, THICKNESS, i, g))
+
+            sorted_shelves = sorted(group.shelves)
+            all_bounds = [bot_h] + sorted_shelves + [total_h]
+            for j in range(len(all_bounds) - 1):
+                low, high = all_bounds[j], all_bounds[j+1]
+                add(Primitive('height_label', current_x + 2, (low + high) / 2, column=i, group=g,
+                              text=f"{high - low:.1f}"))
+                # Vertical Divider (Centered in merged group)
+                if j in group.dividers:
+                    mid_x = current_x + (group_w / 2)
+                    add(Primitive('divider', mid_x - THICKNESS/2, low, THICKNESS, high - low, i, g))
+
+            # Shelves (Span full group)
+            for h in sorted_shelves:
+                if bot_h < h < total_h:
+                    add(Primitive('shelf', current_x + THICKNESS, h - THICKNESS, group_w - 2*THICKNESS, THICKNESS, i, g))
+
+    add(Primitive('title', 0.0, total_h, text=f"Total Width: {total_w}cm | Total Height: {total_h}cm"))
+    return layout
+
+def layout_of(design):
+    """Returns the Layout for a Layout, a CabinetDesigner (cached) or a config dict."""
+    if isinstance(design, Layout):
+        return design
+    if isinstance(design, dict):
+        return compute_layout(design)
+    return design.layout()
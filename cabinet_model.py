@@ -0,0 +1,243 @@
+"""
+Typed model for the columns of a cabinet design.
+
+Column and Drawer use __slots__ so large collections of designs stay small in
+memory, and they convert losslessly to and from the dicts stored in design
+JSON files (keys this model does not know about are kept in 'extra').
+For older callers, a Column also supports read-only dict-style access
+(col['width'], col.get('drawers', [])).
+"""
+
+from bisect import bisect_right
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+class Drawer:
+    """A drawer front in the bottom section. Drawers are shared between column copies, so treat them as values."""
+    __slots__ = ('height', 'extra')
+
+    def __init__(self, height, extra=None):
+        if not _is_number(height) or height <= 0:
+            raise ValueError(f"Drawer height must be a positive number, got {height!r}.")
+        self.height = height
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        extra = {k: v for k, v in data.items() if k != 'height'}
+        return cls(data['height'], extra)
+
+    def to_dict(self):
+        d = {'height': self.height}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def __getitem__(self, key):
+        if key == 'height':
+            return self.height
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __eq__(self, other):
+        return isinstance(other, Drawer) and self.height == other.height and self.extra == other.extra
+
+    def __repr__(self):
+        return f"Drawer({self.height!r})"
+
+class Column:
+    """One base module plus (unless merged into its left neighbour) its top section."""
+    __slots__ = ('width', 'shelf_heights', 'vertical_dividers', 'has_top', 'merge_right', 'drawers', 'extra')
+
+    FIELDS = ('width', 'shelf_heights', 'vertical_dividers', 'has_top', 'merge_right', 'drawers')
+
+    def __init__(self, width, shelf_heights=None, vertical_dividers=None, has_top=True,
+                 merge_right=False, drawers=None, extra=None):
+        if not _is_number(width) or width <= 0:
+            raise ValueError(f"Column width must be a positive number, got {width!r}.")
+        shelf_heights = list(shelf_heights or [])
+        if not all(_is_number(h) for h in shelf_heights):
+            raise ValueError(f"Shelf heights must be numbers, got {shelf_heights!r}.")
+        vertical_dividers = list(vertical_dividers or [])
+        if not all(isinstance(s, int) and not isinstance(s, bool) and s >= 0 for s in vertical_dividers):
+            raise ValueError(f"Vertical dividers must be compartment indices, got {vertical_dividers!r}.")
+        if not isinstance(has_top, bool) or not isinstance(merge_right, bool):
+            raise ValueError("has_top and merge_right must be booleans.")
+
+        self.width = width
+        self.shelf_heights = shelf_heights
+        self.vertical_dividers = vertical_dividers
+        self.has_top = has_top
+        self.merge_right = merge_right
+        self.drawers = [d if isinstance(d, Drawer) else Drawer.from_dict(d) for d in (drawers or [])]
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Column from a (migrated, see migrate_column_dict) design JSON dict."""
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS}
+        return cls(data['width'], data.get('shelf_heights'), data.get('vertical_dividers'),
+                   data.get('has_top', True), data.get('merge_right', False), data.get('drawers'), extra)
+
+    def to_dict(self):
+        d = {
+            'width': self.width,
+            'shelf_heights': list(self.shelf_heights),
+            'vertical_dividers': list(self.vertical_dividers),
+            'has_top': self.has_top,
+            'merge_right': self.merge_right,
+            'drawers': [dr.to_dict() for dr in self.drawers]
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def copy(self):
+        """Copies the lists so either column can be edited independently; drawers are shared."""
+        new = Column.__new__(Column)
+        new.width = self.width
+        new.shelf_heights = list(self.shelf_heights)
+        new.vertical_dividers = list(self.vertical_dividers)
+        new.has_top = self.has_top
+        new.merge_right = self.merge_right
+        new.drawers = list(self.drawers)
+        new.extra = dict(self.extra) if self.extra else None
+        return new
+
+    # Read-only dict-style access, for callers written against the old dict columns.
+    # Changes go through CabinetDesigner, which copies shared columns and drops its caches.
+    def __getitem__(self, key):
+        if key in Column.FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in Column.FIELDS or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        return isinstance(other, Column) and all(getattr(self, f) == getattr(other, f) for f in Column.__slots__)
+
+    def __repr__(self):
+        return (f"Column(width={self.width!r}, shelf_heights={self.shelf_heights!r}, "
+                f"vertical_dividers={self.vertical_dividers!r}, has_top={self.has_top!r}, "
+                f"merge_right={self.merge_right!r}, drawers={self.drawers!r})")
+
+class GroupIndex:
+    """
+    Merged groups (merge_right chains) of a column list, with prefix sums of
+    the column widths so that positions resolve in O(log n).
+    Group g spans columns starts[g]..ends[g] (inclusive).
+    """
+    __slots__ = ('starts', 'ends', 'offsets', 'group_of', '_group_x')
+
+    def __init__(self, columns):
+        offsets = [0]
+        for c in columns:
+            offsets.append(offsets[-1] + c.width)
+        self.offsets = offsets # offsets[i] is the x of column i, offsets[-1] the total width
+
+        self.starts = []
+        self.ends = []
+        self.group_of = [] # Column index -> group index
+        n = len(columns)
+        i = 0
+        while i < n:
+            end = i
+            while end < n - 1 and columns[end].merge_right:
+                end += 1
+            self.group_of.extend([len(self.starts)] * (end - i + 1))
+            self.starts.append(i)
+            self.ends.append(end)
+            i = end + 1
+        self._group_x = [offsets[i] for i in self.starts]
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def total_width(self):
+        return self.offsets[-1]
+
+    def span(self, g):
+        return self.starts[g], self.ends[g]
+
+    def column_x(self, i):
+        return self.offsets[i]
+
+    def group_x(self, g):
+        return self._group_x[g]
+
+    def group_width(self, g):
+        return self.offsets[self.ends[g] + 1] - self._group_x[g]
+
+    def group_at(self, x):
+        """Index of the group covering x cm from the left edge, or None outside the wall."""
+        if x < 0 or x >= self.offsets[-1]:
+            return None
+        return bisect_right(self._group_x, x) - 1
+
+    def column_at(self, x):
+        """Index of the column covering x cm from the left edge, or None outside the wall."""
+        if x < 0 or x >= self.offsets[-1]:
+            return None
+        return bisect_right(self.offsets, x) - 1
+
+def migrate_column_dict(c, total_height, bottom_height):
+    """Upgrades a column dict from older save formats in place and returns it."""
+    if 'shelf_heights' not in c:
+        # Convert 'shelves' count to list
+        count = c.get('shelves', 3) # Old count was spaces
+        c['shelf_heights'] = []
+        if count > 0:
+            top_h = total_height - bottom_height
+            spacing = top_h / count
+            for i in range(1, count):
+                c['shelf_heights'].append(bottom_height + spacing*i)
+
+    if 'vertical_dividers' not in c:
+        c['vertical_dividers'] = []
+
+    if 'has_top' not in c:
+        c['has_top'] = True
+
+    if 'merge_right' not in c:
+        c['merge_right'] = False
+
+    if 'has_drawers' in c:
+        if c['has_drawers'] is True and 'drawers' not in c:
+            # Migrate old boolean to 3 default drawers of 20cm
+            c['drawers'] = [{'height': 20.0}, {'height': 20.0}, {'height': 20.0}]
+        elif c['has_drawers'] is False and 'drawers' not in c:
+            c['drawers'] = []
+        # Remove old key
+        del c['has_drawers']
+
+    if 'drawers' not in c:
+        c['drawers'] = []
+
+    # Older files were loaded without type checks: keep what they rendered as.
+    # Flags were read for their truth value, and only whole-number dividers
+    # ever matched a compartment index.
+    for key in ('has_top', 'merge_right'):
+        if not isinstance(c[key], bool):
+            c[key] = bool(c[key])
+    dividers = c['vertical_dividers']
+    if not all(isinstance(s, int) and not isinstance(s, bool) and s >= 0 for s in dividers or []):
+        c['vertical_dividers'] = [int(s) for s in dividers or []
+                                  if _is_number(s) and s >= 0 and s == int(s)]
+    return c
+
+def columns_from_dicts(columns, total_height=240.0, bottom_height=80.0):
+    """Converts the 'columns' list of a design dict into Column objects (already-typed columns pass through)."""
+    return [c if isinstance(c, Column) else Column.from_dict(migrate_column_dict(dict(c), total_height, bottom_height))
+            for c in columns]
@@ -0,0 +1,319 @@
+"""
+Cut list (bill of materials) for cabinet designs.
+
+Turns a design into the board panels it is built from: side panels, top cap
+and countertop of every top section, its shelves and dividers, and per base
+module the drawer fronts, doors (two for an 80cm module) and plinth. Sizes
+follow the geometry the renderers draw (cabinet_layout.py).
+
+A panel's length runs along the wood grain (vertical on sides, dividers and
+doors; along the wall on everything else), its width across it.
+
+design_panels() lists the panels of one design in plain Python. cut_list()
+derives the panels of a whole catalogue at once as NumPy arrays, so pricing
+thousands of designs is a handful of array operations:
+
+    table = cut_list(iter_designs("saved_designs"))
+    area_m2, banding_m, count = table.totals()
+"""
+
+import argparse
+from cabinet_layout import THICKNESS, layout_of
+from cabinet_model import columns_from_dicts
+
+TOP_DEPTH = 35.0 # cm, depth of the open top sections
+BASE_DEPTH = 60.0 # cm, depth of the base modules under the countertop
+DOOR_SPLIT_WIDTH = 80 # Base modules this wide get a pair of doors
+MIN_DOOR_HEIGHT = 1.0 # Space below the drawers that gets no door
+
+PANEL_KINDS = ('side', 'top_cap', 'countertop', 'shelf', 'divider', 'drawer_front', 'door', 'plinth')
+
+# Edges with edge banding per kind: (along the length, across the width)
+EDGE_BANDING = {
+    'side': (1, 0),
+    'top_cap': (1, 0),
+    'countertop': (1, 2),
+    'shelf': (1, 0),
+    'divider': (1, 0),
+    'drawer_front': (2, 2),
+    'door': (2, 2),
+    'plinth': (0, 0),
+}
+
+np = None
+
+def _load_numpy():
+    """Imports NumPy on first use; only cut_list() needs it."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("NumPy not found. Please install it using 'pip install numpy'")
+        np = numpy
+
+class Panel:
+    """One board panel, sizes in cm. column is the design column it belongs to."""
+    __slots__ = ('kind', 'length', 'width', 'thickness', 'column')
+
+    def __init__(self, kind, length, width, column=None, thickness=THICKNESS):
+        self.kind = kind
+        self.length = round(length, 2)
+        self.width = round(width, 2)
+        self.thickness = thickness
+        self.column = column
+
+    @property
+    def area(self):
+        """Face area in m²."""
+        return self.length * self.width / 10000.0
+
+    @property
+    def banding(self):
+        """Edge banding length in m."""
+        along, across = EDGE_BANDING[self.kind]
+        return (along * self.length + across * self.width) / 100.0
+
+    def __repr__(self):
+        return f"Panel({self.kind!r}, {self.length!r} x {self.width!r})"
+
+def design_panels(design):
+    """Panels of one design (CabinetDesigner, DesignRecord, config dict or Layout)."""
+    layout = layout_of(design)
+    widths = layout.column_widths
+    panels = []
+    add = panels.append
+    for p in layout.primitives:
+        kind = p.kind
+        if kind == 'side_panel':
+            add(Panel('side', p.h, TOP_DEPTH, p.column))
+        elif kind == 'top_cap':
+            add(Panel('top_cap', p.w, TOP_DEPTH, p.column))
+        elif kind == 'countertop':
+            add(Panel('countertop', p.w, BASE_DEPTH, p.column))
+        elif kind == 'shelf':
+            add(Panel('shelf', p.w, TOP_DEPTH, p.column))
+        elif kind == 'divider':
+            # Drawn across the whole compartment; the board stops under the shelf above
+            if p.h - THICKNESS > 0:
+                add(Panel('divider', p.h - THICKNESS, TOP_DEPTH, p.column))
+        elif kind == 'drawer':
+            add(Panel('drawer_front', p.w, p.h, p.column))
+        elif kind == 'door':
+            if widths[p.column] == DOOR_SPLIT_WIDTH:
+                add(Panel('door', p.h, p.w / 2, p.column))
+                add(Panel('door', p.h, p.w / 2, p.column))
+            else:
+                add(Panel('door', p.h, p.w, p.column))
+        elif kind == 'plinth':
+            if p.w > 0 and p.h > 0:
+                add(Panel('plinth', p.w, p.h, p.column))
+    return panels
+
+def summarize(panels):
+    """Identical panels counted together: (kind, length, width, quantity) rows in PANEL_KINDS order."""
+    counts = {}
+    for p in panels:
+        key = (p.kind, p.length, p.width)
+        counts[key] = counts.get(key, 0) + 1
+    order = {k: i for i, k in enumerate(PANEL_KINDS)}
+    return sorted(((k, l, w, n) for (k, l, w), n in counts.items()),
+                  key=lambda r: (order[r[0]], -r[1], -r[2]))
+
+class CutList:
+    """
+    Panels of a catalogue of designs as parallel NumPy arrays: design (its
+    position in the catalogue), column, kind (index into PANEL_KINDS),
+    length and width (cm).
+    """
+    def __init__(self, n_designs, design, column, kind, length, width):
+        self.n_designs = n_designs
+        self.design = design
+        self.column = column
+        self.kind = kind
+        self.length = length
+        self.width = width
+
+    def __len__(self):
+        return len(self.kind)
+
+    @property
+    def area(self):
+        """Face area per panel in m²."""
+        return self.length * self.width / 10000.0
+
+    @property
+    def banding(self):
+        """Edge banding per panel in m."""
+        along = np.array([EDGE_BANDING[k][0] for k in PANEL_KINDS])
+        across = np.array([EDGE_BANDING[k][1] for k in PANEL_KINDS])
+        return (along[self.kind] * self.length + across[self.kind] * self.width) / 100.0
+
+    def totals(self):
+        """Per design: (board area in m², edge banding in m, panel count), each an array of n_designs."""
+        n = self.n_designs
+        return (np.bincount(self.design, self.area, n), np.bincount(self.design, self.banding, n),
+                np.bincount(self.design, minlength=n))
+
+    def panels(self, design):
+        """Panel objects of one design of the catalogue."""
+        idx = np.flatnonzero(self.design == design)
+        return [Panel(PANEL_KINDS[k], l, w, c) for k, l, w, c in
+                zip(self.kind[idx].tolist(), self.length[idx].tolist(), self.width[idx].tolist(), self.column[idx].tolist())]
+
+def _flatten(designs):
+    """Per-design and per-column arrays of a catalogue, plus the flattened shelf, divider and drawer lists."""
+    heights = []
+    col_design, col_w, col_top, col_merge = [], [], [], []
+    shelf_col, shelf_h, div_col, div_j, drawer_col, drawer_h = [], [], [], [], [], []
+    c = 0
+    for d, design in enumerate(designs):
+        if isinstance(design, dict):
+            total_h = design.get('total_height', 240.0)
+            bot_h = design.get('bottom_height', 80.0)
+            plinth_h = design.get('plinth_height', 8.0)
+            columns = columns_from_dicts(design.get('columns', []), total_h, bot_h)
+        else:
+            total_h, bot_h, plinth_h = design.total_height, design.bottom_height, design.plinth_height
+            columns = design.columns
+        heights.append((total_h, bot_h, plinth_h))
+        for col in columns:
+            col_design.append(d)
+            col_w.append(col.width)
+            col_top.append(col.has_top)
+            col_merge.append(col.merge_right)
+            if col.shelf_heights:
+                shelf_col.extend([c] * len(col.shelf_heights))
+                shelf_h.extend(col.shelf_heights)
+            if col.vertical_dividers:
+                div_col.extend([c] * len(col.vertical_dividers))
+                div_j.extend(col.vertical_dividers)
+            if col.drawers:
+                drawer_col.extend([c] * len(col.drawers))
+                drawer_h.extend([dr.height for dr in col.drawers])
+            c += 1
+    heights = np.array(heights, dtype=float).reshape(-1, 3)
+    return (heights, np.array(col_design, dtype=np.intp), np.array(col_w, dtype=float),
+            np.array(col_top, dtype=bool), np.array(col_merge, dtype=bool),
+            np.array(shelf_col, dtype=np.intp), np.array(shelf_h, dtype=float),
+            np.array(div_col, dtype=np.intp), np.array(div_j, dtype=np.int64),
+            np.array(drawer_col, dtype=np.intp), np.array(drawer_h, dtype=float))
+
+def cut_list(designs):
+    """
+    Panels of every design in designs (CabinetDesigners, DesignRecords or
+    config dicts, e.g. a generator from design_io.iter_designs) as a CutList.
+    Gives the same panels as design_panels() on each design.
+    """
+    _load_numpy()
+    (heights, col_design, col_w, col_top, col_merge, shelf_col, shelf_h,
+     div_col, div_j, drawer_col, drawer_h) = _flatten(designs)
+    n_designs = len(heights)
+    total_h, bot_h, plinth_h = heights[:, 0], heights[:, 1], heights[:, 2]
+    n_cols = len(col_w)
+    # Column index within its design
+    first_col = np.searchsorted(col_design, np.arange(n_designs))
+    col_index = np.arange(n_cols) - first_col[col_design]
+    parts = [] # (design, column, kind, length, width) arrays per panel kind
+
+    def emit(kind, column, length, width, mask=None):
+        length = np.broadcast_to(length, column.shape)
+        width = np.broadcast_to(width, column.shape)
+        if mask is not None:
+            column, length, width = column[mask], length[mask], width[mask]
+        parts.append((col_design[column], col_index[column], np.full(len(column), PANEL_KINDS.index(kind)), length, width))
+
+    # Merged groups: a group starts at each design's first column and after every column without merge_right
+    starts = np.ones(n_cols, dtype=bool)
+    if n_cols:
+        starts[1:] = ~col_merge[:-1] | (col_design[1:] != col_design[:-1])
+    group_of = np.cumsum(starts) - 1
+    masters = np.flatnonzero(starts)
+    ends = np.append(masters[1:], n_cols) - 1
+    group_w = np.bincount(group_of, col_w, len(masters))
+    group_top = np.bincount(group_of, col_top, len(masters)) > 0
+    g_design = col_design[masters]
+    g_total, g_bot = total_h[g_design], bot_h[g_design]
+
+    # Top sections
+    topped = np.flatnonzero(group_top)
+    emit('side', masters[topped], (g_total - g_bot)[topped], TOP_DEPTH)
+    emit('side', ends[topped], (g_total - g_bot)[topped], TOP_DEPTH)
+    emit('top_cap', masters[topped], group_w[topped], TOP_DEPTH)
+    emit('countertop', masters[topped], group_w[topped], BASE_DEPTH)
+
+    # Shelves and compartments come from each group's first column, sorted by height
+    own = starts[shelf_col]
+    sg = group_of[shelf_col[own]]
+    sh = shelf_h[own]
+    order = np.lexsort((sh, sg))
+    sg, sh = sg[order], sh[order]
+    inside = group_top[sg] & (sh > g_bot[sg]) & (sh < g_total[sg])
+    emit('shelf', masters[sg], (group_w[sg] - 2 * THICKNESS), TOP_DEPTH, inside)
+
+    # Compartment k of a group lies between its (k-1)th shelf (or the countertop) and its kth (or the top)
+    counts = np.bincount(sg, minlength=len(masters))
+    first = np.cumsum(counts) - counts
+    rank = np.arange(len(sg)) - first[sg]
+    prev = np.where(rank > 0, np.roll(sh, 1), g_bot[sg])
+    last = np.where(counts > 0, sh[np.maximum(first + counts - 1, 0)] if len(sh) else 0.0, g_bot)
+    comp_g = np.concatenate([sg, np.arange(len(masters))])
+    comp_j = np.concatenate([rank, counts])
+    comp_low = np.concatenate([prev, last])
+    comp_high = np.concatenate([sh, g_total])
+
+    # Dividers: the compartment indices listed by each group's first column
+    own = starts[div_col]
+    dg, dj = group_of[div_col[own]], div_j[own]
+    stride = int(counts.max()) + 2 if len(counts) else 1
+    valid = dj <= counts[dg]
+    wanted = np.unique(dg[valid] * stride + dj[valid])
+    has_div = np.isin(comp_g * stride + comp_j, wanted) & group_top[comp_g]
+    div_len = comp_high - comp_low - THICKNESS
+    emit('divider', masters[comp_g], div_len, TOP_DEPTH, has_div & (div_len > 0))
+
+    # Base modules: drawers stack down from the countertop, a door fills the rest
+    emit('drawer_front', drawer_col, col_w[drawer_col], drawer_h)
+    c_design = col_design
+    remaining = bot_h[c_design] - plinth_h[c_design] - np.bincount(drawer_col, drawer_h, n_cols)
+    cols = np.arange(n_cols)
+    has_door = remaining > MIN_DOOR_HEIGHT
+    split = has_door & (col_w == DOOR_SPLIT_WIDTH)
+    single = has_door & ~split
+    emit('door', cols, remaining, col_w, single)
+    emit('door', cols, remaining, col_w / 2, split)
+    emit('door', cols, remaining, col_w / 2, split)
+    plinth_w = col_w - 4
+    plinth_hc = plinth_h[c_design]
+    emit('plinth', cols, plinth_w, plinth_hc, (plinth_w > 0) & (plinth_hc > 0))
+
+    design, column, kind, length, width = (np.concatenate(a) for a in zip(*parts))
+    # Group each design's panels together, in column order
+    order = np.lexsort((column, design))
+    return CutList(n_designs, design[order], column[order], kind[order],
+                   np.round(length[order], 2), np.round(width[order], 2))
+
+def main():
+    from design_io import iter_designs
+    parser = argparse.ArgumentParser(description="Cut list of cabinet designs")
+    parser.add_argument("paths", nargs="+", help="Design files, directories, globs or .jsonl archives")
+    parser.add_argument("--totals", action="store_true", help="Only print board area and edge banding per design")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        for record in iter_designs(path):
+            try:
+                panels = design_panels(record)
+            except ValueError as e:
+                print(f"Skipping {e}")
+                continue
+            area = sum(p.area for p in panels)
+            banding = sum(p.banding for p in panels)
+            print(f"{record.name}: {len(panels)} panels, {area:.2f} m² board, {banding:.2f} m edge banding")
+            if args.totals:
+                continue
+            for kind, length, width, qty in summarize(panels):
+                print(f"  {qty:>3} x {kind:<13} {length:>7g} x {width:<7g} x {THICKNESS}cm")
+
+if __name__ == "__main__":
+    main()
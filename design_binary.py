@@ -0,0 +1,313 @@
+"""
+Compact binary design files (.cabd).
+
+A .cabd file holds the same design as a saved JSON file, and decodes to an
+equal config dict: ints stay ints, floats come back bit for bit, and keys this
+format has no field for are kept as embedded JSON. Layout (version 2):
+
+    b"CABD", version byte
+    numbers  total_height, bottom_height, plinth_height
+    varint   column count
+    numbers  column widths
+    bytes    one flag byte per column (has_top, merge_right, extra keys, drawer extras)
+    numbers  shelf_heights count per column, then all columns' shelf heights
+    numbers  the same for vertical_dividers and for drawer heights
+    JSON     drawer extras, then column extras, of the flagged columns
+    JSON     top-level extras (version 2; a design without any is written as version 1)
+
+A "numbers" list is a varint count and, unless empty, one type tag for the
+whole list followed by the values packed with struct: small ints as int8/16/32/64,
+floats with at most one decimal as tenths in int8/16/32, other floats as
+float64. Lists mixing ints and floats add a bitmask of the int positions.
+
+    python design_binary.py templates/ saved_designs/     # write .cabd next to each .json
+    python design_binary.py saved_designs/ --to-json      # and back
+"""
+
+import os
+import sys
+import json
+import math
+import struct
+import argparse
+from cabinet_model import columns_from_dicts
+
+MAGIC = b"CABD"
+VERSION = 2
+BINARY_EXT = '.cabd'
+
+# Number list type tags
+INT_TAGS = ((1, 'b', -0x80, 0x7f), (2, 'h', -0x8000, 0x7fff), (3, 'i', -0x80000000, 0x7fffffff),
+            (4, 'q', -0x8000000000000000, 0x7fffffffffffffff))
+DECI_TAGS = ((5, 'b', -0x80, 0x7f), (6, 'h', -0x8000, 0x7fff), (7, 'i', -0x80000000, 0x7fffffff))
+TAG_FLOAT = 8
+TAG_MIXED = 9
+TAG_CODES = {tag: code for tag, code, _, _ in INT_TAGS + DECI_TAGS}
+TAG_CODES[TAG_FLOAT] = 'd'
+
+FLAG_TOP, FLAG_MERGE, FLAG_EXTRA, FLAG_DRAWER_EXTRA = 1, 2, 4, 8
+TOP_LEVEL_KEYS = ('total_height', 'bottom_height', 'plinth_height', 'columns')
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _read_varint(buf, pos):
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    n, shift = 0, 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def _tenths(x):
+    """x as an exact number of tenths, or None when x / 10 would not give back the same float."""
+    if not math.isfinite(x) or (x == 0 and math.copysign(1.0, x) < 0):
+        return None
+    t = round(x * 10)
+    return t if t / 10 == x else None
+
+def _smallest(tags, lo, hi):
+    for tag, code, tmin, tmax in tags:
+        if tmin <= lo and hi <= tmax:
+            return tag, code
+    return None
+
+def _is_int(v):
+    return isinstance(v, int) and not isinstance(v, bool)
+
+def _write_numbers(out, values):
+    n = len(values)
+    _write_varint(out, n)
+    if not n:
+        return
+    if all(map(_is_int, values)):
+        found = _smallest(INT_TAGS, min(values), max(values))
+        if found is None:
+            raise ValueError(f"Integer out of range for {BINARY_EXT}: {values!r}")
+        tag, code = found
+        packed = values
+    elif all(type(v) is float for v in values):
+        tenths = [_tenths(v) for v in values]
+        found = None if None in tenths else _smallest(DECI_TAGS, min(tenths), max(tenths))
+        if found is None:
+            tag, code, packed = TAG_FLOAT, 'd', values
+        else:
+            tag, code = found
+            packed = tenths
+    else:
+        # Ints among floats: mark their positions and store every value as a float
+        mask = bytearray((n + 7) // 8)
+        floats = []
+        for i, v in enumerate(values):
+            if _is_int(v):
+                if float(v) != v:
+                    raise ValueError(f"Integer out of range for {BINARY_EXT}: {v!r}")
+                mask[i >> 3] |= 1 << (i & 7)
+                floats.append(float(v))
+            elif type(v) is float:
+                floats.append(v)
+            else:
+                raise ValueError(f"Not a number: {v!r}")
+        out.append(TAG_MIXED)
+        out += mask
+        _write_numbers(out, floats)
+        return
+    out.append(tag)
+    out += struct.pack(f'<{n}{code}', *packed)
+
+def _read_numbers(buf, pos):
+    n, pos = _read_varint(buf, pos)
+    if not n:
+        return [], pos
+    tag = buf[pos]
+    pos += 1
+    if tag == TAG_MIXED:
+        mask = buf[pos:pos + (n + 7) // 8]
+        values, pos = _read_numbers(buf, pos + len(mask))
+        for i in range(n):
+            if mask[i >> 3] & (1 << (i & 7)):
+                values[i] = int(values[i])
+        return values, pos
+    code = TAG_CODES.get(tag)
+    if code is None:
+        raise ValueError(f"Unknown number tag {tag} at byte {pos - 1}.")
+    fmt = f'<{n}{code}'
+    values = list(struct.unpack_from(fmt, buf, pos))
+    pos += struct.calcsize(fmt)
+    if tag >= 5 and tag != TAG_FLOAT:
+        values = [v / 10 for v in values]
+    return values, pos
+
+def _write_blob(out, obj):
+    data = json.dumps(obj, separators=(',', ':')).encode('utf-8') if obj else b""
+    _write_varint(out, len(data))
+    out += data
+
+def _read_blob(buf, pos):
+    n, pos = _read_varint(buf, pos)
+    if not n:
+        return None, pos
+    obj = json.loads(bytes(buf[pos:pos + n]).decode('utf-8'))
+    if not isinstance(obj, dict):
+        raise ValueError(f"Corrupt {BINARY_EXT} design: extra keys at byte {pos} are not an object.")
+    return obj, pos + n
+
+def encode_design(data):
+    """Encodes a design config dict (as written by save_config) to .cabd bytes. Older formats are migrated first."""
+    total_h = data.get('total_height', 240.0)
+    bot_h = data.get('bottom_height', 80.0)
+    columns = columns_from_dicts(data.get('columns', []), total_h, bot_h)
+    extra = {k: v for k, v in data.items() if k not in TOP_LEVEL_KEYS}
+
+    out = bytearray(MAGIC)
+    out.append(VERSION if extra else 1)
+    _write_numbers(out, [total_h, bot_h, data.get('plinth_height', 8.0)])
+    _write_varint(out, len(columns))
+    _write_numbers(out, [c.width for c in columns])
+    flags = []
+    for c in columns:
+        f = (FLAG_TOP if c.has_top else 0) | (FLAG_MERGE if c.merge_right else 0)
+        if c.extra:
+            f |= FLAG_EXTRA
+        if any(d.extra for d in c.drawers):
+            f |= FLAG_DRAWER_EXTRA
+        flags.append(f)
+    out += bytes(flags)
+    for field in ('shelf_heights', 'vertical_dividers'):
+        lists = [getattr(c, field) for c in columns]
+        _write_numbers(out, [len(v) for v in lists])
+        _write_numbers(out, [v for values in lists for v in values])
+    _write_numbers(out, [len(c.drawers) for c in columns])
+    _write_numbers(out, [d.height for c in columns for d in c.drawers])
+    for c, f in zip(columns, flags):
+        if f & FLAG_DRAWER_EXTRA:
+            for d in c.drawers:
+                _write_blob(out, d.extra)
+    for c, f in zip(columns, flags):
+        if f & FLAG_EXTRA:
+            _write_blob(out, c.extra)
+    if extra:
+        _write_blob(out, extra)
+    return bytes(out)
+
+def decode_design(buf):
+    """Decodes .cabd bytes to a design config dict, equal to the one that was encoded."""
+    buf = memoryview(buf)
+    if len(buf) < 5 or bytes(buf[:4]) != MAGIC:
+        raise ValueError(f"Not a {BINARY_EXT} design (bad magic).")
+    version = buf[4]
+    if version > VERSION:
+        raise ValueError(f"{BINARY_EXT} version {version} is newer than this reader (version {VERSION}).")
+    try:
+        (total_h, bot_h, plinth_h), pos = _read_numbers(buf, 5)
+        n, pos = _read_varint(buf, pos)
+        widths, pos = _read_numbers(buf, pos)
+        flags = bytes(buf[pos:pos + n])
+        pos += n
+        lists = []
+        for _ in range(3):
+            counts, pos = _read_numbers(buf, pos)
+            values, pos = _read_numbers(buf, pos)
+            split = []
+            start = 0
+            for count in counts:
+                split.append(values[start:start + count])
+                start += count
+            lists.append(split)
+        shelves, dividers, drawer_heights = lists
+        columns = []
+        for i, f in enumerate(flags):
+            columns.append({'width': widths[i], 'shelf_heights': shelves[i], 'vertical_dividers': dividers[i],
+                            'has_top': bool(f & FLAG_TOP), 'merge_right': bool(f & FLAG_MERGE),
+                            'drawers': [{'height': h} for h in drawer_heights[i]]})
+        for col, f in zip(columns, flags):
+            if f & FLAG_DRAWER_EXTRA:
+                for d in col['drawers']:
+                    extra, pos = _read_blob(buf, pos)
+                    if extra:
+                        d.update(extra)
+        for col, f in zip(columns, flags):
+            if f & FLAG_EXTRA:
+                extra, pos = _read_blob(buf, pos)
+                if extra:
+                    col.update(extra)
+        extra = None
+        if version >= 2:
+            extra, pos = _read_blob(buf, pos)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Truncated {BINARY_EXT} design: {e}")
+    data = dict(extra or {})
+    data.update({'total_height': total_h, 'bottom_height': bot_h, 'plinth_height': plinth_h, 'columns': columns})
+    return data
+
+def save_binary(data, filename):
+    with open(filename, 'wb') as f:
+        f.write(encode_design(data))
+
+def load_binary(filename):
+    with open(filename, 'rb') as f:
+        return decode_design(f.read())
+
+def is_binary(filename):
+    return filename.endswith(BINARY_EXT)
+
+def convert(path, to_json=False, out_dir=None):
+    """
+    Converts every design file in path (a file, directory or glob) between
+    JSON and .cabd, writing next to the source or into out_dir. Each result is
+    checked to decode to the same design. Returns (converted, failed).
+    """
+    from design_io import iter_designs
+    src_ext, dst_ext = (BINARY_EXT, '.json') if to_json else ('.json', BINARY_EXT)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    converted = failed = 0
+    src_bytes = dst_bytes = 0
+    for record in iter_designs(path):
+        source = record.source
+        if not source.endswith(src_ext):
+            continue
+        target = os.path.join(out_dir or os.path.dirname(source), record.name + dst_ext)
+        try:
+            data = record.to_dict()
+            if to_json:
+                with open(target, 'w') as f:
+                    json.dump(data, f, indent=4)
+            else:
+                save_binary(data, target)
+                if load_binary(target) != data:
+                    raise ValueError("round trip mismatch")
+        except (OSError, ValueError) as e:
+            print(f"Failed to convert {source}: {e}")
+            failed += 1
+            continue
+        converted += 1
+        src_bytes += os.path.getsize(source)
+        dst_bytes += os.path.getsize(target)
+    if converted:
+        print(f"Converted {converted} design(s): {src_bytes} -> {dst_bytes} bytes "
+              f"({dst_bytes / max(src_bytes, 1):.0%}).")
+    return converted, failed
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Convert design files between JSON and compact {BINARY_EXT}")
+    parser.add_argument("paths", nargs="+", help="Design files, directories or glob patterns")
+    parser.add_argument("--to-json", action="store_true", help=f"Convert {BINARY_EXT} files back to JSON")
+    parser.add_argument("--out-dir", help="Write the converted files here instead of next to the sources")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.paths:
+        failed += convert(path, args.to_json, args.out_dir)[1]
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
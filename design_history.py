@@ -0,0 +1,117 @@
+"""
+Undo/redo history for CabinetDesigner.
+
+A snapshot is a design's heights plus a tuple of its Column objects. Once a
+snapshot holds a column, the designer never edits that column in place: it
+copies the column on its first change (copy-on-write, see
+CabinetDesigner._edit_column). Consecutive snapshots therefore share every
+column an edit did not touch, and one step costs a tuple of references plus
+the columns that edit changed.
+"""
+
+import sys
+import operator
+from itertools import compress
+from collections import deque
+
+HISTORY_BYTES = 2 * 1024 * 1024 # Default memory budget of one designer's history
+
+class Snapshot:
+    """The state of a design before (undo) or after (redo) the edit named by label."""
+    __slots__ = ('total_height', 'bottom_height', 'plinth_height', 'columns', 'label', 'nbytes')
+
+    def __init__(self, total_height, bottom_height, plinth_height, columns, label=None):
+        self.total_height = total_height
+        self.bottom_height = bottom_height
+        self.plinth_height = plinth_height
+        self.columns = columns # Tuple of Column objects, never modified
+        self.label = label
+        self.nbytes = 0
+
+    def same_state(self, total_height, bottom_height, plinth_height, columns):
+        if (self.total_height, self.bottom_height, self.plinth_height) != (total_height, bottom_height, plinth_height):
+            return False
+        if len(self.columns) != len(columns):
+            return False
+        if all(map(operator.is_, self.columns, columns)):
+            return True
+        return all(a is b or a == b for a, b in zip(self.columns, columns))
+
+def column_bytes(col):
+    """Approximate memory held by one column: the object, its lists and their items."""
+    items = len(col.shelf_heights) + len(col.vertical_dividers) + len(col.drawers)
+    return sys.getsizeof(col) + 3 * sys.getsizeof([]) + items * 32
+
+def snapshot_bytes(snapshot, neighbour_columns):
+    """Estimated memory a snapshot adds on top of a neighbouring state: its tuple plus the columns only it holds."""
+    columns = snapshot.columns
+    if len(columns) == len(neighbour_columns):
+        # Same length: compare by position (a swap counts both columns)
+        own = compress(columns, map(operator.is_not, columns, neighbour_columns))
+    else:
+        shared = set(map(id, neighbour_columns))
+        own = [col for col in columns if id(col) not in shared]
+    return sys.getsizeof(columns) + 120 + sum(map(column_bytes, own))
+
+class History:
+    """
+    Undo and redo stacks of snapshots. When the estimated size of all
+    snapshots exceeds max_bytes, the oldest undo steps are dropped first.
+    """
+    def __init__(self, max_bytes=HISTORY_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._undo = deque() # Oldest first
+        self._redo = [] # Next redo last
+
+    def __len__(self):
+        return len(self._undo) + len(self._redo)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def push(self, before, current_columns):
+        """Records the state before an edit. A new edit discards the redo steps."""
+        before.nbytes = snapshot_bytes(before, current_columns)
+        self._undo.append(before)
+        self.nbytes += before.nbytes
+        for snap in self._redo:
+            self.nbytes -= snap.nbytes
+        self._redo.clear()
+        self._trim()
+
+    def undo(self, current):
+        """Swaps the current state onto the redo stack; returns the state to restore, or None."""
+        return self._step(self._undo, self._redo, current)
+
+    def redo(self, current):
+        """Swaps the current state onto the undo stack; returns the state to restore, or None."""
+        return self._step(self._redo, self._undo, current)
+
+    def _step(self, source, target, current):
+        if not source:
+            return None
+        snap = source.pop()
+        self.nbytes -= snap.nbytes
+        current.label = snap.label
+        current.nbytes = snapshot_bytes(current, snap.columns)
+        target.append(current)
+        self.nbytes += current.nbytes
+        self._trim()
+        return snap
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.nbytes = 0
+
+    def _trim(self):
+        while self.nbytes > self.max_bytes and self._undo:
+            self.nbytes -= self._undo.popleft().nbytes
+        while self.nbytes > self.max_bytes and self._redo:
+            self.nbytes -= self._redo.pop(0).nbytes
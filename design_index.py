@@ -0,0 +1,238 @@
+"""
+SQLite index of a directory of saved designs.
+
+Keeps one row of metadata per design file (size, counts, thumbnail, mtime) so
+listing and searching saved designs reads only the rows of the requested page
+instead of opening every file:
+
+    index = DesignIndex("saved_designs")
+    index.sync()                         # pick up files changed outside the app
+    index.query(min_width=300, has_drawers=True, sort='width', limit=20)
+
+update() is called whenever the app saves a design; sync() walks the directory
+and re-reads only files whose mtime changed since they were indexed.
+"""
+
+import os
+import sqlite3
+import threading
+from design_io import DesignRecord, read_design
+from design_binary import is_binary
+
+INDEX_NAME = ".index.sqlite3"
+THUMB_DIR = ".thumbnails"
+THUMB_WIDTH = 200
+
+SORT_KEYS = ('name', 'width', 'height', 'columns', 'shelves', 'drawers', 'mtime')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    name TEXT PRIMARY KEY,
+    width REAL NOT NULL,
+    height REAL NOT NULL,
+    columns INTEGER NOT NULL,
+    shelves INTEGER NOT NULL,
+    drawers INTEGER NOT NULL,
+    thumbnail TEXT,
+    mtime INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS designs_width ON designs (width);
+CREATE INDEX IF NOT EXISTS designs_height ON designs (height);
+CREATE INDEX IF NOT EXISTS designs_drawers ON designs (drawers);
+CREATE INDEX IF NOT EXISTS designs_mtime ON designs (mtime);
+"""
+
+# query() filter -> SQL condition
+_FILTERS = {
+    'min_width': "width >= ?", 'max_width': "width <= ?",
+    'min_height': "height >= ?", 'max_height': "height <= ?",
+    'min_columns': "columns >= ?", 'max_columns': "columns <= ?",
+    'min_drawers': "drawers >= ?", 'max_drawers': "drawers <= ?",
+    'name': "name LIKE ? ESCAPE '\\'",
+}
+
+def design_metadata(design):
+    """Index fields of a CabinetDesigner, DesignRecord or config dict."""
+    if isinstance(design, dict):
+        design = DesignRecord(design)
+    columns = design.columns
+    return {
+        'width': sum(c.width for c in columns),
+        'height': design.total_height,
+        'columns': len(columns),
+        'shelves': sum(len(c.shelf_heights) for c in columns),
+        'drawers': sum(len(c.drawers) for c in columns),
+    }
+
+class DesignIndex:
+    """
+    Index of the design files in directory, stored in directory/.index.sqlite3
+    unless path is given. With thumbnails, update() also writes a PNG preview
+    per design into directory/.thumbnails and records its path.
+    """
+    def __init__(self, directory, path=None, thumbnails=False):
+        self.directory = directory
+        self.path = path or os.path.join(directory, INDEX_NAME)
+        self.thumb_dir = os.path.join(directory, THUMB_DIR) if thumbnails else None
+        self._local = threading.local()
+        for d in (directory, self.thumb_dir):
+            if d and not os.path.exists(d):
+                os.makedirs(d)
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections cannot be shared between threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _thumb_path(self, name):
+        # From the full file name: x.json and x.cabd are different designs
+        return os.path.join(self.thumb_dir, name + ".png")
+
+    def _write_thumbnail(self, name, png):
+        path = self._thumb_path(name)
+        try:
+            with open(path, 'wb') as f:
+                f.write(png)
+        except OSError as e:
+            print(f"Could not write thumbnail for {name}: {e}")
+            return None
+        return path
+
+    def _thumbnail(self, name, design):
+        from render_cabinet import render_thumbnail_to_bytes
+        try:
+            png = render_thumbnail_to_bytes(design, THUMB_WIDTH)
+        except ValueError as e:
+            print(f"Could not render thumbnail for {name}: {e}")
+            return None
+        return self._write_thumbnail(name, png)
+
+    def update(self, name, design=None, thumbnail=True):
+        """
+        (Re)indexes the design file name after it was written. design is its
+        content if the caller has it at hand; otherwise the file is read.
+        With thumbnail=False no preview is rendered now; set_thumbnail() can
+        store one later.
+        """
+        filepath = os.path.join(self.directory, name)
+        try:
+            mtime = os.stat(filepath).st_mtime_ns
+            if design is None:
+                design = read_design(filepath)
+            meta = design_metadata(design)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            print(f"Could not index {name}: {e}")
+            return False
+        meta['thumbnail'] = self._thumbnail(name, design) if self.thumb_dir and thumbnail else None
+        with self._db() as db:
+            self._put(db, name, meta, mtime)
+        return True
+
+    def set_thumbnail(self, name, png, mtime):
+        """Stores a THUMB_WIDTH preview rendered elsewhere, if name is still indexed at mtime."""
+        if not self.thumb_dir:
+            return False
+        row = self.get(name)
+        if row is None or row['mtime'] != mtime:
+            return False
+        path = self._write_thumbnail(name, png)
+        if path is None:
+            return False
+        with self._db() as db:
+            db.execute("UPDATE designs SET thumbnail = ? WHERE name = ? AND mtime = ?", (path, name, mtime))
+        return True
+
+    def _put(self, db, name, meta, mtime):
+        db.execute("INSERT OR REPLACE INTO designs (name, width, height, columns, shelves, drawers, thumbnail, mtime) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                   (name, meta['width'], meta['height'], meta['columns'], meta['shelves'],
+                    meta['drawers'], meta['thumbnail'], mtime))
+
+    def remove(self, name):
+        with self._db() as db:
+            db.execute("DELETE FROM designs WHERE name = ?", (name,))
+        if self.thumb_dir:
+            try:
+                os.remove(self._thumb_path(name))
+            except OSError:
+                pass
+
+    def sync(self):
+        """
+        Brings the index up to date with the directory: new and changed files
+        are read one at a time, deleted ones dropped, all in one transaction.
+        Thumbnails of files changed outside the app are left to be rendered on
+        demand. Returns the number of rows added or updated.
+        """
+        db = self._db()
+        indexed = {row['name']: row['mtime'] for row in db.execute("SELECT name, mtime FROM designs")}
+        changed = 0
+        seen = set()
+        with db, os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not (entry.name.endswith('.json') or is_binary(entry.name)):
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime_ns
+                if indexed.get(entry.name) == mtime:
+                    continue
+                try:
+                    meta = design_metadata(read_design(entry.path))
+                except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+                    print(f"Could not index {entry.name}: {e}")
+                    continue
+                meta['thumbnail'] = None
+                self._put(db, entry.name, meta, mtime)
+                changed += 1
+        for name in indexed.keys() - seen:
+            self.remove(name)
+        return changed
+
+    def _where(self, filters, has_drawers):
+        conditions, params = [], []
+        for key, value in filters.items():
+            if key not in _FILTERS:
+                raise ValueError(f"Unknown filter {key!r}.")
+            if value is None:
+                continue
+            if key == 'name':
+                value = '%' + value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append(_FILTERS[key])
+            params.append(value)
+        if has_drawers is not None:
+            conditions.append("drawers > 0" if has_drawers else "drawers = 0")
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def query(self, sort='mtime', descending=True, limit=50, offset=0, has_drawers=None, **filters):
+        """
+        Metadata rows (dicts) of the designs matching the filters: min_/max_
+        width, height, columns and drawers, name (a substring) and has_drawers.
+        Sorted by one of SORT_KEYS (ties by name), a page of limit rows from offset.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Cannot sort by {sort!r}; use one of {', '.join(SORT_KEYS)}.")
+        where, params = self._where(filters, has_drawers)
+        order = "DESC" if descending else "ASC"
+        sql = f"SELECT * FROM designs{where} ORDER BY {sort} {order}, name {order} LIMIT ? OFFSET ?"
+        return [dict(row) for row in self._db().execute(sql, params + [limit, offset])]
+
+    def count(self, has_drawers=None, **filters):
+        where, params = self._where(filters, has_drawers)
+        return self._db().execute(f"SELECT COUNT(*) FROM designs{where}", params).fetchone()[0]
+
+    def get(self, name):
+        row = self._db().execute("SELECT * FROM designs WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
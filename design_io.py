@@ -0,0 +1,175 @@
+"""
+Streaming access to collections of saved designs.
+
+iter_designs() yields one DesignRecord at a time from a directory of design
+files (JSON or .cabd, see design_binary.py), a single file, a glob pattern or
+a JSON-lines archive (one design per line, optionally gzip compressed), so
+memory use stays that of one design however large the collection is. Records keep the columns as loaded and only
+run the legacy migration (shelf counts, has_drawers) when the columns are
+first used, so iterating checks only that each file parses: a design whose
+columns cannot be migrated raises ValueError from record.columns, and callers
+that skip bad designs catch it there.
+
+    for design in iter_designs("saved_designs"):
+        print(design.name, design.total_width, len(design.columns))
+"""
+
+import os
+import json
+import gzip
+import glob
+from cabinet_model import Column, columns_from_dicts
+from cabinet_layout import compute_layout
+from design_binary import is_binary, load_binary
+
+ARCHIVE_EXTS = ('.jsonl', '.jsonl.gz')
+
+class DesignRecord:
+    """
+    One design read from a collection: its heights and columns, plus the name
+    and source it was read from. Unlike CabinetDesigner it has no history or
+    caches; to_designer() turns it into one for editing.
+    """
+    __slots__ = ('name', 'source', 'total_height', 'bottom_height', 'plinth_height', '_columns', '_migrated')
+
+    def __init__(self, data, name=None, source=None):
+        self.name = name
+        self.source = source
+        self.total_height = data.get('total_height', 240.0)
+        self.bottom_height = data.get('bottom_height', 80.0)
+        self.plinth_height = data.get('plinth_height', 8.0)
+        self._columns = data.get('columns', [])
+        self._migrated = False
+
+    @property
+    def columns(self):
+        """Column objects, migrated from older save formats on first access."""
+        if not self._migrated:
+            try:
+                self._columns = columns_from_dicts(self._columns, self.total_height, self.bottom_height)
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                raise ValueError(f"{self.source or self.name}: invalid columns: {e!r}")
+            self._migrated = True
+        return self._columns
+
+    @property
+    def column_count(self):
+        return len(self._columns)
+
+    @property
+    def total_width(self):
+        """Wall width in cm; needs no migration."""
+        return sum(c.width if isinstance(c, Column) else c['width'] for c in self._columns)
+
+    def to_dict(self):
+        return {
+            'total_height': self.total_height,
+            'bottom_height': self.bottom_height,
+            'plinth_height': self.plinth_height,
+            'columns': [c.to_dict() for c in self.columns]
+        }
+
+    def layout(self):
+        """Positioned geometry, so a record can be passed straight to the renderers."""
+        return compute_layout({
+            'total_height': self.total_height,
+            'bottom_height': self.bottom_height,
+            'plinth_height': self.plinth_height,
+            'columns': self.columns
+        })
+
+    def to_designer(self):
+        """A new CabinetDesigner holding this design, with an empty undo history."""
+        from simple_designer import CabinetDesigner
+        designer = CabinetDesigner()
+        designer.load_dict(self.to_dict())
+        designer.history.clear()
+        return designer
+
+    def __repr__(self):
+        return f"DesignRecord({self.name!r}, {self.column_count} columns)"
+
+def _is_archive(path):
+    return path.endswith(ARCHIVE_EXTS)
+
+def _open_text(path, mode='r'):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def _design_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def read_design(path):
+    """Reads one design file (JSON or .cabd) into a DesignRecord."""
+    if is_binary(path):
+        return DesignRecord(load_binary(path), _design_name(path), path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return DesignRecord(json.load(f), _design_name(path), path)
+
+def _read_archive(path, strict):
+    """Yields the designs of a JSON-lines archive, one line at a time."""
+    with _open_text(path) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                if 'design' in entry:
+                    record = DesignRecord(entry['design'], entry.get('name'), f"{path}:{n}")
+                else:
+                    record = DesignRecord(entry, None, f"{path}:{n}")
+            except (ValueError, TypeError, AttributeError) as e:
+                if strict:
+                    raise ValueError(f"{path}, line {n}: {e}")
+                print(f"Skipping {path}, line {n}: {e}")
+                continue
+            yield record
+
+def _paths(path):
+    """Design files and archives named by path, without listing a directory into memory."""
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file() and (entry.name.endswith('.json') or is_binary(entry.name) or _is_archive(entry.name)):
+                    yield entry.path
+    elif os.path.exists(path):
+        yield path
+    else:
+        yield from glob.iglob(path)
+
+def iter_designs(path, strict=False):
+    """
+    Yields a DesignRecord per design in path: a directory (its *.json and
+    *.cabd files and archives, in directory order), a design file, a .jsonl
+    or .jsonl.gz archive, or a glob pattern. Unreadable designs are reported and skipped,
+    or raise ValueError with strict. Columns are migrated lazily, so invalid
+    columns raise ValueError only once record.columns is used.
+    """
+    for p in _paths(path):
+        if _is_archive(p):
+            yield from _read_archive(p, strict)
+            continue
+        try:
+            record = read_design(p)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            if strict:
+                raise ValueError(f"{p}: {e}")
+            print(f"Skipping {p}: {e}")
+            continue
+        yield record
+
+def write_archive(designs, path):
+    """
+    Writes designs (DesignRecords, CabinetDesigners or config dicts) to a
+    JSON-lines archive, gzip compressed for a .gz path. Streams: designs may be
+    a generator such as iter_designs(). Returns the number written.
+    """
+    count = 0
+    with _open_text(path, 'w') as f:
+        for design in designs:
+            name = getattr(design, 'name', None)
+            data = design if isinstance(design, dict) else design.to_dict()
+            f.write(json.dumps({'name': name, 'design': data}, separators=(',', ':')) + "\n")
+            count += 1
+    return count
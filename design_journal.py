@@ -0,0 +1,196 @@
+"""
+Append-only command journal for designs.
+
+Every change to an attached CabinetDesigner is appended as one JSON line:
+the designer method and its arguments ("op", "args"), or the whole design
+("design") for changes that replace the state, such as undo and redo.
+
+A journal is a directory of segment files named after the sequence number of
+their first record. Each segment starts with a snapshot of the design, so
+recovering the latest state reads only the newest segment, and any retained
+point in time is rebuilt by replaying one segment up to that record.
+"""
+
+import io
+import os
+import json
+import contextlib
+from simple_designer import CabinetDesigner
+
+SNAPSHOT_EVERY = 200 # Records per segment before a new snapshot is written
+
+# Designer methods a journal may replay
+JOURNAL_OPS = frozenset([
+    'add_column', 'configure_drawers', 'set_plinth_height', 'toggle_drawers', 'toggle_top',
+    'toggle_merge', 'remove_column', 'set_height', 'set_shelves_count', 'add_shelf_at_height',
+    'remove_shelf_by_index', 'subdivide_compartment', 'move_shelf', 'swap_columns', 'load_dict',
+])
+
+def read_segment(path):
+    """Yields the records of a segment file, stopping at a line cut short by a crash."""
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+def apply_record(designer, record):
+    """Applies one journal record to a designer. Messages the designer prints are discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if 'design' in record:
+            designer.load_dict(record['design'])
+            return
+        op = record.get('op')
+        if op not in JOURNAL_OPS:
+            raise ValueError(f"Unknown journal operation {op!r} in record {record.get('seq')}.")
+        getattr(designer, op)(*record.get('args', []), **record.get('kwargs', {}))
+
+class DesignJournal:
+    """
+    Journal of one design in directory. attach() a designer to log its
+    changes; recover() rebuilds the latest design after a restart or crash.
+
+    keep_segments bounds the disk use by deleting the oldest segments (and so
+    the oldest points in time) once more than that many exist. With sync, every
+    record is fsync'ed, which survives power loss but costs a disk flush per edit.
+    """
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY, keep_segments=None, sync=False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.keep_segments = keep_segments
+        self.sync = sync
+        self.designer = None
+        self.seq = 0 # Sequence number of the last record written
+        self._file = None
+        self._in_segment = 0
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        segments = self.segments()
+        # Continue numbering after whatever an earlier process wrote. A crash right
+        # after a segment was created leaves it empty: its records would have
+        # started at its number, so numbering never goes back before it.
+        for _, path in reversed(segments):
+            for record in read_segment(path):
+                self.seq = record['seq']
+            if self.seq:
+                break
+        if segments:
+            self.seq = max(self.seq, segments[-1][0] - 1)
+
+    def segments(self):
+        """(first sequence number, path) of every segment, oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext == '.jsonl' and stem.isdigit():
+                found.append((int(stem), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def records(self):
+        """Yields every retained record, oldest first."""
+        for _, path in self.segments():
+            yield from read_segment(path)
+
+    def attach(self, designer):
+        """Logs every later change of designer, starting a new segment with its current state."""
+        if self.designer is not None and self.designer is not designer:
+            self.designer.journal = None
+        self.designer = designer
+        designer.journal = self
+        self._start_segment()
+
+    def detach(self):
+        if self.designer is not None:
+            self.designer.journal = None
+            self.designer = None
+        self.close()
+
+    def record(self, op, args=(), kwargs=None):
+        """Appends a designer method call."""
+        record = {'seq': self.seq + 1, 'op': op, 'args': list(args)}
+        if kwargs:
+            record['kwargs'] = kwargs
+        self._write(record)
+
+    def record_state(self, data):
+        """Appends a change that replaced the whole design, given as a config dict."""
+        self._write({'seq': self.seq + 1, 'design': data})
+
+    def _write(self, record):
+        if self._append(record):
+            self._in_segment += 1
+            if self._in_segment >= self.snapshot_every:
+                self._start_segment()
+
+    def _append(self, record):
+        if self._file is None:
+            return False
+        try:
+            self._file.write(json.dumps(record, separators=(',', ':')) + "\n")
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Journal write failed: {e}")
+            return False
+        self.seq = record['seq']
+        return True
+
+    def _start_segment(self):
+        self.close()
+        start = self.seq + 1
+        path = os.path.join(self.directory, f"{start:012d}.jsonl")
+        self._file = open(path, 'a')
+        self._in_segment = 0
+        self._append({'seq': start, 'design': self.designer.to_dict()})
+        if self.keep_segments:
+            self.compact(self.keep_segments)
+
+    def replay(self, upto=None):
+        """
+        Rebuilds the design as of record upto (default: the latest record).
+        Returns (designer, sequence number of the last record applied), with the
+        replayed edits of that segment as the designer's undo history.
+        """
+        segments = self.segments()
+        if upto is not None:
+            segments = [s for s in segments if s[0] <= upto]
+        # Newest segment first; one cut off before its snapshot was written has no records
+        for _, path in reversed(segments):
+            designer = CabinetDesigner()
+            last = None
+            for record in read_segment(path):
+                if upto is not None and record['seq'] > upto:
+                    break
+                apply_record(designer, record)
+                if last is None:
+                    # The snapshot is the starting point, not an undoable edit
+                    designer.history.clear()
+                last = record['seq']
+            if last is not None:
+                return designer, last
+        raise ValueError(f"No journal segment in {self.directory} covers record {upto}.")
+
+    def recover(self):
+        """Rebuilds the latest design and attaches it, so logging continues where it stopped."""
+        designer, last = self.replay()
+        self.seq = max(self.seq, last)
+        self.attach(designer)
+        return designer
+
+    def compact(self, keep=1):
+        """Deletes all but the newest keep segments."""
+        segments = self.segments()
+        for _, path in segments[:max(0, len(segments) - keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
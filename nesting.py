@@ -0,0 +1,299 @@
+"""
+Nesting of cut-list panels onto standard sheets.
+
+Panels are packed with guillotine cuts the way a panel saw works: each sheet
+is ripped into strips along its length, and each strip is crosscut into
+panels. Every cut removes kerf from the board. With grain, a panel's length
+(see cut_list.Panel) always runs along the sheet's length; without it, panels
+may be turned.
+
+The first pass is greedy (widest panels first, best-fit strips and sheets,
+tried with a few strip tolerances) and takes well under a second for thousands of panels. nest() can then spend
+a time budget on randomized variations of that pass, spread over several
+processes, and keeps the plan with the fewest sheets.
+
+    result = nest_designs([designer], time_budget=2)
+    print(result.sheet_count, f"{result.waste:.1%}")
+"""
+
+import os
+import time
+import random
+import argparse
+from bisect import bisect_left, insort
+from cut_list import design_panels
+
+SHEET_LENGTH = 280.0 # cm, along the grain
+SHEET_WIDTH = 207.0 # cm
+KERF = 0.4 # cm removed by each saw cut
+# How much wider than a panel (as a fraction of its width) a strip it goes
+# into may be; the greedy pass keeps the best plan of these
+GREEDY_SLACKS = (0.25, 1.0)
+
+class Placement:
+    """A panel on a sheet: its corner (x along the sheet length, y across it) and placed size."""
+    __slots__ = ('panel', 'x', 'y', 'length', 'width', 'rotated')
+
+    def __init__(self, panel, x, y, length, width, rotated=False):
+        self.panel = panel
+        self.x = x
+        self.y = y
+        self.length = length
+        self.width = width
+        self.rotated = rotated
+
+    def __repr__(self):
+        return f"Placement({self.panel!r} at {self.x:g},{self.y:g}{' rotated' if self.rotated else ''})"
+
+class Sheet:
+    """One board and the panels cut from it."""
+    def __init__(self, length, width):
+        self.length = length
+        self.width = width
+        self.placements = []
+
+    @property
+    def used_area(self):
+        return sum(p.length * p.width for p in self.placements)
+
+    @property
+    def utilization(self):
+        return self.used_area / (self.length * self.width)
+
+class NestResult:
+    """Sheets of a nesting run, plus the panels too large for any sheet."""
+    def __init__(self, sheets, unplaced, sheet_length, sheet_width, kerf):
+        self.sheets = sheets
+        self.unplaced = unplaced
+        self.sheet_length = sheet_length
+        self.sheet_width = sheet_width
+        self.kerf = kerf
+
+    @property
+    def sheet_count(self):
+        return len(self.sheets)
+
+    @property
+    def waste(self):
+        """Fraction of the sheets' area not used by panels (offcuts and kerf)."""
+        total = self.sheet_count * self.sheet_length * self.sheet_width
+        if not total:
+            return 0.0
+        return 1.0 - sum(s.used_area for s in self.sheets) / total
+
+def _size(panel):
+    if isinstance(panel, tuple):
+        return panel[0], panel[1]
+    return panel.length, panel.width
+
+def _orient(panels, length, width, grain, long_side=True):
+    """
+    (length, width, index, rotated) of every panel that fits a sheet, and the
+    indices of those that do not. Without grain, panels are turned to run
+    their long side along the sheet (long_side), or only when they would not
+    fit as they are.
+    """
+    items, unplaced = [], []
+    for i, panel in enumerate(panels):
+        l, w = _size(panel)
+        if not grain and long_side and w > l and w <= length and l <= width:
+            # Long side along the sheet, like the grain-bound panels
+            items.append((w, l, i, True))
+        elif l <= length and w <= width:
+            items.append((l, w, i, False))
+        elif not grain and w <= length and l <= width:
+            items.append((w, l, i, True))
+        else:
+            unplaced.append(i)
+    return items, unplaced
+
+def _pack(items, length, width, kerf, slack, rng=None):
+    """
+    Packs oriented items into strips, and strips into sheets, best fit.
+    items must be sorted widest first. A panel may go into a strip up to
+    slack (fraction of its width) wider than itself. With rng, strips of equal
+    height go onto the sheets in random order. Returns sheets as lists of
+    (index, x, y, length, width, rotated).
+    """
+    strips = [] # [height, [(index, x, length, width, rotated)]]
+    open_by_height = {} # strip height -> sorted [(free length, strip number)]
+    heights = [] # Distinct strip heights, ascending
+    for l, w, i, rotated in items:
+        best = None
+        lo = bisect_left(heights, w)
+        for h in heights[lo:]:
+            if h > w * (1 + slack):
+                break
+            free = open_by_height[h]
+            k = bisect_left(free, (l, -1))
+            if k < len(free) and (best is None or free[k][0] < best[0]):
+                best = free[k] + (h, k)
+        if best is None:
+            if w not in open_by_height:
+                insort(heights, w)
+                open_by_height[w] = []
+            s = len(strips)
+            strips.append([w, []])
+            entry = (length, s, w, None)
+        else:
+            entry = best
+        free_len, s, h, k = entry
+        free = open_by_height[h]
+        if k is not None:
+            del free[k]
+        strip = strips[s]
+        strip[1].append((i, length - free_len, l, w, rotated))
+        remaining = free_len - l - kerf
+        if remaining > 0:
+            insort(free, (remaining, s))
+
+    # Strips onto sheets, tallest first
+    order = sorted(range(len(strips)), key=lambda s: -strips[s][0])
+    if rng is not None:
+        # Shuffle strips of equal height
+        groups = {}
+        for s in order:
+            groups.setdefault(strips[s][0], []).append(s)
+        order = []
+        for h in sorted(groups, reverse=True):
+            rng.shuffle(groups[h])
+            order.extend(groups[h])
+    sheets = [] # [placements]
+    free_sheets = [] # sorted [(free width, sheet number)]
+    for s in order:
+        h, content = strips[s]
+        k = bisect_left(free_sheets, (h, -1))
+        if k < len(free_sheets):
+            free_w, n = free_sheets.pop(k)
+        else:
+            free_w, n = width, len(sheets)
+            sheets.append([])
+        y = width - free_w
+        sheets[n].extend((i, x, y, l, w, rotated) for i, x, l, w, rotated in content)
+        remaining = free_w - h - kerf
+        if remaining > 0:
+            insort(free_sheets, (remaining, n))
+    return sheets
+
+def _score(sheets, area):
+    """Fewer sheets first; then fuller sheets, which leaves the offcuts on one sheet."""
+    fills = [sum(p[3] * p[4] for p in sheet) / area for sheet in sheets]
+    return (len(sheets), -sum(f * f for f in fills))
+
+def _improve(items, length, width, kerf, grain, seed, deadline):
+    """Randomized restarts of _pack until deadline; returns (score, sheets) of the best."""
+    rng = random.Random(seed)
+    area = length * width
+    best = None
+    while time.monotonic() < deadline:
+        slack = rng.choice((0.1, 0.25, 0.5, 1.0, 2.0))
+        trial = items
+        if not grain:
+            # Turn a random share of the panels that also fit the other way
+            turn = rng.uniform(0.0, 0.5)
+            trial = [(w, l, i, not r) if w <= length and l <= width and rng.random() < turn else (l, w, i, r)
+                     for l, w, i, r in items]
+        # Widest first still, but shuffled among panels of similar width
+        jitter = rng.uniform(0.0, 0.1)
+        order = sorted(trial, key=lambda it: (-it[1] * (1 + rng.uniform(0, jitter)), -it[0]))
+        sheets = _pack(order, length, width, kerf, slack, rng)
+        score = _score(sheets, area)
+        if best is None or score < best[0]:
+            best = (score, sheets)
+    return best
+
+def _improve_job(args):
+    return _improve(*args)
+
+def nest(panels, sheet_length=SHEET_LENGTH, sheet_width=SHEET_WIDTH, kerf=KERF, grain=True,
+         time_budget=0, workers=None):
+    """
+    Nests panels (cut_list.Panel objects or (length, width) pairs, in cm)
+    onto sheets. With a time_budget in seconds, randomized variations of the
+    greedy plan are tried on up to workers processes (default: all cores) and
+    the best plan is kept. Returns a NestResult.
+    """
+    panels = list(panels)
+    # Without grain, the grain-bound orientation is one of the plans tried, so
+    # allowing turns never needs more sheets
+    orientations = (True,) if grain else (True, False)
+    area = sheet_length * sheet_width
+    best_score = best_sheets = items = None
+    for long_side in orientations:
+        oriented, unplaced = _orient(panels, sheet_length, sheet_width, grain, long_side)
+        oriented.sort(key=lambda it: (-it[1], -it[0]))
+        for slack in GREEDY_SLACKS:
+            sheets = _pack(oriented, sheet_length, sheet_width, kerf, slack)
+            score = _score(sheets, area)
+            if best_score is None or score < best_score:
+                best_score, best_sheets, items = score, sheets, oriented
+
+    if time_budget > 0 and items:
+        workers = workers or os.cpu_count() or 1
+        deadline = time.monotonic() + time_budget
+        jobs = [(items, sheet_length, sheet_width, kerf, grain, seed, deadline) for seed in range(workers)]
+        if workers == 1:
+            results = [_improve_job(jobs[0])]
+        else:
+            # Imported here: multiprocessing is not available in the PyScript build
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_improve_job, jobs))
+        for result in results:
+            if result is not None and result[0] < best_score:
+                best_score, best_sheets = result
+
+    sheets = []
+    for content in best_sheets:
+        sheet = Sheet(sheet_length, sheet_width)
+        sheet.placements = [Placement(panels[i], x, y, l, w, rotated) for i, x, y, l, w, rotated in content]
+        sheets.append(sheet)
+    return NestResult(sheets, [panels[i] for i in unplaced], sheet_length, sheet_width, kerf)
+
+def nest_designs(designs, **options):
+    """Nests the panels of every design (see cut_list.design_panels) together; options as for nest()."""
+    panels = []
+    for design in designs:
+        panels.extend(design_panels(design))
+    return nest(panels, **options)
+
+def main():
+    from design_io import iter_designs
+    parser = argparse.ArgumentParser(description="Nest the panels of cabinet designs onto sheets")
+    parser.add_argument("paths", nargs="+", help="Design files, directories, globs or .jsonl archives")
+    parser.add_argument("--sheet", default=f"{SHEET_LENGTH:g}x{SHEET_WIDTH:g}", help="Sheet size in cm, LENGTHxWIDTH (default: %(default)s)")
+    parser.add_argument("--kerf", type=float, default=KERF, help="Saw kerf in cm (default: %(default)s)")
+    parser.add_argument("--no-grain", action="store_true", help="Allow panels to be turned against the grain")
+    parser.add_argument("--time", type=float, default=0, help="Seconds to spend improving the plan")
+    parser.add_argument("--workers", type=int, help="Processes for the improvement phase (default: all cores)")
+    parser.add_argument("--sheets", action="store_true", help="List the panels on every sheet")
+    args = parser.parse_args()
+
+    sheet_length, sheet_width = (float(v) for v in args.sheet.lower().split("x"))
+    designs = []
+    for path in args.paths:
+        for record in iter_designs(path):
+            try:
+                record.columns # Migrates them, so a bad design is skipped here
+            except ValueError as e:
+                print(f"Skipping {e}")
+                continue
+            designs.append(record)
+    start = time.perf_counter()
+    result = nest_designs(designs, sheet_length=sheet_length, sheet_width=sheet_width, kerf=args.kerf,
+                          grain=not args.no_grain, time_budget=args.time, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    panels = sum(len(s.placements) for s in result.sheets)
+    print(f"{len(designs)} design(s), {panels} panels on {result.sheet_count} sheet(s) of "
+          f"{sheet_length:g}x{sheet_width:g}cm, {result.waste:.1%} waste ({elapsed:.2f}s)")
+    if result.unplaced:
+        print(f"{len(result.unplaced)} panel(s) larger than a sheet: {result.unplaced}")
+    if args.sheets:
+        for n, sheet in enumerate(result.sheets, 1):
+            print(f"Sheet {n}: {sheet.utilization:.1%} used")
+            for p in sorted(sheet.placements, key=lambda p: (p.y, p.x)):
+                print(f"  {p.panel.kind:<13} {p.length:>7g} x {p.width:<7g} at {p.x:g},{p.y:g}"
+                      f"{' (turned)' if p.rotated else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,27 @@
 import json
 import sys
 import os
+import io
+import glob
+import time
+import hashlib
+import argparse
+import threading
+import functools
+import contextlib
+from cabinet_layout import layout_of
+# THICKNESS used to be defined here; re-exported for callers of render_cabinet.THICKNESS
+from cabinet_layout import THICKNESS # noqa: F401
 
-# Try to import PIL
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    print("Error: Pillow library not found. Please install it using 'pip install pillow'")
-    sys.exit(1)
+# Pillow is imported on first render (see _load_pil) so that importing this
+# module stays cheap for callers that never draw.
+Image = None
+ImageDraw = None
+ImageFont = None
 
 # Configuration
 SCALE = 5.0  # Pixels per cm
 MARGIN = 100 # Pixels
-THICKNESS = 1.8 # cm (Material thickness)
 
 # Colors
 COLOR_BG = (255, 255, 255)       # White background
@@ -21,362 +30,651 @@ COLOR_CARCASS = (245, 245, 245)  # Off-white for interiors
 COLOR_EDGE = (220, 220, 220)     # Cut edge color
 COLOR_DOOR = (222, 184, 135)     # Burlywood / Light Oak
 COLOR_HANDLE = (50, 50, 50)      # Dark handles
+COLOR_PLINTH = (50, 50, 50)
 COLOR_TEXT = (0, 0, 0)
+COLOR_LABEL = (150, 150, 150)    # Compartment height labels
+
+# Fixed palette of palette-mode renders, so every image shares the same indices
+PALETTE = [COLOR_BG, COLOR_OUTLINE, COLOR_CARCASS, COLOR_EDGE, COLOR_DOOR, COLOR_HANDLE, COLOR_TEXT, COLOR_LABEL]
+PNG_COMPRESS_LEVEL = 6 # zlib level, 0 (fastest) to 9 (smallest)
+
+# Fonts
+FONT_NAME = "arial.ttf"
+# Extra font directories, searched first. Also read from CABINET_FONT_PATH (os.pathsep separated).
+FONT_SEARCH_PATH = [d for d in os.environ.get("CABINET_FONT_PATH", "").split(os.pathsep) if d]
+_font_cache = {} # (name, size) -> font object
+_font_stats = {'hits': 0, 'misses': 0}
+_font_lock = threading.Lock()
+
+# Fill and outline per rectangle primitive kind
+RECT_STYLES = {
+    'plinth': (COLOR_PLINTH, None),
+    'drawer': (COLOR_DOOR, COLOR_OUTLINE),
+    'drawer_handle': (COLOR_HANDLE, None),
+    'door': (COLOR_DOOR, COLOR_OUTLINE),
+    'side_panel': (COLOR_CARCASS, COLOR_OUTLINE),
+    'top_cap': (COLOR_CARCASS, COLOR_OUTLINE),
+    'countertop': (COLOR_CARCASS, COLOR_OUTLINE),
+    'divider': (COLOR_CARCASS, COLOR_OUTLINE),
+    'shelf': (COLOR_CARCASS, COLOR_OUTLINE),
+}
+
+def _load_pil():
+    """Imports Pillow once and keeps the modules around for every later render."""
+    global Image, ImageDraw, ImageFont
+    if Image is None:
+        try:
+            from PIL import Image as pil_image, ImageDraw as pil_draw, ImageFont as pil_font
+        except ImportError:
+            raise ImportError("Pillow library not found. Please install it using 'pip install pillow'")
+        Image, ImageDraw, ImageFont = pil_image, pil_draw, pil_font
 
 def load_config(filename):
-    with open(filename, 'r') as f:
-        return json.load(f)
+    with render_phase('config'):
+        if filename.endswith('.cabd'):
+            from design_binary import load_binary
+            return load_binary(filename)
+        with open(filename, 'r') as f:
+            return json.load(f)
+
+# Profiling: renders are only timed inside profile_render() or while a hook is
+# registered. Otherwise a phase marker costs one thread-local lookup.
+_render_hooks = []
+_profile_local = threading.local()
+_NO_PROFILE = contextlib.nullcontext()
+
+class RenderProfile:
+    """
+    Seconds spent per phase (config, layout, fonts, draw, encode) and counters
+    (primitives, partial_renders) of one render, or of everything rendered
+    inside a profile_render() block.
+    """
+    __slots__ = ('name', 'phases', 'counts', 'total')
 
-def draw_rect(draw, x_cm, y_cm, w_cm, h_cm, fill, outline=None, canvas_height=0):
+    def __init__(self, name=None):
+        self.name = name
+        self.phases = {}
+        self.counts = {}
+        self.total = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def __repr__(self):
+        phases = ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in self.phases.items())
+        return f"RenderProfile({self.name!r}, total={self.total * 1000:.1f}ms, {phases}, {self.counts})"
+
+def add_render_hook(func):
+    """Calls func(profile) with a RenderProfile after every render, on the rendering thread."""
+    _render_hooks.append(func)
+
+def remove_render_hook(func):
+    _render_hooks.remove(func)
+
+@contextlib.contextmanager
+def profile_render(name="profile_render"):
+    """
+    Profiles everything this thread renders inside the block:
+        with profile_render() as prof:
+            render_cabinet_to_bytes(designer)
+        print(prof.phases)
+    Render hooks see the block as one render called name.
+    """
+    outer = getattr(_profile_local, 'profile', None)
+    prof = RenderProfile(name)
+    _profile_local.profile = prof
+    start = time.perf_counter()
+    try:
+        yield prof
+    finally:
+        prof.total = time.perf_counter() - start
+        _profile_local.profile = outer
+        for hook in list(_render_hooks):
+            hook(prof)
+
+def render_phase(name):
+    """Context manager timing a phase of the render being profiled in this thread (if any)."""
+    prof = getattr(_profile_local, 'profile', None)
+    return _NO_PROFILE if prof is None else prof.phase(name)
+
+def count_event(name, n=1):
+    """Adds n to a counter of the render being profiled in this thread (if any)."""
+    prof = getattr(_profile_local, 'profile', None)
+    if prof is not None:
+        prof.count(name, n)
+
+def profiled(func):
+    """Marks a render entry point: with hooks registered, each outermost call is one profiled render."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _render_hooks or getattr(_profile_local, 'profile', None) is not None:
+            return func(*args, **kwargs)
+        with profile_render(func.__qualname__):
+            return func(*args, **kwargs)
+    return wrapper
+
+def layout_with_profile(designer_obj):
+    """layout_of(), timed as the 'layout' phase."""
+    with render_phase('layout'):
+        return layout_of(designer_obj)
+
+class RenderOptions:
+    """
+    Canvas settings of one render. scale (px/cm) and margin (px) default to
+    SCALE and MARGIN. Without details, text, knobs and drawer handles are
+    left out and no fonts are loaded, which is what thumbnails use.
+    With palette, the image is drawn in 'P' mode on PALETTE: PNGs encode at
+    4 bits per pixel, several times smaller and faster, but text is not
+    anti-aliased.
+    """
+    __slots__ = ('scale', 'margin', 'details', 'line_width', 'palette')
+
+    def __init__(self, scale=None, margin=None, details=True, line_width=2, palette=False):
+        self.scale = SCALE if scale is None else scale
+        self.margin = MARGIN if margin is None else margin
+        self.details = details
+        self.line_width = line_width
+        self.palette = palette
+
+    @classmethod
+    def thumbnail(cls, layout, width=200, height=None):
+        """Options that fit a layout into width (and optionally height) pixels."""
+        margin = 4
+        scale = (width - 2 * margin) / max(layout.total_width, 1)
+        if height:
+            scale = min(scale, (height - 2 * margin) / max(layout.total_height, 1))
+        return cls(scale, margin, details=False, line_width=1, palette=True)
+
+# Primitive kinds only drawn with RenderOptions.details
+DETAIL_KINDS = ('width_label', 'height_label', 'title', 'knob', 'drawer_handle')
+
+def draw_rect(draw, x_cm, y_cm, w_cm, h_cm, fill, outline=None, canvas_height=0, offset_x=0, opts=None):
     """
     Draws a rectangle in CM coordinates.
     x, y: Bottom-Left corner in CM.
+    offset_x: Pixel column of the canvas origin (for drawing into a cropped region).
     """
-    x1 = MARGIN + x_cm * SCALE
-    y1 = canvas_height - MARGIN - (y_cm * SCALE)
+    opts = opts or RenderOptions()
+    scale, margin = opts.scale, opts.margin
+    x1 = (margin + x_cm * scale) - offset_x
+    y1 = canvas_height - margin - (y_cm * scale)
     
-    x2 = MARGIN + (x_cm + w_cm) * SCALE
-    y2 = canvas_height - MARGIN - ((y_cm + h_cm) * SCALE)
+    x2 = (margin + (x_cm + w_cm) * scale) - offset_x
+    y2 = canvas_height - margin - ((y_cm + h_cm) * scale)
     
-    draw.rectangle([x1, y2, x2, y1], fill=fill, outline=outline, width=2)
+    draw.rectangle([x1, y2, x2, y1], fill=fill, outline=outline, width=opts.line_width)
 
-def draw_circle(draw, x_cm, y_cm, r_cm, fill, canvas_height):
-    cx = MARGIN + x_cm * SCALE
-    cy = canvas_height - MARGIN - (y_cm * SCALE)
-    r = r_cm * SCALE
+def draw_circle(draw, x_cm, y_cm, r_cm, fill, canvas_height, offset_x=0, opts=None):
+    opts = opts or RenderOptions()
+    cx = (opts.margin + x_cm * opts.scale) - offset_x
+    cy = canvas_height - opts.margin - (y_cm * opts.scale)
+    r = r_cm * opts.scale
     draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=fill)
 
-def render_cabinet(config_file, output_file):
+@profiled
+def render_cabinet(config_file, output_file, scale=None, margin=None, palette=False, compress_level=None):
     if not os.path.exists(config_file):
         print(f"File {config_file} not found.")
         return
 
     data = load_config(config_file)
-    
-    total_h = data.get('total_height', 240.0)
-    bot_h = data.get('bottom_height', 80.0)
-    plinth_h = data.get('plinth_height', 8.0)
-    columns = data.get('columns', [])
-    
-    total_w = sum(c['width'] for c in columns)
-    
-    # Image Dimensions
-    img_w = int((total_w * SCALE) + (MARGIN * 2))
-    img_h = int((total_h * SCALE) + (MARGIN * 2))
-    
-    im = Image.new('RGB', (img_w, img_h), COLOR_BG)
-    draw = ImageDraw.Draw(im)
-    
-    # Try to load a font
-    try:
-        font = ImageFont.truetype("arial.ttf", 20)
-        title_font = ImageFont.truetype("arial.ttf", 30)
-        small_font = ImageFont.truetype("arial.ttf", 10)
-    except IOError:
-        font = None
-        title_font = None
-        small_font = None
-
-    # Draw Floor Line
-    floor_y = img_h - MARGIN
-    draw.line([MARGIN - 50, floor_y, img_w - MARGIN + 50, floor_y], fill=COLOR_OUTLINE, width=3)
-    
-    current_x = 0.0
-    
-    i = 0
-    while i < len(columns):
-        col = columns[i]
-        w = col['width']
-        
-        # Determine merged group
-        merged_group_indices = [i]
-        temp_idx = i
-        while temp_idx < len(columns) - 1 and columns[temp_idx].get('merge_right', False):
-            temp_idx += 1
-            merged_group_indices.append(temp_idx)
-            
-        group_w = sum(columns[g]['width'] for g in merged_group_indices)
-        group_has_top = any(columns[g].get('has_top', True) for g in merged_group_indices)
-        master_col = columns[i]
-        
-        # --- 1. Bottom Modules (Always individual) ---
-        for g_idx in merged_group_indices:
-            col_g = columns[g_idx]
-            w_g = col_g['width']
-            drawers = col_g.get('drawers', [])
-            
-            # Calculate x for this specific base
-            x_g = current_x + sum(columns[k]['width'] for k in range(i, g_idx))
-            
-            # Draw Plinth (Recessed)
-            draw_rect(draw, x_g + 2, 0, w_g - 4, plinth_h, (50, 50, 50), None, img_h)
-            
-            # Draw Main Box (above plinth)
-            box_h = bot_h - plinth_h
-            base_y = plinth_h
-            
-            # Start drawing content from top of base section (base_y + box_h) downwards
-            # Or simpler: base_y is bottom. top is base_y + box_h.
-            # Drawers start at top.
-            
-            current_y_top = base_y + box_h
-            
-            if drawers:
-                for d in drawers:
-                    d_h = d['height']
-                    # Draw drawer
-                    # Y pos: current_y_top - d_h
-                    d_y = current_y_top - d_h
-                    draw_rect(draw, x_g, d_y, w_g, d_h, COLOR_DOOR, COLOR_OUTLINE, img_h)
-                    # Handle
-                    draw_rect(draw, x_g + w_g/2 - 5, d_y + d_h - 5, 10, 2, COLOR_HANDLE, None, img_h)
-                    
-                    current_y_top -= d_h
-            
-            # Remaining space? Draw door
-            remaining_h = current_y_top - base_y
-            if remaining_h > 1.0: # If notable space remains
-                draw_rect(draw, x_g, base_y, w_g, remaining_h, COLOR_DOOR, COLOR_OUTLINE, img_h)
-                
-                if w_g == 80:
-                    mid_x = x_g + (w_g / 2)
-                    x_px = MARGIN + mid_x * SCALE
-                    draw.line([x_px, img_h - MARGIN - (base_y*SCALE), x_px, img_h - MARGIN - ((base_y+remaining_h) * SCALE)], fill=COLOR_OUTLINE, width=2)
-                    draw_circle(draw, x_g + (w_g/2) - 3, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-                    draw_circle(draw, x_g + (w_g/2) + 3, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-                else:
-                    draw_circle(draw, x_g + w_g - 5, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-            
-            # Width label (individual for each base)
-            text = f"{w_g}cm"
-            bbox = draw.textbbox((0, 0), text, font=font)
+    save_render(data, output_file, scale, margin, palette, compress_level)
+
+def set_font_search_path(directories):
+    """Sets the directories searched for FONT_NAME before the system fonts, and clears the font cache."""
+    global FONT_SEARCH_PATH
+    FONT_SEARCH_PATH = list(directories)
+    with _font_lock:
+        _font_cache.clear()
+
+def get_font(size, name=None):
+    """
+    Returns the font for (name, size), resolving it only on the first request.
+    Lookup order: FONT_SEARCH_PATH directories, then Pillow's own lookup of the
+    bare name, then Pillow's bundled default font. Failed lookups are cached too.
+    """
+    name = name or FONT_NAME
+    key = (name, size)
+    with _font_lock:
+        font = _font_cache.get(key)
+        if font is not None:
+            _font_stats['hits'] += 1
+            return font
+        _font_stats['misses'] += 1
+
+    _load_pil()
+    font = None
+    for path in [os.path.join(d, name) for d in FONT_SEARCH_PATH] + [name]:
+        try:
+            font = ImageFont.truetype(path, size)
+            break
+        except IOError:
+            continue
+    if font is None:
+        # In PyScript environment, arial.ttf might not exist.
+        font = ImageFont.load_default()
+
+    with _font_lock:
+        _font_cache[key] = font
+    return font
+
+def font_cache_info():
+    """Font registry counters: hits, misses and number of cached fonts."""
+    with _font_lock:
+        return {'hits': _font_stats['hits'], 'misses': _font_stats['misses'], 'size': len(_font_cache)}
+
+def _load_fonts():
+    with render_phase('fonts'):
+        return get_font(20), get_font(30), get_font(10)
+
+def canvas_size(layout, opts=None):
+    """(width, height) in pixels of the canvas a layout is drawn on."""
+    opts = opts or RenderOptions()
+    img_w = int((layout.total_width * opts.scale) + (opts.margin * 2))
+    img_h = int((layout.total_height * opts.scale) + (opts.margin * 2))
+    return img_w, img_h
+
+def floor_overhang(opts):
+    """Pixels the floor line extends past the cabinet on either side."""
+    return min(50, opts.margin)
+
+def _paint(draw, primitives, img_w, img_h, fonts, offset_x=0, opts=None):
+    """Draws primitives in order. offset_x shifts everything left by that many pixels."""
+    opts = opts or RenderOptions()
+    scale, margin, lw = opts.scale, opts.margin, opts.line_width
+    if opts.details:
+        font, title_font, small_font = fonts
+    for p in primitives:
+        kind = p.kind
+        if not opts.details and kind in DETAIL_KINDS:
+            continue
+        if kind in RECT_STYLES:
+            fill, outline = RECT_STYLES[kind]
+            draw_rect(draw, p.x, p.y, p.w, p.h, fill, outline, img_h, offset_x, opts)
+        elif kind == 'knob':
+            draw_circle(draw, p.x, p.y, p.w, COLOR_HANDLE, img_h, offset_x, opts)
+        elif kind == 'door_split':
+            x_px = (margin + p.x * scale) - offset_x
+            draw.line([x_px, img_h - margin - (p.y*scale), x_px, img_h - margin - ((p.y+p.h) * scale)], fill=COLOR_OUTLINE, width=lw)
+        elif kind == 'width_label':
+            bbox = draw.textbbox((0, 0), p.text, font=font)
             tw = bbox[2] - bbox[0]
-            draw.text((MARGIN + (x_g + w_g/2)*SCALE - tw/2, img_h - MARGIN + 10), text, fill=COLOR_TEXT, font=font)
-
-        # --- 2. Top Module (Merged group) ---
-        if group_has_top:
-            # Side Panels (Outer)
-            draw_rect(draw, current_x, bot_h, THICKNESS, total_h - bot_h, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            draw_rect(draw, current_x + group_w - THICKNESS, bot_h, THICKNESS, total_h - bot_h, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            
-            # Top Cap and Countertop (Full group width)
-            draw_rect(draw, current_x, total_h - THICKNESS, group_w, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            draw_rect(draw, current_x, bot_h - THICKNESS, group_w, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            
-            shelves = master_col.get('shelf_heights', [])
-            dividers = master_col.get('vertical_dividers', [])
-            sorted_shelves = sorted(shelves)
-            all_bounds = [bot_h] + sorted_shelves + [total_h]
-            
-            for j in range(len(all_bounds) - 1):
-                low, high = all_bounds[j], all_bounds[j+1]
-                diff = high - low
-                
-                # Height Label
-                mid_z = (low + high) / 2
-                h_text = f"{diff:.1f}"
-                tx = MARGIN + (current_x + 2) * SCALE
-                ty = img_h - MARGIN - (mid_z * SCALE) - 5
-                draw.text((tx, ty), h_text, fill=(150, 150, 150), font=small_font)
-                
-                # Vertical Divider (Centered in merged group)
-                if j in dividers:
-                    mid_x = current_x + (group_w / 2)
-                    draw_rect(draw, mid_x - THICKNESS/2, low, THICKNESS, high - low, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-
-            # Shelves (Span full group)
-            for h in sorted_shelves:
-                if bot_h < h < total_h:
-                    draw_rect(draw, current_x + THICKNESS, h - THICKNESS, group_w - 2*THICKNESS, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-        
-        current_x += group_w
-        i = temp_idx + 1
-
-    # Total Dimensions
-    info_text = f"Total Width: {total_w}cm | Total Height: {total_h}cm"
-    draw.text((MARGIN, MARGIN/2), info_text, fill=COLOR_TEXT, font=title_font)
-
-    im.save(output_file)
-    print(f"Render saved to {output_file}")
-
-def render_cabinet_to_bytes(designer_obj):
+            draw.text(((margin + p.x*scale - tw/2) - offset_x, img_h - margin + 10), p.text, fill=COLOR_TEXT, font=font)
+        elif kind == 'height_label':
+            tx = (margin + p.x * scale) - offset_x
+            ty = img_h - margin - (p.y * scale) - 5
+            draw.text((tx, ty), p.text, fill=COLOR_LABEL, font=small_font)
+        elif kind == 'floor':
+            # Clipped to the region when painting a crop, so its start stays positive
+            floor_y = img_h - margin
+            overhang = floor_overhang(opts)
+            x_start = max(margin - overhang, offset_x)
+            draw.line([x_start - offset_x, floor_y, img_w - margin + overhang - offset_x, floor_y], fill=COLOR_OUTLINE, width=lw + 1)
+        elif kind == 'title':
+            draw.text((margin - offset_x, margin/2), p.text, fill=COLOR_TEXT, font=title_font)
+
+def _pixel_span(p, fonts, text_widths, opts):
+    """
+    Horizontal pixel extent (x0, x1) of a primitive on the full canvas, padded for outlines.
+    text_widths memoizes label widths by (kind, text).
+    """
+    kind = p.kind
+    scale, margin = opts.scale, opts.margin
+    if kind in RECT_STYLES:
+        return margin + p.x * scale - 2, margin + (p.x + p.w) * scale + 2
+    if kind in ('knob', 'door_split'):
+        r = p.w * scale + 2
+        cx = margin + p.x * scale
+        return cx - r, cx + r
+    if kind == 'floor':
+        overhang = floor_overhang(opts)
+        return margin - overhang, margin + p.w * scale + overhang
+    if not opts.details:
+        return 0, 0
+
+    tw = text_widths.get((kind, p.text))
+    if tw is None:
+        font, title_font, small_font = fonts
+        font = {'width_label': font, 'height_label': small_font}.get(kind, title_font)
+        tw = font.getbbox(p.text)[2]
+        text_widths[(kind, p.text)] = tw
+    if kind == 'width_label':
+        cx = margin + p.x * scale
+        return cx - tw / 2 - 2, cx + tw / 2 + 2
+    x = margin + p.x * scale if kind == 'height_label' else margin
+    return x - 2, x + tw + 2
+
+def _new_canvas(size, opts):
+    if not opts.palette:
+        return Image.new('RGB', size, COLOR_BG)
+    im = Image.new('P', size, PALETTE.index(COLOR_BG))
+    im.putpalette([c for color in PALETTE for c in color])
+    return im
+
+def draw_layout(layout, opts=None):
+    """Rasterizes a Layout (see cabinet_layout) to a PIL image."""
+    _load_pil()
+    opts = opts or RenderOptions()
+    img_w, img_h = canvas_size(layout, opts)
+    fonts = _load_fonts() if opts.details else None
+    with render_phase('draw'):
+        im = _new_canvas((img_w, img_h), opts)
+        _paint(ImageDraw.Draw(im), layout.primitives, img_w, img_h, fonts, 0, opts)
+    count_event('primitives', len(layout.primitives))
+    return im
+
+class IncrementalRenderer:
+    """
+    Keeps the previous raster and, on the next render, repaints only the
+    merged groups whose primitives changed (e.g. after moving one shelf).
+
+    The strip covering the changed groups is redrawn into a small region image
+    from every primitive that touches it, in the original order, and pasted
+    back, so the result is pixel-identical to a full render. Changes to the
+    canvas size or the title fall back to a full render.
+    The returned image is reused by the next render; copy it to keep it.
+    """
+    # Above this fraction of the wall a full render is cheaper than patching
+    FULL_RENDER_FRACTION = 0.75
+    LABEL_REACH = 100 # Pixels
+
+    def __init__(self, opts=None):
+        self.opts = opts or RenderOptions()
+        self.image = None
+        self.last_png_size = None # Encoded size of the last render_png, in bytes
+        self.last_span = None # Pixel columns repainted by the last render, None if full
+        self._groups = {}
+        self._title = None
+        self._text_widths = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _group_signatures(layout):
+        sigs = {}
+        for p in layout.primitives:
+            if p.group is not None:
+                sigs.setdefault(p.group, []).append((p.kind, p.x, p.y, p.w, p.h, p.text))
+        return {(g.x, g.width): tuple(sigs.get(g.index, ())) for g in layout.groups}
+
+    @profiled
+    def render(self, designer_obj):
+        with self._lock:
+            layout = layout_with_profile(designer_obj)
+            groups = self._group_signatures(layout)
+            title = layout.primitives[-1].text
+
+            old_groups = self._groups
+            self._groups = groups
+            if (self.image is None or self.image.size != canvas_size(layout, self.opts)
+                    or title != self._title):
+                self._title = title
+                self.last_span = None
+                self.image = draw_layout(layout, self.opts)
+                return self.image
+
+            # Groups that appeared or disappeared, keyed by their horizontal extent
+            dirty = [key for key, sig in groups.items() if old_groups.get(key) != sig]
+            dirty += [key for key, sig in old_groups.items() if groups.get(key) != sig]
+            if not dirty:
+                self.last_span = (0, 0)
+                return self.image
+
+            x0 = min(x for x, w in dirty)
+            x1 = max(x + w for x, w in dirty)
+            if layout.total_width and (x1 - x0) > self.FULL_RENDER_FRACTION * layout.total_width:
+                self.last_span = None
+                self.image = draw_layout(layout, self.opts)
+                return self.image
+
+            self._repaint(layout, x0, x1)
+            return self.image
+
+    def _repaint(self, layout, x0_cm, x1_cm):
+        opts = self.opts
+        scale, margin = opts.scale, opts.margin
+        img_w, img_h = self.image.size
+        px0 = max(0, int(margin + x0_cm * scale) - 3)
+        px1 = min(img_w, int(margin + x1_cm * scale) + 4)
+        fonts = _load_fonts() if opts.details else None
+
+        # Labels never reach further than this outside their own group
+        pad = self.LABEL_REACH
+        near = set()
+        for g in layout.groups:
+            if margin + (g.x + g.width) * scale + pad >= px0 and margin + g.x * scale - pad <= px1:
+                near.add(g.index)
+
+        # Everything that touches the strip, in paint order
+        prims = []
+        left = px0
+        for p in layout.primitives:
+            if p.group is not None and p.group not in near:
+                continue
+            s0, s1 = _pixel_span(p, fonts, self._text_widths, opts)
+            if s1 >= px0 and s0 <= px1:
+                prims.append(p)
+                if p.kind != 'floor':
+                    left = min(left, s0)
+        # Start the region left of every primitive so all coordinates stay positive
+        origin = max(0, int(left) - 2)
+
+        with render_phase('draw'):
+            region = _new_canvas((px1 - origin, img_h), opts)
+            _paint(ImageDraw.Draw(region), prims, img_w, img_h, fonts, origin, opts)
+            self.image.paste(region.crop((px0 - origin, 0, px1 - origin, img_h)), (px0, 0))
+        count_event('primitives', len(prims))
+        count_event('partial_renders')
+        self.last_span = (px0, px1)
+
+    @profiled
+    def render_png(self, designer_obj, compress_level=None):
+        with self._lock:
+            png = encode_png(self.render(designer_obj), compress_level)
+            self.last_png_size = len(png)
+            return png
+
+@profiled
+def render_image(designer_obj, scale=None, margin=None, palette=False):
+    """
+    Renders the cabinet configuration to a PIL image.
+    Accepts a CabinetDesigner instance, a config dict or a precomputed Layout.
+    scale (px/cm) and margin (px) default to SCALE and MARGIN; see
+    RenderOptions for palette.
+    """
+    return draw_layout(layout_with_profile(designer_obj), RenderOptions(scale, margin, palette=palette))
+
+@profiled
+def render_thumbnail(designer_obj, width=200, height=None):
+    """Renders a small preview, at most width x height pixels, without labels or handles."""
+    layout = layout_with_profile(designer_obj)
+    return draw_layout(layout, RenderOptions.thumbnail(layout, width, height))
+
+def _png_options(im, compress_level=None):
+    options = {'compress_level': PNG_COMPRESS_LEVEL if compress_level is None else compress_level}
+    if im.mode == 'P' and len(im.getpalette()) <= 16 * 3:
+        options['bits'] = 4
+    return options
+
+def encode_png(im, compress_level=None):
+    """
+    Encodes an image as PNG bytes. compress_level trades speed (0) for size (9),
+    default PNG_COMPRESS_LEVEL. Palette renders are packed at 4 bits per pixel.
+    """
+    with render_phase('encode'):
+        img_byte_arr = io.BytesIO()
+        im.save(img_byte_arr, format='PNG', **_png_options(im, compress_level))
+        return img_byte_arr.getvalue()
+
+@profiled
+def render_cabinet_to_bytes(designer_obj, scale=None, margin=None, palette=False, compress_level=None):
     """
     Renders the cabinet configuration to a PNG byte stream.
-    Accepts a CabinetDesigner instance or a dict.
+    Accepts a CabinetDesigner instance, a config dict or a precomputed Layout.
     """
-    import io
-    
-    # Extract data
-    if isinstance(designer_obj, dict):
-        data = designer_obj
+    return encode_png(render_image(designer_obj, scale, margin, palette), compress_level)
+
+@profiled
+def render_thumbnail_to_bytes(designer_obj, width=200, height=None):
+    return encode_png(render_thumbnail(designer_obj, width, height))
+
+@profiled
+def save_render(designer_obj, output_file, scale=None, margin=None, palette=False, compress_level=None):
+    """
+    Renders a live CabinetDesigner (or config dict) straight to an image file,
+    without going through a config file on disk. .svg and .pdf files get a
+    vector render (see render_vector), anything else goes through Pillow.
+    """
+    ext = os.path.splitext(output_file)[1].lower()
+    if ext in ('.svg', '.pdf'):
+        # Imported here: render_vector builds on this module
+        from render_vector import save_vector
+        save_vector(designer_obj, output_file, ext, scale, margin)
+    elif ext == '.png':
+        im = render_image(designer_obj, scale, margin, palette)
+        with render_phase('encode'):
+            im.save(output_file, **_png_options(im, compress_level))
     else:
-        # Assuming it's the CabinetDesigner class
-        data = {
-            'total_height': designer_obj.total_height,
-            'bottom_height': designer_obj.bottom_height,
-            'plinth_height': designer_obj.plinth_height,
-            'columns': designer_obj.columns
-        }
-    
-    total_h = data.get('total_height', 240.0)
-    bot_h = data.get('bottom_height', 80.0)
-    plinth_h = data.get('plinth_height', 8.0)
-    columns = data.get('columns', [])
-    
-    total_w = sum(c['width'] for c in columns)
-    
-    # Image Dimensions
-    img_w = int((total_w * SCALE) + (MARGIN * 2))
-    img_h = int((total_h * SCALE) + (MARGIN * 2))
-    
-    im = Image.new('RGB', (img_w, img_h), COLOR_BG)
-    draw = ImageDraw.Draw(im)
-    
-    # Try to load a font
+        im = render_image(designer_obj, scale, margin)
+        with render_phase('encode'):
+            im.save(output_file)
+    print(f"Render saved to {output_file} ({os.path.getsize(output_file) / 1024:.1f} KB)")
+
+BATCH_MANIFEST = ".render_manifest.json"
+
+def _style_fingerprint():
+    """Hash of the renderer sources, so a style change invalidates batch outputs."""
+    h = hashlib.sha1()
+    for mod_file in (__file__, sys.modules[layout_of.__module__].__file__):
+        with open(mod_file, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def _batch_inputs(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.json")
+    return sorted(glob.glob(pattern))
+
+def _render_job(job):
+    """Worker entry point for render_batch: renders one config file, returns timing."""
+    config_file, output_file = job
+    start = time.perf_counter()
     try:
-        # In PyScript environment, arial.ttf might not exist.
-        # Fallback to default if load fails
-        font = ImageFont.truetype("arial.ttf", 20)
-        title_font = ImageFont.truetype("arial.ttf", 30)
-        small_font = ImageFont.truetype("arial.ttf", 10)
-    except IOError:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
+        render_image(load_config(config_file)).save(output_file)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return config_file, output_file, time.perf_counter() - start, error
 
-    # Draw Floor Line
-    floor_y = img_h - MARGIN
-    draw.line([MARGIN - 50, floor_y, img_w - MARGIN + 50, floor_y], fill=COLOR_OUTLINE, width=3)
-    
-    current_x = 0.0
-    
-    i = 0
-    while i < len(columns):
-        col = columns[i]
-        w = col['width']
-        
-        # Determine merged group
-        merged_group_indices = [i]
-        temp_idx = i
-        while temp_idx < len(columns) - 1 and columns[temp_idx].get('merge_right', False):
-            temp_idx += 1
-            merged_group_indices.append(temp_idx)
-            
-        group_w = sum(columns[g]['width'] for g in merged_group_indices)
-        group_has_top = any(columns[g].get('has_top', True) for g in merged_group_indices)
-        master_col = columns[i]
-        
-        # --- 1. Bottom Modules (Always individual) ---
-        for g_idx in merged_group_indices:
-            col_g = columns[g_idx]
-            w_g = col_g['width']
-            drawers = col_g.get('drawers', [])
-            
-            # Calculate x for this specific base
-            x_g = current_x + sum(columns[k]['width'] for k in range(i, g_idx))
-            
-            # Draw Plinth (Recessed)
-            draw_rect(draw, x_g + 2, 0, w_g - 4, plinth_h, (50, 50, 50), None, img_h)
-            
-            # Draw Main Box (above plinth)
-            box_h = bot_h - plinth_h
-            base_y = plinth_h
-            
-            # Start drawing content from top of base section (base_y + box_h) downwards
-            # Or simpler: base_y is bottom. top is base_y + box_h.
-            # Drawers start at top.
-            
-            current_y_top = base_y + box_h
-            
-            if drawers:
-                for d in drawers:
-                    d_h = d['height']
-                    # Draw drawer
-                    # Y pos: current_y_top - d_h
-                    d_y = current_y_top - d_h
-                    draw_rect(draw, x_g, d_y, w_g, d_h, COLOR_DOOR, COLOR_OUTLINE, img_h)
-                    # Handle
-                    draw_rect(draw, x_g + w_g/2 - 5, d_y + d_h - 5, 10, 2, COLOR_HANDLE, None, img_h)
-                    
-                    current_y_top -= d_h
-            
-            # Remaining space? Draw door
-            remaining_h = current_y_top - base_y
-            if remaining_h > 1.0: # If notable space remains
-                draw_rect(draw, x_g, base_y, w_g, remaining_h, COLOR_DOOR, COLOR_OUTLINE, img_h)
-                
-                if w_g == 80:
-                    mid_x = x_g + (w_g / 2)
-                    x_px = MARGIN + mid_x * SCALE
-                    draw.line([x_px, img_h - MARGIN - (base_y*SCALE), x_px, img_h - MARGIN - ((base_y+remaining_h) * SCALE)], fill=COLOR_OUTLINE, width=2)
-                    draw_circle(draw, x_g + (w_g/2) - 3, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-                    draw_circle(draw, x_g + (w_g/2) + 3, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-                else:
-                    draw_circle(draw, x_g + w_g - 5, base_y + remaining_h - 10, 1, COLOR_HANDLE, img_h)
-            
-            # Width label (individual for each base)
-            text = f"{w_g}cm"
-            if font:
-                bbox = draw.textbbox((0, 0), text, font=font)
-                tw = bbox[2] - bbox[0]
-                draw.text((MARGIN + (x_g + w_g/2)*SCALE - tw/2, img_h - MARGIN + 10), text, fill=COLOR_TEXT, font=font)
-            else:
-                # Fallback text drawing if font weird
-                pass
-
-        # --- 2. Top Module (Merged group) ---
-        if group_has_top:
-            # Side Panels (Outer)
-            draw_rect(draw, current_x, bot_h, THICKNESS, total_h - bot_h, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            draw_rect(draw, current_x + group_w - THICKNESS, bot_h, THICKNESS, total_h - bot_h, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            
-            # Top Cap and Countertop (Full group width)
-            draw_rect(draw, current_x, total_h - THICKNESS, group_w, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            draw_rect(draw, current_x, bot_h - THICKNESS, group_w, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-            
-            shelves = master_col.get('shelf_heights', [])
-            dividers = master_col.get('vertical_dividers', [])
-            sorted_shelves = sorted(shelves)
-            all_bounds = [bot_h] + sorted_shelves + [total_h]
-            
-            for j in range(len(all_bounds) - 1):
-                low, high = all_bounds[j], all_bounds[j+1]
-                diff = high - low
-                
-                # Height Label
-                mid_z = (low + high) / 2
-                h_text = f"{diff:.1f}"
-                tx = MARGIN + (current_x + 2) * SCALE
-                ty = img_h - MARGIN - (mid_z * SCALE) - 5
-                if small_font:
-                    draw.text((tx, ty), h_text, fill=(150, 150, 150), font=small_font)
-                
-                # Vertical Divider (Centered in merged group)
-                if j in dividers:
-                    mid_x = current_x + (group_w / 2)
-                    draw_rect(draw, mid_x - THICKNESS/2, low, THICKNESS, high - low, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-
-            # Shelves (Span full group)
-            for h in sorted_shelves:
-                if bot_h < h < total_h:
-                    draw_rect(draw, current_x + THICKNESS, h - THICKNESS, group_w - 2*THICKNESS, THICKNESS, COLOR_CARCASS, COLOR_OUTLINE, img_h)
-        
-        current_x += group_w
-        i = temp_idx + 1
-
-    # Total Dimensions
-    info_text = f"Total Width: {total_w}cm | Total Height: {total_h}cm"
-    if title_font:
-        draw.text((MARGIN, MARGIN/2), info_text, fill=COLOR_TEXT, font=title_font)
-
-    # Output to bytes
-    img_byte_arr = io.BytesIO()
-    im.save(img_byte_arr, format='PNG')
-    return img_byte_arr.getvalue()
+def render_batch(pattern, out_dir=None, workers=None, force=False):
+    """
+    Renders every design JSON matched by a directory or glob pattern to PNG,
+    spread over a process pool. An output is skipped when it is newer than its
+    input, or when the manifest records the same input content and renderer
+    version. Returns the number of failed renders.
+    """
+    # Imported here: multiprocessing is not available in the PyScript build
+    from concurrent.futures import ProcessPoolExecutor
+
+    inputs = _batch_inputs(pattern)
+    if not inputs:
+        print(f"No design files match {pattern}.")
+        return 0
+
+    style = _style_fingerprint()
+    manifests = {}
+    jobs = []
+    keys = {}
+    skipped = 0
+    for config_file in inputs:
+        target_dir = out_dir or os.path.dirname(config_file)
+        output_file = os.path.join(target_dir, os.path.splitext(os.path.basename(config_file))[0] + ".png")
+        if target_dir not in manifests:
+            manifests[target_dir] = _read_manifest(target_dir)
+        with open(config_file, 'rb') as f:
+            key = hashlib.sha1(f.read() + style.encode()).hexdigest()
+        keys[output_file] = key
+
+        if not force and os.path.exists(output_file):
+            recorded = manifests[target_dir].get(os.path.basename(output_file))
+            if recorded == key or (recorded is None and os.path.getmtime(output_file) >= os.path.getmtime(config_file)):
+                skipped += 1
+                continue
+        jobs.append((config_file, output_file))
+
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    failed = 0
+    total_start = time.perf_counter()
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(jobs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for config_file, output_file, seconds, error in executor.map(_render_job, jobs, chunksize=chunksize):
+                if error:
+                    failed += 1
+                    print(f"  FAILED {config_file}: {error}")
+                    continue
+                manifests[os.path.dirname(output_file)][os.path.basename(output_file)] = keys[output_file]
+                print(f"  {config_file} -> {output_file} ({seconds * 1000:.1f} ms)")
+
+    for target_dir, manifest in manifests.items():
+        _write_manifest(target_dir, manifest)
+
+    elapsed = time.perf_counter() - total_start
+    print(f"Rendered {len(jobs) - failed}, skipped {skipped}, failed {failed} in {elapsed:.2f}s.")
+    return failed
+
+def _read_manifest(directory):
+    path = os.path.join(directory, BATCH_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def _write_manifest(directory, manifest):
+    if not os.path.isdir(directory):
+        return
+    with open(os.path.join(directory, BATCH_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render cabinet designs to schematic images")
+    parser.add_argument("config", nargs="?", help="Design JSON file to render")
+    parser.add_argument("output", nargs="?", default="cabinet_render.png", help="Output image file (.png, .svg or .pdf)")
+    parser.add_argument("--scale", type=float, help=f"Pixels per cm (default: {SCALE:g})")
+    parser.add_argument("--margin", type=int, help=f"Margin around the drawing in pixels (default: {MARGIN})")
+    parser.add_argument("--palette", action="store_true", help="Draw with the fixed color palette: much smaller PNGs, aliased text")
+    parser.add_argument("--compress-level", type=int, choices=range(10), metavar="0-9",
+                        help=f"PNG compression, 0 fastest to 9 smallest (default: {PNG_COMPRESS_LEVEL})")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB", help="Render every design JSON in a directory or matching a glob")
+    parser.add_argument("--out-dir", help="Batch output directory (default: next to each input)")
+    parser.add_argument("--workers", type=int, help="Batch worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="Re-render batch outputs even if up to date")
+    args = parser.parse_args()
+
+    try:
+        if args.batch:
+            if render_batch(args.batch, args.out_dir, args.workers, args.force):
+                sys.exit(1)
+        elif args.config:
+            render_cabinet(args.config, args.output, args.scale, args.margin, args.palette, args.compress_level)
+        else:
+            parser.print_usage()
+    except ImportError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python render_cabinet.py <config.json> [output.png]")
-    else:
-        cfg, out = sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "cabinet_render.png"
-        render_cabinet(cfg, out)
\ No newline at end of file
+    main()
@@ -0,0 +1,177 @@
+"""
+Vector backends (SVG and PDF) for cabinet schematics.
+
+Both walk the same layout primitives as the PNG renderer in render_cabinet.py
+and use its canvas geometry (RenderOptions) and colors, so a vector render
+lines up with the raster one. Output size grows with the number of parts, not
+with the wall's area. Only the standard library is needed.
+"""
+
+import zlib
+from render_cabinet import (RECT_STYLES, COLOR_BG, COLOR_OUTLINE, COLOR_HANDLE, COLOR_TEXT, COLOR_LABEL,
+                            RenderOptions, profiled, render_phase, count_event, layout_with_profile,
+                            canvas_size, floor_overhang)
+
+FONT_SIZES = {'width_label': 20, 'title': 30, 'height_label': 10} # Same sizes as the PNG fonts
+PDF_MAX_PAGE = 14400 # Largest page side (pt) PDF viewers accept; bigger walls are scaled down
+
+def _hex(color):
+    return '#%02x%02x%02x' % color
+
+def _num(v):
+    """Shortest form of a coordinate, rounded to 1/100 px."""
+    return f"{round(v, 2):g}"
+
+def _escape_xml(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+@profiled
+def render_svg(designer_obj, scale=None, margin=None):
+    """
+    Renders the cabinet configuration to an SVG document (str).
+    Accepts a CabinetDesigner instance, a config dict or a precomputed Layout.
+    scale (px/cm) and margin (px) default to render_cabinet's SCALE and MARGIN.
+    """
+    layout = layout_with_profile(designer_obj)
+    opts = RenderOptions(scale, margin)
+    scale, margin = opts.scale, opts.margin
+    img_w, img_h = canvas_size(layout, opts)
+    overhang = floor_overhang(opts)
+    base = img_h - margin
+
+    with render_phase('draw'):
+        # One CSS class per primitive kind keeps every element down to its coordinates
+        styles = ["text{font-family:Arial,Helvetica,sans-serif}",
+                  f".line{{stroke:{_hex(COLOR_OUTLINE)};stroke-width:2}}",
+                  f".floor{{stroke:{_hex(COLOR_OUTLINE)};stroke-width:3}}",
+                  f".knob{{fill:{_hex(COLOR_HANDLE)}}}",
+                  f".width_label,.title{{fill:{_hex(COLOR_TEXT)}}}",
+                  ".width_label{font-size:20px;text-anchor:middle}",
+                  ".title{font-size:30px}",
+                  f".height_label{{fill:{_hex(COLOR_LABEL)};font-size:10px}}"]
+        for kind, (fill, outline) in RECT_STYLES.items():
+            stroke = f";stroke:{_hex(outline)};stroke-width:2" if outline else ""
+            styles.append(f".{kind}{{fill:{_hex(fill)}{stroke}}}")
+
+        out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{img_w}" height="{img_h}" viewBox="0 0 {img_w} {img_h}">',
+               f'<style>{"".join(styles)}</style>',
+               f'<rect width="100%" height="100%" fill="{_hex(COLOR_BG)}"/>']
+        for p in layout.primitives:
+            kind = p.kind
+            x = margin + p.x * scale
+            y = base - p.y * scale
+            if kind in RECT_STYLES:
+                h = p.h * scale
+                out.append(f'<rect class="{kind}" x="{_num(x)}" y="{_num(y - h)}" width="{_num(p.w * scale)}" height="{_num(h)}"/>')
+            elif kind == 'knob':
+                out.append(f'<circle class="knob" cx="{_num(x)}" cy="{_num(y)}" r="{_num(p.w * scale)}"/>')
+            elif kind == 'door_split':
+                out.append(f'<line class="line" x1="{_num(x)}" y1="{_num(y)}" x2="{_num(x)}" y2="{_num(y - p.h * scale)}"/>')
+            elif kind == 'floor':
+                out.append(f'<line class="floor" x1="{_num(margin - overhang)}" y1="{_num(base)}" x2="{_num(img_w - margin + overhang)}" y2="{_num(base)}"/>')
+            elif kind == 'width_label':
+                out.append(f'<text class="width_label" x="{_num(x)}" y="{_num(base + 30)}">{_escape_xml(p.text)}</text>')
+            elif kind == 'height_label':
+                out.append(f'<text class="height_label" x="{_num(x)}" y="{_num(y + 4)}">{_escape_xml(p.text)}</text>')
+            elif kind == 'title':
+                out.append(f'<text class="title" x="{_num(margin)}" y="{_num(margin / 2 + 27)}">{_escape_xml(p.text)}</text>')
+        out.append('</svg>')
+    count_event('primitives', len(layout.primitives))
+    return "\n".join(out)
+
+# Helvetica advance widths (1/1000 em) of the characters used in labels
+_HELVETICA_WIDTHS = {' ': 278, '.': 278, ':': 278, '|': 260, 'c': 500, 'm': 833, 'T': 611, 'W': 944,
+                     'H': 722, 'o': 556, 't': 278, 'a': 556, 'l': 222, 'i': 222, 'd': 556, 'h': 556, 'e': 556, 'g': 556}
+
+def _text_width(text, size):
+    return sum(_HELVETICA_WIDTHS.get(ch, 556) for ch in text) * size / 1000.0
+
+def _pdf_string(text):
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+def _pdf_color(color, op):
+    return f"{_num(color[0] / 255)} {_num(color[1] / 255)} {_num(color[2] / 255)} {op}"
+
+@profiled
+def render_pdf(designer_obj, scale=None, margin=None):
+    """
+    Renders the cabinet configuration to a single-page PDF (bytes).
+    Accepts a CabinetDesigner instance, a config dict or a precomputed Layout.
+    """
+    layout = layout_with_profile(designer_obj)
+    opts = RenderOptions(scale, margin)
+    scale, margin = opts.scale, opts.margin
+    img_w, img_h = canvas_size(layout, opts)
+    overhang = floor_overhang(opts)
+    # PDF space has y pointing up like the layout, one canvas pixel per point
+    fit = min(1.0, PDF_MAX_PAGE / max(img_w, img_h))
+
+    with render_phase('draw'):
+        ops = [f"{_num(fit)} 0 0 {_num(fit)} 0 0 cm" if fit < 1.0 else "",
+               _pdf_color(COLOR_BG, 'rg'), f"0 0 {img_w} {img_h} re f",
+               "2 w", _pdf_color(COLOR_OUTLINE, 'RG')]
+        k = 0.5523 # Bezier handle length for a quarter circle
+        for p in layout.primitives:
+            kind = p.kind
+            x = margin + p.x * scale
+            y = margin + p.y * scale
+            if kind in RECT_STYLES:
+                fill, outline = RECT_STYLES[kind]
+                ops.append(_pdf_color(fill, 'rg'))
+                ops.append(f"{_num(x)} {_num(y)} {_num(p.w * scale)} {_num(p.h * scale)} re {'B' if outline else 'f'}")
+            elif kind == 'knob':
+                r = p.w * scale
+                c = r * k
+                ops.append(_pdf_color(COLOR_HANDLE, 'rg'))
+                ops.append(f"{_num(x + r)} {_num(y)} m "
+                           f"{_num(x + r)} {_num(y + c)} {_num(x + c)} {_num(y + r)} {_num(x)} {_num(y + r)} c "
+                           f"{_num(x - c)} {_num(y + r)} {_num(x - r)} {_num(y + c)} {_num(x - r)} {_num(y)} c "
+                           f"{_num(x - r)} {_num(y - c)} {_num(x - c)} {_num(y - r)} {_num(x)} {_num(y - r)} c "
+                           f"{_num(x + c)} {_num(y - r)} {_num(x + r)} {_num(y - c)} {_num(x + r)} {_num(y)} c f")
+            elif kind == 'door_split':
+                ops.append(f"{_num(x)} {_num(y)} m {_num(x)} {_num(y + p.h * scale)} l S")
+            elif kind == 'floor':
+                ops.append(f"3 w {_num(margin - overhang)} {_num(margin)} m {_num(img_w - margin + overhang)} {_num(margin)} l S 2 w")
+            elif p.text is not None:
+                size = FONT_SIZES[kind]
+                if kind == 'width_label':
+                    tx, ty, color = x - _text_width(p.text, size) / 2, margin - 30, COLOR_TEXT
+                elif kind == 'height_label':
+                    tx, ty, color = x, y - 4, COLOR_LABEL
+                else:
+                    tx, ty, color = margin, img_h - margin / 2 - 27, COLOR_TEXT
+                ops.append(f"{_pdf_color(color, 'rg')} BT /F1 {size} Tf {_num(tx)} {_num(ty)} Td {_pdf_string(p.text)} Tj ET")
+    count_event('primitives', len(layout.primitives))
+    with render_phase('encode'):
+        content = zlib.compress("\n".join(op for op in ops if op).encode('latin-1'))
+
+        page_w, page_h = _num(img_w * fit), _num(img_h * fit)
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w} {page_h}] "
+            f"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>".encode('latin-1'),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode('latin-1') + content + b"\nendstream",
+        ]
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for num, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += f"{num} 0 obj\n".encode('latin-1') + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode('latin-1')
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+        return bytes(out)
+
+VECTOR_FORMATS = {'.svg': render_svg, '.pdf': render_pdf}
+
+def save_vector(designer_obj, output_file, fmt, scale=None, margin=None):
+    """Writes an SVG or PDF render; fmt is the file extension ('.svg' or '.pdf')."""
+    data = VECTOR_FORMATS[fmt](designer_obj, scale, margin)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with open(output_file, 'wb') as f:
+        f.write(data)
@@ -0,0 +1,254 @@
+"""
+Shelf spacing fitted to what goes on the shelves.
+
+Given the items to store as (height, quantity[, width]) in cm, plan_shelves()
+places shelves in every top section so the items fit with the least empty
+space above them. Items stand tallest first from the bottom of the leftmost
+section; each compartment is as tall as its tallest item plus a clearance
+(2cm, the gap move_shelf keeps between shelves), and every shelf takes
+THICKNESS. Width without a given item width is ITEM_WIDTH (a book's spine).
+
+Each section is solved by a shortest-path DP over positions in the sorted
+item sequence (a compartment may end where the item height changes or where
+it is full), and a second DP over the sections decides where the sequence
+moves on to the next section. A wall of columns solves in milliseconds:
+
+    plan = plan_shelves(designer, [(32, 40), (24, 60), (31, 12, 8)])
+    designer.fit_shelves([(32, 40), (24, 60), (31, 12, 8)])   # the same, applied (undoable)
+"""
+
+import math
+import heapq
+import argparse
+from bisect import bisect_right
+from cabinet_layout import THICKNESS, layout_of
+
+CLEARANCE = 2.0 # cm above the tallest item of a compartment
+ITEM_WIDTH = 3.0 # cm of shelf an item takes when no width is given
+MIN_OPEN_SPACE = 10.0 # Space left above the items gets its own shelf only from this height on
+INF = float('inf')
+
+class Compartment:
+    """Items on one shelf: the section's first column, bottom (the surface they stand on) and clear height."""
+    __slots__ = ('column', 'bottom', 'clear', 'items')
+
+    def __init__(self, column, bottom, clear, items):
+        self.column = column
+        self.bottom = bottom
+        self.clear = clear
+        self.items = items # [(height, width, count)]
+
+    def __repr__(self):
+        return f"Compartment(column={self.column}, bottom={self.bottom:g}, clear={self.clear:g}, items={self.items!r})"
+
+class ShelfPlan:
+    """
+    Result of plan_shelves(): shelves maps the first column of every section
+    that holds items to its new shelf_heights. waste is the empty front area
+    (cm^2) of the filled compartments; unplaced lists the (height, width,
+    count) that did not fit: items larger than any section, then the
+    shortest of the others.
+    """
+    def __init__(self, shelves, compartments, unplaced, waste):
+        self.shelves = shelves
+        self.compartments = compartments
+        self.unplaced = unplaced
+        self.waste = waste
+
+def _ceil_tenth(x):
+    # Shelf heights are kept to 1 decimal; rounding up keeps the clearance
+    return math.ceil(round(x * 10, 6)) / 10
+
+def _item_types(items):
+    """Merges items to (height, width, count) types, tallest first."""
+    counts = {}
+    for item in items:
+        height, quantity = float(item[0]), int(item[1])
+        width = float(item[2]) if len(item) > 2 else ITEM_WIDTH
+        if height <= 0 or width <= 0 or quantity < 0:
+            raise ValueError(f"Item needs a positive height and width and a quantity >= 0, got {tuple(item)!r}.")
+        if quantity:
+            counts[(height, width)] = counts.get((height, width), 0) + quantity
+    return [(h, w, n) for (h, w), n in sorted(counts.items(), key=lambda kv: (-kv[0][0], -kv[0][1]))]
+
+class _Planner:
+    """Item sequence of one problem; positions are indices into it, one per item."""
+    def __init__(self, types, clearance):
+        self.types = types
+        self.bounds = [0] # bounds[t] is the position of the first item of type t
+        for _, _, n in types:
+            self.bounds.append(self.bounds[-1] + n)
+        # Height a compartment takes when its tallest (first) item is of type t, shelf included
+        self.step = [_ceil_tenth(h + clearance) + THICKNESS for h, _, _ in types]
+        self._ends = {}
+        self._sections = {}
+
+    def type_at(self, k):
+        return bisect_right(self.bounds, k) - 1
+
+    def ends(self, k, run):
+        """Positions where a compartment run cm wide starting at item k can end."""
+        key = (k, run)
+        ends = self._ends.get(key)
+        if ends is None:
+            ends = []
+            space = run
+            t = self.type_at(k)
+            while t < len(self.types):
+                w = self.types[t][1]
+                left = self.bounds[t + 1] - k
+                take = min(left, int(space / w + 1e-9))
+                k += take
+                space -= take * w
+                if take < left:
+                    break
+                # Every change of item height is a place to stop early
+                ends.append(k)
+                t += 1
+            if k not in ends and k > key[0]:
+                ends.append(k)
+            self._ends[key] = ends
+        return ends
+
+    def section(self, start, run, height):
+        """
+        Fills one section from item start: {end: (height used, previous end)},
+        the least height in which the items start..end fit, within height.
+        """
+        key = (start, run, height)
+        result = self._sections.get(key)
+        if result is not None:
+            return result
+        result = {start: (0.0, None)}
+        # Positions only grow, so popping the lowest one finalizes it
+        heap = [start]
+        while heap:
+            k = heapq.heappop(heap)
+            used = result[k][0]
+            if k == self.bounds[-1]:
+                continue
+            step = self.step[self.type_at(k)]
+            if used + step > height + 1e-9:
+                continue
+            for e in self.ends(k, run):
+                best = result.get(e)
+                if best is None:
+                    heapq.heappush(heap, e)
+                if best is None or used + step < best[0]:
+                    result[e] = (used + step, k)
+        self._sections[key] = result
+        return result
+
+    def items_between(self, a, b):
+        items = []
+        t = self.type_at(a)
+        while a < b:
+            h, w, _ = self.types[t]
+            n = min(b, self.bounds[t + 1]) - a
+            items.append((h, w, n))
+            a += n
+            t += 1
+        return items
+
+def plan_shelves(design, items, clearance=CLEARANCE):
+    """
+    Plans the shelves of a CabinetDesigner, DesignRecord or config dict for
+    items, (height, quantity) or (height, quantity, width) in cm. Sections
+    without a top, or that end up with no items, are left out of the plan.
+    Returns a ShelfPlan; the design itself is not changed.
+    """
+    layout = layout_of(design)
+    bot_h = layout.bottom_height
+    height = layout.total_height - bot_h
+    sections = [(g.start, g.width - 2 * THICKNESS) for g in layout.groups if g.has_top and g.width > 2 * THICKNESS]
+    widest = max((run for _, run in sections), default=0.0)
+    # Items too tall or too wide for every section would block the ones after them
+    fits, too_big = [], []
+    for h, w, n in _item_types(items):
+        if _ceil_tenth(h + clearance) + THICKNESS <= height + 1e-9 and w <= widest + 1e-9:
+            fits.append((h, w, n))
+        else:
+            too_big.append((h, w, n))
+    planner = _Planner(fits, clearance)
+    total = planner.bounds[-1]
+
+    # costs: items placed so far -> least height x run summed over the sections;
+    # backs[i][q] is where section i took over the items it ends at q (None: it stays empty)
+    costs = {0: 0.0}
+    backs = []
+    for start_col, run in sections:
+        nxt = dict(costs)
+        back = dict.fromkeys(costs)
+        for p, cost in costs.items():
+            for q, (used, _) in planner.section(p, run, height).items():
+                c = cost + used * run
+                if c < nxt.get(q, INF):
+                    nxt[q] = c
+                    back[q] = p
+        backs.append(back)
+        costs = nxt
+
+    # Most items placed first, then the least space used
+    placed = max(costs)
+    shelves, compartments = {}, []
+    waste = 0.0
+    q = placed
+    for (start_col, run), back in zip(reversed(sections), reversed(backs)):
+        p = back[q]
+        if p is None:
+            continue
+        result = planner.section(p, run, height)
+        chain = []
+        k = q
+        while k != p:
+            prev = result[k][1]
+            chain.append((prev, k))
+            k = prev
+        chain.reverse()
+        heights, y = [], bot_h
+        for a, b in chain:
+            clear = planner.step[planner.type_at(a)] - THICKNESS
+            held = planner.items_between(a, b)
+            compartments.append(Compartment(start_col, round(y, 1), round(clear, 1), held))
+            waste += clear * run - sum(h * w * n for h, w, n in held)
+            y += clear + THICKNESS
+            heights.append(round(y, 1))
+        # The shelf over the top compartment stays only if it leaves a usable open space
+        if layout.total_height - heights[-1] - THICKNESS < MIN_OPEN_SPACE:
+            heights.pop()
+        shelves[start_col] = heights
+        q = p
+    compartments.sort(key=lambda c: (c.column, c.bottom))
+    unplaced = too_big + planner.items_between(placed, total)
+    return ShelfPlan(shelves, compartments, unplaced, waste)
+
+def parse_item(text):
+    """An item from 'HEIGHTxQUANTITY' or 'HEIGHTxQUANTITYxWIDTH', e.g. 32x40 or 31x12x8."""
+    parts = text.lower().split("x")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Expected HEIGHTxQUANTITY[xWIDTH], got {text!r}.")
+    return (float(parts[0]), int(parts[1])) + tuple(float(p) for p in parts[2:])
+
+def main():
+    from simple_designer import CabinetDesigner
+    parser = argparse.ArgumentParser(description="Space the shelves of a design for the items it will hold")
+    parser.add_argument("design", help="Design file (.json or .cabd)")
+    parser.add_argument("items", nargs="+", type=parse_item, metavar="HxN[xW]",
+                        help=f"Item height x quantity [x width, default {ITEM_WIDTH:g}] in cm")
+    parser.add_argument("--clearance", type=float, default=CLEARANCE, help="Space above the tallest item (default: %(default)s)")
+    parser.add_argument("--save", metavar="FILE", help="Save the design with the planned shelves")
+    args = parser.parse_args()
+
+    designer = CabinetDesigner()
+    designer.load_config(args.design)
+    plan = designer.fit_shelves(args.items, args.clearance)
+    for c in plan.compartments:
+        held = ", ".join(f"{n} x {h:g}cm" for h, _, n in c.items)
+        print(f"  Column {c.column + 1} at {c.bottom:6.1f}cm, {c.clear:5.1f}cm clear: {held}")
+    if args.save:
+        designer.save_config(args.save)
+    else:
+        designer.draw()
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,155 @@
-import sys
 import os
 import json
-import subprocess
+import hashlib
+import functools
+import contextlib
+from cabinet_layout import compute_layout
+from cabinet_model import Column, Drawer, GroupIndex, columns_from_dicts
+from design_history import History, Snapshot
+from render_cabinet import save_render
 
 try:
     import msvcrt
 except ImportError:
     msvcrt = None
 
+def undoable(method):
+    """Makes each outermost call of a CabinetDesigner method that changes the design one undo step."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.edit_step(method.__name__, (method.__name__, args, kwargs)):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class CabinetDesigner:
     def __init__(self):
         self.total_height = 240.0 # cm
         self.bottom_height = 80.0 # cm
         self.plinth_height = 8.0 # cm
         self.thickness = 1.8 # cm (approx 18mm)
-        # List of dicts: {'width': 60, 'shelf_heights': [130.0, 180.0]}
+        # List of Column objects (see cabinet_model).
         # 'shelf_heights' are absolute heights from the floor.
         self.columns = [] 
+        self._layout = None
+        self._layout_key = None
+        self._version = 0 # Bumped by every change to the design, see layout()
+        self._groups = None
+        self._groups_for = None
+        self.history = History()
+        self._owned = {} # id -> column created or copied since the last snapshot (safe to edit in place)
+        self._edit_depth = 0
+        self.journal = None # Optional design_journal.DesignJournal logging every change
+
+    def _snapshot(self, label=None):
+        # Every current column may now be held by a snapshot
+        self._owned = {}
+        return Snapshot(self.total_height, self.bottom_height, self.plinth_height, tuple(self.columns), label)
+
+    def _edit_column(self, index):
+        """Returns column index ready to be modified, copying it first if a snapshot may hold it."""
+        self._version += 1
+        col = self.columns[index]
+        if id(col) not in self._owned:
+            col = col.copy()
+            self.columns[index] = col
+            self._owned[id(col)] = col
+        return col
+
+    @contextlib.contextmanager
+    def edit_step(self, label, command=None):
+        """
+        Groups every change made inside the block into a single undo step.
+        command is the (method, args, kwargs) call the journal logs for it;
+        without one, the journal logs the resulting design.
+        """
+        if self._edit_depth:
+            yield
+            return
+        before = self._snapshot(label)
+        self._edit_depth += 1
+        try:
+            yield
+        finally:
+            self._edit_depth -= 1
+            if not before.same_state(self.total_height, self.bottom_height, self.plinth_height, self.columns):
+                self._version += 1
+                self.history.push(before, self.columns)
+                self._journal(command)
+
+    def _journal(self, command=None):
+        if self.journal is None:
+            return
+        if command is None:
+            self.journal.record_state(self.to_dict())
+        else:
+            self.journal.record(*command)
+
+    def _restore(self, snap):
+        self.total_height = snap.total_height
+        self.bottom_height = snap.bottom_height
+        self.plinth_height = snap.plinth_height
+        self.columns = list(snap.columns)
+        self._owned = {}
+        self._invalidate_groups()
+
+    def undo(self):
+        snap = self.history.undo(self._snapshot())
+        if snap is None:
+            print("Nothing to undo.")
+            return False
+        self._restore(snap)
+        self._journal()
+        print(f"Undid {snap.label}.")
+        return True
+
+    def redo(self):
+        snap = self.history.redo(self._snapshot())
+        if snap is None:
+            print("Nothing to redo.")
+            return False
+        self._restore(snap)
+        self._journal()
+        print(f"Redid {snap.label}.")
+        return True
+
+    @property
+    def group_index(self):
+        """
+        Merged groups and column offsets (see cabinet_model.GroupIndex), rebuilt
+        only after a change to the column order, widths or merges.
+        """
+        if self._groups is None or self._groups_for is not self.columns:
+            self._groups = GroupIndex(self.columns)
+            self._groups_for = self.columns
+        return self._groups
+
+    def _invalidate_groups(self):
+        self._groups = None
+        self._version += 1
 
     def get_total_width(self):
-        return sum(c['width'] for c in self.columns)
+        return sum(c.width for c in self.columns)
 
+    @undoable
     def add_column(self, width):
         if width not in [40, 60, 80]:
             print("Invalid width! Choose 40, 60, or 80 cm.")
             return
-        # drawers: list of dicts {'height': 20.0}
+        # drawers: list of Drawer objects.
         # If list is empty, it has a door.
         # Drawers are placed from top of bottom section downwards.
-        new_col = {
-            'width': width, 
-            'shelf_heights': [], 
-            'vertical_dividers': [],
-            'has_top': True,
-            'merge_right': False,
-            'drawers': [] 
-        }
-        self.columns.append(new_col)
+        col = Column(width)
+        self.columns.append(col)
+        self._owned[id(col)] = col
+        self._invalidate_groups()
         self._set_evenly_spaced_shelves(len(self.columns)-1, 3)
         print(f"Added {width}cm column.")
 
+    @undoable
     def configure_drawers(self, index, count, height_per_drawer=20.0):
         if 0 <= index < len(self.columns):
             if count == 0:
-                self.columns[index]['drawers'] = []
+                self._edit_column(index).drawers = []
                 print(f"Column {index+1} set to door (no drawers).")
                 return
 
@@ -56,12 +162,13 @@ class CabinetDesigner:
                 return
             
             # Create drawers
-            new_drawers = [{'height': float(height_per_drawer)} for _ in range(count)]
-            self.columns[index]['drawers'] = new_drawers
+            drawer = Drawer(float(height_per_drawer))
+            self._edit_column(index).drawers = [drawer] * count
             print(f"Column {index+1} set to {count} drawers of {height_per_drawer}cm.")
         else:
             print("Invalid column index.")
 
+    @undoable
     def set_plinth_height(self, h):
         if h < 0 or h > 20:
             print("Plinth height must be between 0 and 20 cm.")
@@ -69,62 +176,74 @@ class CabinetDesigner:
         self.plinth_height = float(h)
         print(f"Plinth height set to {self.plinth_height} cm.")
 
+    @undoable
     def toggle_drawers(self, index):
         # Deprecated/Updated wrapper
         if 0 <= index < len(self.columns):
-            if self.columns[index]['drawers']:
+            if self.columns[index].drawers:
                 self.configure_drawers(index, 0)
             else:
                 self.configure_drawers(index, 1, 20.0) # Default 1 drawer of 20cm
         else:
             print("Invalid column index.")
 
+    @undoable
     def toggle_top(self, index):
         if 0 <= index < len(self.columns):
-            self.columns[index]['has_top'] = not self.columns[index]['has_top']
-            state = "ON" if self.columns[index]['has_top'] else "OFF"
+            col = self._edit_column(index)
+            col.has_top = not col.has_top
+            state = "ON" if col.has_top else "OFF"
             print(f"Column {index+1} top section is now {state}.")
         else:
             print("Invalid column index.")
 
+    @undoable
     def toggle_merge(self, index):
         if 0 <= index < len(self.columns) - 1:
-            self.columns[index]['merge_right'] = not self.columns[index]['merge_right']
-            state = "MERGED" if self.columns[index]['merge_right'] else "SEPARATED"
+            col = self._edit_column(index)
+            col.merge_right = not col.merge_right
+            self._invalidate_groups()
+            state = "MERGED" if col.merge_right else "SEPARATED"
             
             # If merged, clear the right column's shelves/dividers as they are now governed by the left one
-            if self.columns[index]['merge_right']:
-                right_col = self.columns[index+1]
-                right_col['shelf_heights'] = []
-                right_col['vertical_dividers'] = []
+            if col.merge_right:
+                right_col = self._edit_column(index+1)
+                right_col.shelf_heights = []
+                right_col.vertical_dividers = []
                 
             print(f"Divider between Column {index+1} and {index+2} is now {state}.")
         else:
             print("Invalid column index for merge (cannot merge last column to the right).")
 
+    @undoable
     def remove_column(self, index):
         if 0 <= index < len(self.columns):
             removed = self.columns.pop(index)
-            print(f"Removed column {index+1} ({removed['width']}cm).")
+            self._invalidate_groups()
+            print(f"Removed column {index+1} ({removed.width}cm).")
         else:
             print("Invalid column index.")
 
+    @undoable
     def set_height(self, height_cm):
         if height_cm < self.bottom_height + 20:
             print("Height too small!")
             return
         self.total_height = float(height_cm)
         # Clean up shelves that are now out of bounds
-        for col in self.columns:
-            col['shelf_heights'] = [h for h in col['shelf_heights'] if h < self.total_height]
+        for i, col in enumerate(self.columns):
+            kept = [h for h in col.shelf_heights if h < self.total_height]
+            if len(kept) != len(col.shelf_heights):
+                self._edit_column(i).shelf_heights = kept
             # Also reset dividers if they might be out of index? 
             # Actually space_id is relative to shelf count.
         print(f"Total height set to {self.total_height}cm.")
 
     def _set_evenly_spaced_shelves(self, index, spaces_count):
         """Helper to set shelves to even spacing."""
+        col = self._edit_column(index)
         if spaces_count <= 0:
-            self.columns[index]['shelf_heights'] = []
+            col.shelf_heights = []
             return
             
         top_h = self.total_height - self.bottom_height
@@ -133,17 +252,19 @@ class CabinetDesigner:
         for i in range(1, spaces_count):
             h = self.bottom_height + (spacing * i)
             new_shelves.append(round(h, 1))
-        self.columns[index]['shelf_heights'] = new_shelves
+        col.shelf_heights = new_shelves
         # Reset dividers when resetting shelf count as space IDs change
-        self.columns[index]['vertical_dividers'] = []
+        col.vertical_dividers = []
 
+    @undoable
     def set_shelves_count(self, index, count):
         """Sets shelves to be evenly spaced with 'count' spaces."""
         if 0 <= index < len(self.columns):
             if count < 1:
                 # 0 shelves means 1 space
-                self.columns[index]['shelf_heights'] = []
-                self.columns[index]['vertical_dividers'] = []
+                col = self._edit_column(index)
+                col.shelf_heights = []
+                col.vertical_dividers = []
                 print(f"Column {index+1} cleared of shelves.")
                 return
             
@@ -152,6 +273,27 @@ class CabinetDesigner:
         else:
             print("Invalid column index.")
 
+    def fit_shelves(self, items, clearance=2.0):
+        """
+        Re-spaces the shelves of the top sections to hold items, (height,
+        quantity[, width]) in cm, with the least empty space (see
+        shelf_planner). One undo step; returns the ShelfPlan.
+        """
+        from shelf_planner import plan_shelves
+        plan = plan_shelves(self, items, clearance)
+        with self.edit_step('fit_shelves'):
+            for index, shelves in plan.shelves.items():
+                col = self._edit_column(index)
+                col.shelf_heights = shelves
+                # Space IDs change with the shelves
+                col.vertical_dividers = []
+        count = sum(n for c in plan.compartments for _, _, n in c.items)
+        print(f"Placed {count} item(s) on {len(plan.compartments)} shelf space(s).")
+        if plan.unplaced:
+            print(f"Did not fit: {', '.join(f'{n} x {h:g}cm' for h, _, n in plan.unplaced)}")
+        return plan
+
+    @undoable
     def add_shelf_at_height(self, index, height_cm):
         if 0 <= index < len(self.columns):
             if height_cm <= self.bottom_height or height_cm >= self.total_height:
@@ -160,9 +302,10 @@ class CabinetDesigner:
             
             # Add and sort
             col = self.columns[index]
-            if height_cm not in col['shelf_heights']:
-                col['shelf_heights'].append(height_cm)
-                col['shelf_heights'].sort()
+            if height_cm not in col.shelf_heights:
+                col = self._edit_column(index)
+                col.shelf_heights.append(height_cm)
+                col.shelf_heights.sort()
                 # Vertical dividers might shift meaning, but we keep them
                 print(f"Added shelf at {height_cm}cm to Column {index+1}.")
             else:
@@ -170,31 +313,35 @@ class CabinetDesigner:
         else:
             print("Invalid column index.")
 
+    @undoable
     def remove_shelf_by_index(self, col_index, shelf_index):
         if 0 <= col_index < len(self.columns):
             col = self.columns[col_index]
-            if 0 <= shelf_index < len(col['shelf_heights']):
-                removed_h = col['shelf_heights'].pop(shelf_index)
+            if 0 <= shelf_index < len(col.shelf_heights):
+                col = self._edit_column(col_index)
+                removed_h = col.shelf_heights.pop(shelf_index)
                 # Clear dividers because space mapping changed
-                col['vertical_dividers'] = []
+                col.vertical_dividers = []
                 print(f"Removed shelf at {removed_h:.1f}cm from Column {col_index+1}. (Dividers reset)")
             else:
                 print("Invalid shelf index.")
         else:
              print("Invalid column index.")
 
+    @undoable
     def subdivide_compartment(self, col_index, space_id):
         if 0 <= col_index < len(self.columns):
             col = self.columns[col_index]
-            shelves = col['shelf_heights']
+            shelves = col.shelf_heights
             
             # space_id 0: space between bottom and first shelf (or top cap if none)
             if 0 <= space_id <= len(shelves):
-                if space_id in col['vertical_dividers']:
-                    col['vertical_dividers'].remove(space_id)
+                col = self._edit_column(col_index)
+                if space_id in col.vertical_dividers:
+                    col.vertical_dividers.remove(space_id)
                     print(f"Removed vertical divider in Column {col_index+1}, Space {space_id}.")
                 else:
-                    col['vertical_dividers'].append(space_id)
+                    col.vertical_dividers.append(space_id)
                     print(f"Added vertical divider in Column {col_index+1}, Space {space_id}.")
             else:
                 print(f"Invalid compartment ID. Valid IDs for this column are 0 to {len(shelves)}.")
@@ -204,19 +351,20 @@ class CabinetDesigner:
     def list_shelves(self, index):
         if 0 <= index < len(self.columns):
             col = self.columns[index]
-            print(f"Shelves for Column {index+1} ({col['width']}cm):")
-            if not col['shelf_heights']:
+            print(f"Shelves for Column {index+1} ({col.width}cm):")
+            if not col.shelf_heights:
                 print("  (No shelves)")
             else:
-                for i, h in enumerate(col['shelf_heights']):
+                for i, h in enumerate(col.shelf_heights):
                     print(f"  {i+1}: {h:.1f} cm")
         else:
             print("Invalid column index.")
 
+    @undoable
     def move_shelf(self, col_index, shelf_index, amount_cm, silent=False):
         if 0 <= col_index < len(self.columns):
             col = self.columns[col_index]
-            shelves = col['shelf_heights']
+            shelves = col.shelf_heights
             if 0 <= shelf_index < len(shelves):
                 current_h = shelves[shelf_index]
                 new_h = current_h + amount_cm
@@ -245,6 +393,7 @@ class CabinetDesigner:
                         if not silent: print(f"Collision with shelf above (at {shelves[shelf_index+1]}cm).")
                         return
 
+                shelves = self._edit_column(col_index).shelf_heights
                 shelves[shelf_index] = new_h
                 # Don't sort if we are moving interactively, or identity changes.
                 # Actually, if we prevent collision, sorting is redundant but safe.
@@ -257,75 +406,84 @@ class CabinetDesigner:
         else:
             if not silent: print("Invalid column index.")
 
+    @undoable
     def swap_columns(self, index1, index2):
         if 0 <= index1 < len(self.columns) and 0 <= index2 < len(self.columns):
             self.columns[index1], self.columns[index2] = self.columns[index2], self.columns[index1]
+            self._invalidate_groups()
             print(f"Swapped Column {index1+1} and Column {index2+1}.")
         else:
             print("Invalid column indices.")
 
-    def save_config(self, filename):
-        data = {
+    def to_dict(self):
+        return {
             'total_height': self.total_height,
             'bottom_height': self.bottom_height,
             'plinth_height': self.plinth_height,
-            'columns': self.columns
+            'columns': [c.to_dict() for c in self.columns]
         }
+
+    def state_hash(self):
+        """
+        Returns a stable hash of the design state, e.g. for use as a render cache
+        key or ETag. It serializes the whole design; layout() does not use it.
+        """
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def layout(self):
+        """
+        Returns the positioned geometry of the design, recomputed only after a
+        change. Every change goes through an edit step, _edit_column or
+        _invalidate_groups, which bump _version; the heights and column
+        identities cover assignments made outside them.
+        """
+        key = (self._version, self.total_height, self.bottom_height, self.plinth_height, tuple(map(id, self.columns)))
+        if key != self._layout_key:
+            self._layout = compute_layout({
+                'total_height': self.total_height,
+                'bottom_height': self.bottom_height,
+                'plinth_height': self.plinth_height,
+                'columns': self.columns
+            }, self.group_index)
+            self._layout_key = key
+        return self._layout
+
+    def save_config(self, filename):
+        """Saves the design as JSON, or as a compact binary file for a .cabd filename."""
+        data = self.to_dict()
         try:
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=4)
+            if filename.endswith('.cabd'):
+                from design_binary import save_binary
+                save_binary(data, filename)
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(data, f, indent=4)
             print(f"Configuration saved to {filename}")
         except Exception as e:
             print(f"Error saving file: {e}")
 
+    @undoable
+    def load_dict(self, data):
+        """Replaces the design with one given as a config dict (as written by save_config)."""
+        self.total_height = data.get('total_height', 240.0)
+        self.bottom_height = data.get('bottom_height', 80.0)
+        self.plinth_height = data.get('plinth_height', 8.0)
+        # Older save formats are migrated on the way in
+        self.columns = columns_from_dicts(data.get('columns', []), self.total_height, self.bottom_height)
+
     def load_config(self, filename):
         if not os.path.exists(filename):
             print("File not found.")
             return
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            
-            self.total_height = data.get('total_height', 240.0)
-            self.bottom_height = data.get('bottom_height', 80.0)
-            self.plinth_height = data.get('plinth_height', 8.0)
-            self.columns = data.get('columns', [])
-            
-            # Compatibility check: if columns have old format
-            for c in self.columns:
-                if 'shelf_heights' not in c:
-                    # Convert 'shelves' count to list
-                    count = c.get('shelves', 3) # Old count was spaces
-                    c['shelf_heights'] = []
-                    if count > 0:
-                        top_h = self.total_height - self.bottom_height
-                        spacing = top_h / count
-                        for i in range(1, count):
-                            c['shelf_heights'].append(self.bottom_height + spacing*i)
-                
-                if 'vertical_dividers' not in c:
-                    c['vertical_dividers'] = []
-                
-                if 'has_top' not in c:
-                    c['has_top'] = True
-                
-                if 'merge_right' not in c:
-                    c['merge_right'] = False
-                    
-                if 'has_drawers' in c:
-                    if c['has_drawers'] is True and 'drawers' not in c:
-                        # Migrate old boolean to 3 default drawers
-                        # Assuming old behavior was 3 full drawers filling space?
-                        # Or just standard 20cm ones? Let's do 3 x 20cm
-                        c['drawers'] = [{'height': 20.0}, {'height': 20.0}, {'height': 20.0}]
-                    elif c['has_drawers'] is False and 'drawers' not in c:
-                         c['drawers'] = []
-                    # Remove old key
-                    del c['has_drawers']
-                
-                if 'drawers' not in c:
-                    c['drawers'] = []
-            
+            if filename.endswith('.cabd'):
+                from design_binary import load_binary
+                data = load_binary(filename)
+            else:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+            self.load_dict(data)
             print(f"Configuration loaded from {filename}")
         except Exception as e:
             print(f"Error loading file: {e}")
@@ -336,9 +494,12 @@ class CabinetDesigner:
             print("\n[Empty Cabinet]\n")
             return
 
+        layout = self.layout()
+        widths = layout.column_widths
+
         # Dimensions
         top_section_height = self.total_height - self.bottom_height
-        total_w = self.get_total_width()
+        total_w = layout.total_width
         
         scale = 0.1 # 1 line = 10cm
         
@@ -348,6 +509,11 @@ class CabinetDesigner:
         def get_w_chars(cm):
             return int(cm * 0.2)
 
+        # Drawer heights per column, top to bottom
+        drawer_heights = [[] for _ in widths]
+        for p in layout.of_kind('drawer'):
+            drawer_heights[p.column].append(p.h)
+
         print("\n" + "=" * 40)
         print(f" CABINET PREVIEW (H: {self.total_height}cm, W: {total_w}cm)")
         print("=" * 40 + "\n")
@@ -355,143 +521,101 @@ class CabinetDesigner:
         # --- Draw Top Section ---
         # Top Cap
         line_str = "+"
-        for col in self.columns:
-            w_chars = get_w_chars(col['width'])
-            line_str += "-" * w_chars + "+"
+        for w in widths:
+            line_str += "-" * get_w_chars(w) + "+"
         print(line_str)
 
+        # Merged groups span their columns plus the dividers between them
+        group_w_chars = [sum(get_w_chars(w) for w in widths[g.start:g.end + 1]) + (g.end - g.start)
+                         for g in layout.groups]
+
         for r in range(top_lines):
             current_z = self.total_height - (r / scale)
             row_str = "|"
             
-            i = 0
-            while i < len(self.columns):
-                col = self.columns[i]
-                w_chars = get_w_chars(col['width'])
-                
-                # Check if this column and subsequent are merged
-                merged_group = [i]
-                temp_idx = i
-                while temp_idx < len(self.columns) - 1 and self.columns[temp_idx]['merge_right']:
-                    temp_idx += 1
-                    merged_group.append(temp_idx)
+            for group in layout.groups:
+                w_chars = group_w_chars[group.index]
                 
-                # Logic for drawing the merged group
                 # 1. If the group has NO top, draw spaces
                 # 2. If the group HAS top, draw based on the first column's shelves
-                master_col = self.columns[i]
-                group_has_top = any(self.columns[g]['has_top'] for g in merged_group)
+                if not group.has_top:
+                    row_str += " " * w_chars + "|"
+                    continue
+
+                space_id = 0
+                for h in group.shelves:
+                    if current_z > h:
+                        space_id += 1
+
+                is_shelf = False
+                for h in group.shelves:
+                    if abs(current_z - h) < (1.0/scale)/2: 
+                        is_shelf = True
+                        break
                 
-                # Total group width
-                group_w_chars = sum(get_w_chars(self.columns[g]['width']) for g in merged_group) + (len(merged_group) - 1)
-                
-                if not group_has_top:
-                    row_str += " " * group_w_chars + "|"
+                if is_shelf:
+                    row_str += "-" * w_chars + "|"
+                elif space_id in group.dividers:
+                    mid = w_chars // 2
+                    line = list(" " * w_chars)
+                    line[mid] = "|"
+                    row_str += "".join(line) + "|"
                 else:
-                    # Draw based on master_col shelves
-                    shelf_heights = master_col['shelf_heights']
-                    dividers = master_col.get('vertical_dividers', [])
-                    
-                    space_id = 0
-                    for h in shelf_heights:
-                        if current_z > h:
-                            space_id += 1
-
-                    is_shelf = False
-                    for h in shelf_heights:
-                        if abs(current_z - h) < (1.0/scale)/2: 
-                            is_shelf = True
-                            break
-                    
-                    if is_shelf:
-                        row_str += "-" * group_w_chars + "|"
-                    else:
-                        if space_id in dividers:
-                            mid = group_w_chars // 2
-                            line = list(" " * group_w_chars)
-                            line[mid] = "|"
-                            row_str += "".join(line) + "|"
-                        else:
-                            row_str += " " * group_w_chars + "|"
-                
-                # Skip the rest of the group in the outer loop
-                i = temp_idx + 1
+                    row_str += " " * w_chars + "|"
             
             print(row_str)
 
         # Middle Divider (Countertop)
         line_str = "+"
-        for col in self.columns:
-            w_chars = get_w_chars(col['width'])
-            line_str += "=" * w_chars + "+"
+        for w in widths:
+            line_str += "=" * get_w_chars(w) + "+"
         print(line_str)
 
         # --- Draw Bottom Section ---
+        # Rows go from the top of the bottom section down to the floor.
         for r in range(bot_lines):
             row_str = "|"
             
-            # Check if this row is within the plinth area
-            # Plinth is at the very bottom.
-            # Physical height of this row: r/scale from top of bottom section??
-            # No, 'bot_lines' iterates from top of bottom section DOWN to floor.
-            # Wait, previously r went 0..bot_lines.
-            # 0 is top of bottom section. bot_lines-1 is floor.
-            
-            # Distance from floor:
-            # floor_z = 0.
-            # current_z = self.bottom_height - (r / scale)
-            
+            # Distance from floor
             current_z = self.bottom_height - (r / scale)
             is_plinth = current_z < self.plinth_height
             
             if is_plinth:
                  # Just fill with plinth marker
-                 for col in self.columns:
-                     w_chars = get_w_chars(col['width'])
-                     row_str += "/" * w_chars + "|"
+                 for w in widths:
+                     row_str += "/" * get_w_chars(w) + "|"
             else:
-                for col in self.columns:
-                    w_chars = get_w_chars(col['width'])
-                    
-                    # Check for drawers
-                    drawers = col.get('drawers', [])
+                for c, w in enumerate(widths):
+                    w_chars = get_w_chars(w)
                     is_drawer_row = False
                     
-                    if drawers:
-                        # Determine if current_z falls inside a drawer
-                        # Drawers start at self.bottom_height and go down
-                        # Drawer 0: [bottom_h, bottom_h - d0_h]
-                        # Drawer 1: [bottom_h - d0_h, bottom_h - d0_h - d1_h]
-                        d_top = self.bottom_height
-                        for d in drawers:
-                            d_h = d['height']
-                            d_bot = d_top - d_h
-                            
-                            # current_z is the height of the current ASCII row
-                            # Check if current_z is roughly within [d_bot, d_top]
-                            # Tolerance for ASCII line
-                            if d_bot <= current_z <= d_top:
-                                # Check if we are at the border (d_bot)
-                                if abs(current_z - d_bot) < (1.0/scale)/2:
-                                     row_str += "-" * w_chars + "|"
-                                     is_drawer_row = True
-                                     break
-                                else:
-                                     # Inside drawer face
-                                     if r % 2 != 0 and (d_top - current_z) < (d_h / 2 + 2) and (d_top - current_z) > (d_h / 2 - 2):
-                                         # Middle of drawer
-                                         label = "DRW"
-                                         padding = (w_chars - len(label)) // 2
-                                         row_str += " " * padding + label + " " * (w_chars - padding - len(label)) + "|"
-                                     else:
-                                         row_str += " " * w_chars + "|"
-                                     is_drawer_row = True
-                                     break
-                            
-                            d_top -= d_h
+                    # Determine if current_z falls inside a drawer
+                    # Drawer 0: [bottom_h, bottom_h - d0_h]
+                    # Drawer 1: [bottom_h - d0_h, bottom_h - d0_h - d1_h]
+                    d_top = self.bottom_height
+                    for d_h in drawer_heights[c]:
+                        d_bot = d_top - d_h
+                        
+                        # Check if current_z is roughly within [d_bot, d_top]
+                        if d_bot <= current_z <= d_top:
+                            # Check if we are at the border (d_bot)
+                            if abs(current_z - d_bot) < (1.0/scale)/2:
+                                 row_str += "-" * w_chars + "|"
+                            elif r % 2 != 0 and (d_top - current_z) < (d_h / 2 + 2) and (d_top - current_z) > (d_h / 2 - 2):
+                                 # Middle of drawer
+                                 label = "DRW"
+                                 padding = (w_chars - len(label)) // 2
+                                 row_str += " " * padding + label + " " * (w_chars - padding - len(label)) + "|"
+                            else:
+                                 # Inside drawer face
+                                 row_str += " " * w_chars + "|"
+                            is_drawer_row = True
+                            break
+                        
+                        d_top -= d_h
                         
                     if not is_drawer_row:
-                        if col['width'] == 80:
+                        if w == 80:
                             # Two doors for 80cm
                             mid = w_chars // 2
                             line = list(" " * w_chars)
@@ -503,17 +627,16 @@ class CabinetDesigner:
                                 avail_l = mid
                                 pad_l = (avail_l - len(lbl)) // 2
                                 if pad_l >= 0:
-                                    for k, c in enumerate(lbl):
-                                        line[pad_l + k] = c
+                                    for k, ch in enumerate(lbl):
+                                        line[pad_l + k] = ch
                                 
                                 # Right Label
-                                lbl = "DOOR"
                                 avail_r = w_chars - 1 - mid
                                 pad_r = (avail_r - len(lbl)) // 2
                                 start_r = mid + 1
                                 if pad_r >= 0:
-                                    for k, c in enumerate(lbl):
-                                        line[start_r + pad_r + k] = c
+                                    for k, ch in enumerate(lbl):
+                                        line[start_r + pad_r + k] = ch
                             
                             row_str += "".join(line) + "|"
                         else:
@@ -529,16 +652,15 @@ class CabinetDesigner:
 
         # Bottom Floor
         line_str = "+"
-        for col in self.columns:
-            w_chars = get_w_chars(col['width'])
-            line_str += "-" * w_chars + "+"
+        for w in widths:
+            line_str += "-" * get_w_chars(w) + "+"
         print(line_str)
         
         # Width Labels
         lbl_str = " "
-        for i, col in enumerate(self.columns):
-            w_chars = get_w_chars(col['width'])
-            lbl = f"#{i+1} {col['width']}cm"
+        for i, w in enumerate(widths):
+            w_chars = get_w_chars(w)
+            lbl = f"#{i+1} {w}cm"
             pad = (w_chars - len(lbl)) // 2
             if pad < 0: pad = 0
             lbl_str += " " * pad + lbl + " " * (w_chars - pad - len(lbl) + 1)
@@ -555,6 +677,11 @@ def interactive_move_loop(designer, col_idx, shelf_idx):
     print("Controls: 'u'=Up 5cm, 'd'=Down 5cm, 'U'=Up 1cm, 'D'=Down 1cm")
     print("Press ENTER to confirm and exit.")
     
+    # The whole interactive move is a single undo step
+    with designer.edit_step('move_shelf'):
+        _interactive_move_keys(designer, col_idx, shelf_idx)
+
+def _interactive_move_keys(designer, col_idx, shelf_idx):
     while True:
         # We don't redraw continuously to avoid flickering, only on change.
         # But we need to listen for keys.
@@ -578,7 +705,7 @@ def interactive_move_loop(designer, col_idx, shelf_idx):
             print("\n[Interactive Move Mode] 'u'/'d' to move. ENTER to finish.")
             # Print current pos
             try:
-                cur = designer.columns[col_idx]['shelf_heights'][shelf_idx]
+                cur = designer.columns[col_idx].shelf_heights[shelf_idx]
                 print(f"Shelf is at: {cur:.1f} cm")
             except:
                 pass
@@ -586,9 +713,12 @@ def interactive_move_loop(designer, col_idx, shelf_idx):
 def print_help():
     print("Commands:")
     print("  add <40|60|80>        : Add a column of width cm")
+    print("  fill <cm> [drawers]   : Replace the columns with the best 40/60/80 fill of a wall,")
+    print("                          with at least [drawers] drawer units")
     print("  rm <index>            : Remove column at index (1-based)")
     print("  h <cm>                : Set total height (e.g. 240)")
     print("  s <idx> <count>       : Reset column to <count> evenly spaced SECTIONS")
+    print("  fit <h>x<n>[x<w>] ... : Space the shelves for n items h cm tall (w cm wide)")
     print("  shelf <idx> <height>  : Add a specific shelf at height cm (from floor)")
     print("  subdivide <idx> <id>  : Divide compartment <id> (0=bottom, 1=above shelf 1...)")
     print("  rm_shelf <idx> <id>   : Remove shelf <id> in column <idx>")
@@ -604,6 +734,8 @@ def print_help():
     print("  render [filename]     : Render schematic image (default: cabinet_render.png)")
     print("  save <filename>       : Save configuration to file")
     print("  load <filename>       : Load configuration from file")
+    print("  undo                  : Undo the last change")
+    print("  redo                  : Redo the last undone change")
     print("  show                  : Redraw the cabinet")
     print("  help                  : Show this help")
     print("  exit                  : Quit")
@@ -639,6 +771,35 @@ def interactive_mode():
                     print("Invalid number")
             else:
                 print("Usage: add <40|60|80>")
+        elif cmd == 'fit':
+            if len(cmd_line) > 1:
+                from shelf_planner import parse_item
+                try:
+                    items = [parse_item(arg) for arg in cmd_line[1:]]
+                    designer.fit_shelves(items)
+                except ValueError:
+                    print("Invalid input")
+            else:
+                print("Usage: fit <height>x<quantity>[x<width>] ...  (e.g. fit 32x40 24x60 31x12x8)")
+        elif cmd == 'fill':
+            if len(cmd_line) > 1:
+                try:
+                    width = float(cmd_line[1])
+                    min_drawers = int(cmd_line[2]) if len(cmd_line) > 2 else 0
+                except ValueError:
+                    print("Invalid input")
+                    continue
+                from wall_fill import best_fills
+                fills = best_fills(width, 1, min_drawers=min_drawers)
+                if fills:
+                    designer.load_dict(fills[0].to_dict(total_height=designer.total_height,
+                                                        bottom_height=designer.bottom_height,
+                                                        plinth_height=designer.plinth_height))
+                    print(f"Filled {width:g}cm with {' + '.join(str(w) for w in fills[0].widths)}cm modules.")
+                else:
+                    print(f"No combination of 40/60/80cm modules fills {width:g}cm.")
+            else:
+                print("Usage: fill <wall width cm> [min drawer units]")
         elif cmd == 'rm':
             if len(cmd_line) > 1:
                 try:
@@ -709,7 +870,7 @@ def interactive_mode():
                     shelf_idx = int(cmd_line[2]) - 1
                     # Basic validation before entering loop
                     if 0 <= col_idx < len(designer.columns):
-                        if 0 <= shelf_idx < len(designer.columns[col_idx]['shelf_heights']):
+                        if 0 <= shelf_idx < len(designer.columns[col_idx].shelf_heights):
                              interactive_move_loop(designer, col_idx, shelf_idx)
                         else:
                             print("Invalid shelf index.")
@@ -767,28 +928,12 @@ def interactive_mode():
             if len(cmd_line) > 1:
                 out_file = cmd_line[1]
             
-            # Save temp config
-            temp_json = ".temp_render_config.json"
-            designer.save_config(temp_json)
-            
-            # Run render script using subprocess.run for better quoting handling
             try:
-                result = subprocess.run(
-                    [sys.executable, "render_cabinet.py", temp_json, out_file],
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-                print(f"Image rendered to {out_file}")
-            except subprocess.CalledProcessError as e:
-                print("Rendering failed.")
-                print(f"Error: {e.stderr}")
+                save_render(designer, out_file)
+            except ImportError as e:
+                print(f"Rendering failed: {e}")
             except Exception as e:
                 print(f"An error occurred: {e}")
-            
-            # Clean up
-            if os.path.exists(temp_json):
-                os.remove(temp_json)
         elif cmd == 'save':
             if len(cmd_line) > 1:
                 designer.save_config(cmd_line[1])
@@ -799,6 +944,10 @@ def interactive_mode():
                 designer.load_config(cmd_line[1])
             else:
                 print("Usage: load <filename>")
+        elif cmd == 'undo':
+            designer.undo()
+        elif cmd == 'redo':
+            designer.redo()
         elif cmd == 'show':
             pass 
         else:
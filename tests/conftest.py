@@ -0,0 +1,19 @@
+import os
+import sys
+import importlib
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES = os.path.join(REPO, "templates")
+
+@pytest.fixture(scope="session")
+def web_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("web")
+
+@pytest.fixture
+def web(web_dir, monkeypatch):
+    """The web_designer module, imported and run with a scratch directory as working directory."""
+    monkeypatch.chdir(web_dir)
+    if 'web_designer' in sys.modules:
+        return sys.modules['web_designer']
+    return importlib.import_module('web_designer')
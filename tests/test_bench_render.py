@@ -0,0 +1,48 @@
+import os
+import bench_render
+from bench_render import compare, measure, render_scale, run, synthetic_design
+from cabinet_model import columns_from_dicts
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+def test_synthetic_design_is_valid():
+    data = synthetic_design(25, shelves=4)
+    columns = columns_from_dicts(data['columns'])
+    assert len(columns) == 25
+    assert all(len(c.shelf_heights) == 4 for c in columns)
+    assert not columns[-1].merge_right
+    assert any(c.drawers for c in columns) and any(c.vertical_dividers for c in columns)
+
+def test_render_scale_caps_the_canvas():
+    assert render_scale(synthetic_design(1)) == bench_render.render_cabinet.SCALE
+    wide = synthetic_design(1000)
+    width = sum(c['width'] for c in wide['columns'])
+    assert width * render_scale(wide) + 2 * bench_render.render_cabinet.MARGIN <= bench_render.MAX_CANVAS_WIDTH
+
+def test_measure_stops_after_min_time():
+    calls = []
+    def func():
+        calls.append(1)
+        return 42
+    stats = measure(func, repeat=5, min_time=0)
+    assert stats['runs'] == 3 and len(calls) == 4 # Three timed runs, one under tracemalloc
+    assert stats['bytes'] == 42
+    assert stats['p95_ms'] >= stats['mean_ms'] and stats['peak_kb'] >= 0
+
+def test_run_over_templates_and_walls(capsys):
+    results = run(pattern="*", ops="draw", repeat=1, template_dir=TEMPLATE_DIR, sizes=(3,))
+    templates = sorted(os.path.splitext(n)[0] for n in os.listdir(TEMPLATE_DIR) if n.endswith(".json"))
+    assert sorted(results) == sorted(templates + ["wall_3"])
+    assert all(list(ops) == ["draw"] and ops["draw"]["bytes"] > 0 for ops in results.values())
+    assert "wall_3" in capsys.readouterr().out
+
+def test_run_every_operation():
+    results = run(pattern="wall_*", repeat=1, template_dir=TEMPLATE_DIR, sizes=(2,))
+    assert sorted(results["wall_2"]) == sorted(['render_cabinet_to_bytes', 'render_cabinet', 'draw',
+                                                'save_config', 'load_config'])
+
+def test_compare_reports_regressions(capsys):
+    baseline = {'a': {'draw': {'mean_ms': 10.0}, 'render': {'mean_ms': 10.0}}}
+    results = {'a': {'draw': {'mean_ms': 11.0}, 'render': {'mean_ms': 20.0}, 'new': {'mean_ms': 1.0}}}
+    assert compare(results, baseline, threshold=1.25) == [('a', 'render', 2.0)]
+    assert "REGRESSION" in capsys.readouterr().out
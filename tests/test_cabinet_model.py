@@ -0,0 +1,40 @@
+import pytest
+from cabinet_model import Column, Drawer, columns_from_dicts, migrate_column_dict
+
+def test_dict_round_trip_keeps_unknown_keys():
+    d = {'width': 60, 'shelf_heights': [120.0, 160.5], 'vertical_dividers': [1], 'has_top': False,
+         'merge_right': True, 'drawers': [{'height': 20.0, 'handle': 'knob'}], 'color': 'oak'}
+    col = Column.from_dict(dict(d))
+    assert col.to_dict() == d
+    assert col.extra == {'color': 'oak'}
+    assert col.drawers[0]['handle'] == 'knob'
+
+def test_dict_style_access_is_read_only():
+    col = Column.from_dict({'width': 60, 'color': 'oak'})
+    assert col['width'] == 60 and col['color'] == 'oak'
+    assert 'width' in col and 'color' in col and 'size' not in col
+    assert col.get('size', 1) == 1
+    with pytest.raises(KeyError):
+        col['size']
+    with pytest.raises(TypeError):
+        col['width'] = 80
+    assert col.width == 60
+
+def test_copy_is_independent():
+    col = Column(60, [100.0], [1], drawers=[Drawer(20.0)])
+    copy = col.copy()
+    assert copy == col and copy is not col
+    copy.shelf_heights.append(150.0)
+    copy.vertical_dividers[0] = 2
+    assert col.shelf_heights == [100.0] and col.vertical_dividers == [1]
+
+def test_old_saves_are_migrated():
+    old = {'width': 80, 'shelves': 3, 'has_drawers': True, 'vertical_dividers': [1.0, '2', 2.5, 3], 'has_top': 1, 'merge_right': 0}
+    migrated = migrate_column_dict(dict(old), 240.0, 80.0)
+    assert 'has_drawers' not in migrated
+    assert migrated['shelf_heights'] == [80.0 + 160.0 / 3, 80.0 + 160.0 / 3 * 2]
+    assert migrated['drawers'] == [{'height': 20.0}] * 3
+    assert migrated['has_top'] is True and migrated['merge_right'] is False
+    assert migrated['vertical_dividers'] == [1, 3]
+    col = columns_from_dicts([old])[0]
+    assert isinstance(col, Column) and col.width == 80
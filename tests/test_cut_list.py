@@ -0,0 +1,48 @@
+import random
+import pytest
+from cut_list import design_panels, cut_list
+from bench_render import synthetic_design
+from design_io import iter_designs
+
+np = pytest.importorskip("numpy")
+
+def random_design(rng):
+    th = rng.choice([240.0, 200, 260.5])
+    bh = rng.choice([80.0, 60, 90.5])
+    columns = []
+    for _ in range(rng.randint(0, 9)):
+        columns.append({
+            'width': rng.choice([40, 60, 80]),
+            # Some shelves fall outside the top section on purpose
+            'shelf_heights': [rng.uniform(bh - 10, th + 10) for _ in range(rng.randint(0, 6))],
+            'vertical_dividers': [rng.randint(0, 7) for _ in range(rng.randint(0, 3))],
+            'has_top': rng.random() < 0.8,
+            'merge_right': rng.random() < 0.4,
+            'drawers': [{'height': rng.choice([15.0, 20.0, 25.5])} for _ in range(rng.randint(0, 4))],
+        })
+    return {'total_height': th, 'bottom_height': bh, 'plinth_height': rng.choice([8.0, 0, 10]), 'columns': columns}
+
+def panel_keys(panels):
+    return sorted((p.kind, p.column, p.length, p.width) for p in panels)
+
+def test_vectorized_matches_per_design():
+    rng = random.Random(5)
+    designs = [record.to_dict() for record in iter_designs("templates")]
+    designs += [synthetic_design(n) for n in (0, 1, 10)]
+    designs += [random_design(rng) for _ in range(150)]
+    table = cut_list(designs)
+    for d, design in enumerate(designs):
+        assert panel_keys(table.panels(d)) == panel_keys(design_panels(design)), d
+
+def test_totals_match_panels():
+    designs = [synthetic_design(n) for n in (1, 4, 9)]
+    area, banding, count = cut_list(designs).totals()
+    for d, design in enumerate(designs):
+        panels = design_panels(design)
+        assert count[d] == len(panels)
+        assert area[d] == pytest.approx(sum(p.area for p in panels))
+        assert banding[d] == pytest.approx(sum(p.banding for p in panels))
+
+def test_empty_catalogue():
+    area, banding, count = cut_list([]).totals()
+    assert len(area) == len(banding) == len(count) == 0
@@ -0,0 +1,89 @@
+import glob
+import json
+import os
+import struct
+import pytest
+from design_binary import (MAGIC, VERSION, decode_design, encode_design, load_binary, save_binary,
+                           _write_blob, _write_varint)
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.json")))
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def exact(data):
+    """JSON text that tells ints from floats, so equality also checks the number types."""
+    return json.dumps(data, sort_keys=True)
+
+@pytest.mark.parametrize("path", TEMPLATES, ids=os.path.basename)
+def test_templates_round_trip(path, tmp_path):
+    data = load(path)
+    assert exact(decode_design(encode_design(data))) == exact(data)
+    out = str(tmp_path / "design.cabd")
+    save_binary(data, out)
+    assert exact(load_binary(out)) == exact(data)
+    assert os.path.getsize(out) < os.path.getsize(path)
+
+def test_unknown_keys_are_kept_at_every_level():
+    data = load(TEMPLATES[0])
+    data['name'] = "Hall"
+    data['notes'] = {'room': "hall", 'tags': [1, 2.5]}
+    data['columns'][0]['color'] = "oak"
+    data['columns'][0]['drawers'] = [{'height': 20.0, 'handle': "knob"}]
+    encoded = encode_design(data)
+    assert encoded[4] == VERSION
+    assert exact(decode_design(encoded)) == exact(data)
+
+def test_design_without_top_level_extras_stays_version_1():
+    assert encode_design(load(TEMPLATES[0]))[4] == 1
+
+def test_numbers_keep_their_type_and_value():
+    data = {'total_height': 240, 'bottom_height': 80.0, 'plinth_height': 8.25,
+            'columns': [{'width': 60, 'shelf_heights': [90.1, 120, 1e-7, 2 ** 40], 'vertical_dividers': [],
+                         'has_top': True, 'merge_right': False, 'drawers': []}]}
+    assert exact(decode_design(encode_design(data))) == exact(data)
+
+@pytest.mark.parametrize("path", TEMPLATES[:2], ids=os.path.basename)
+def test_truncated_files_raise_value_error(path):
+    data = load(path)
+    data['name'] = "Hall"
+    data['columns'][0]['color'] = "oak"
+    encoded = encode_design(data)
+    for n in range(len(encoded)):
+        with pytest.raises(ValueError):
+            decode_design(encoded[:n])
+
+def test_bad_magic_and_newer_version():
+    encoded = encode_design(load(TEMPLATES[0]))
+    with pytest.raises(ValueError, match="bad magic"):
+        decode_design(b"JSON" + encoded[4:])
+    with pytest.raises(ValueError, match="newer"):
+        decode_design(encoded[:4] + bytes([VERSION + 1]) + encoded[5:])
+
+def test_unknown_number_tag():
+    with pytest.raises(ValueError, match="tag"):
+        decode_design(MAGIC + bytes([1, 3, 99]) + struct.pack('<3b', 0, 0, 0))
+
+@pytest.mark.parametrize("blob", [None, [1, 2], "text", 5])
+def test_extras_that_are_not_objects_raise_value_error(blob):
+    data = load(TEMPLATES[0])
+    data['name'] = "Hall"
+    encoded = encode_design(data)
+    # Replace the trailing top-level blob with JSON of the wrong type
+    tail = bytearray()
+    _write_blob(tail, {'name': "Hall"})
+    bad = bytearray()
+    text = json.dumps(blob).encode('utf-8')
+    _write_varint(bad, len(text))
+    bad += text
+    assert encoded.endswith(bytes(tail))
+    with pytest.raises(ValueError):
+        decode_design(encoded[:-len(tail)] + bytes(bad))
+
+def test_invalid_json_raises_value_error():
+    data = load(TEMPLATES[0])
+    data['columns'][0]['color'] = "oak"
+    encoded = encode_design(data)
+    with pytest.raises(ValueError):
+        decode_design(encoded.replace(b'"oak"', b'"oa\xff'))
@@ -0,0 +1,110 @@
+import pytest
+from simple_designer import CabinetDesigner
+from design_history import History
+
+@pytest.fixture
+def designer():
+    designer = CabinetDesigner()
+    for width in (60, 80, 40, 60):
+        designer.add_column(width)
+    designer.history.clear()
+    return designer
+
+def test_untouched_columns_are_shared_across_snapshots(designer):
+    before = list(designer.columns)
+    designer.toggle_top(1)
+    after = designer.columns
+    assert after[1] is not before[1] and not after[1].has_top
+    assert all(after[i] is before[i] for i in (0, 2, 3))
+    snap = designer.history._undo[-1]
+    assert all(a is b for a, b in zip(snap.columns, before))
+    # The snapshot's column was copied, not changed
+    assert before[1].has_top
+
+def test_second_edit_of_a_column_in_one_step_does_not_copy_again(designer):
+    with designer.edit_step('two changes'):
+        designer.toggle_top(0)
+        copied = designer.columns[0]
+        designer.toggle_merge(0)
+        assert designer.columns[0] is copied
+    assert len(designer.history._undo) == 1
+
+def test_edit_step_is_one_undo_step(designer):
+    start = designer.to_dict()
+    with designer.edit_step('batch'):
+        designer.toggle_top(0)
+        designer.add_column(40)
+        designer.set_plinth_height(12)
+    assert len(designer.history) == 1
+    assert designer.history._undo[-1].label == 'batch'
+    assert designer.undo()
+    assert designer.to_dict() == start
+    assert not designer.history.can_undo
+
+def test_edit_that_changes_nothing_adds_no_step(designer):
+    designer.add_column(55) # Invalid width: refused
+    with designer.edit_step('nothing'):
+        pass
+    assert len(designer.history) == 0
+
+def test_undo_redo_round_trip(designer):
+    states = [designer.to_dict()]
+    designer.toggle_top(2)
+    states.append(designer.to_dict())
+    designer.remove_column(0)
+    states.append(designer.to_dict())
+    assert designer.undo() and designer.to_dict() == states[1]
+    assert designer.undo() and designer.to_dict() == states[0]
+    assert not designer.undo()
+    assert designer.redo() and designer.to_dict() == states[1]
+    assert designer.redo() and designer.to_dict() == states[2]
+    assert not designer.redo()
+
+def test_new_edit_clears_redo(designer):
+    designer.toggle_top(0)
+    designer.toggle_top(1)
+    designer.undo()
+    assert designer.history.can_redo
+    nbytes = designer.history.nbytes
+    designer.toggle_merge(2)
+    assert not designer.history.can_redo
+    assert len(designer.history) == 2
+    assert designer.history.nbytes == sum(s.nbytes for s in designer.history._undo)
+    assert designer.history.nbytes != nbytes
+
+def test_undone_column_is_not_edited_in_place(designer):
+    designer.toggle_top(0)
+    designer.undo()
+    restored = designer.columns[0]
+    designer.toggle_merge(0)
+    assert designer.columns[0] is not restored and not restored.merge_right
+    designer.undo()
+    assert designer.columns[0] is restored
+
+def test_history_is_trimmed_to_its_byte_budget(designer):
+    designer.toggle_top(0)
+    step = designer.history.nbytes
+    designer.history = History(max_bytes=int(step * 3.5))
+    for i in range(10):
+        designer.toggle_top(i % 4)
+    history = designer.history
+    assert history.nbytes <= history.max_bytes
+    assert len(history) == 3
+    assert history.nbytes == sum(s.nbytes for s in history._undo)
+    # The newest steps are kept
+    for _ in range(3):
+        assert designer.undo()
+    assert not designer.undo()
+    # Undo moved the steps to the redo stack without growing past the budget
+    assert history.nbytes <= history.max_bytes and len(history._redo) == 3
+
+def test_trim_drops_the_oldest_undo_steps_first():
+    history = History(max_bytes=250)
+    designer = CabinetDesigner()
+    designer.history = history
+    designer.add_column(60)
+    designer.add_column(80)
+    first = history._undo[0]
+    designer.add_column(40)
+    assert first not in history._undo
+    assert history.nbytes <= history.max_bytes
@@ -0,0 +1,112 @@
+import json
+import os
+import pytest
+from design_binary import save_binary
+from design_index import DesignIndex
+
+def design(widths, drawers=0, height=240.0):
+    return {'total_height': height, 'bottom_height': 80.0, 'plinth_height': 8.0,
+            'columns': [{'width': w, 'shelf_heights': [120.0, 160.0], 'vertical_dividers': [], 'has_top': True,
+                         'merge_right': False, 'drawers': [{'height': 20.0}] * drawers} for w in widths]}
+
+def write(directory, name, data, mtime_s=None):
+    path = os.path.join(str(directory), name)
+    if name.endswith('.cabd'):
+        save_binary(data, path)
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    if mtime_s is not None:
+        os.utime(path, (mtime_s, mtime_s))
+    return path
+
+@pytest.fixture
+def index(tmp_path):
+    write(tmp_path, "hall.json", design([60, 80]), 1000)
+    write(tmp_path, "office.json", design([80, 80, 80], drawers=2), 2000)
+    write(tmp_path, "attic.cabd", design([40, 40], height=200.0), 3000)
+    write(tmp_path, "notes.txt", {}, 4000)
+    index = DesignIndex(str(tmp_path))
+    assert index.sync() == 3
+    yield index
+    index.close()
+
+def names(rows):
+    return [r['name'] for r in rows]
+
+def test_sync_indexes_json_and_cabd(index):
+    assert index.count() == 3
+    row = index.get("office.json")
+    assert (row['width'], row['columns'], row['shelves'], row['drawers']) == (240, 3, 6, 6)
+    assert index.get("attic.cabd")['height'] == 200.0
+    assert index.get("notes.txt") is None
+
+def test_sync_rereads_only_changed_files(index, tmp_path):
+    assert index.sync() == 0
+    write(tmp_path, "hall.json", design([60, 80, 40]), 5000)
+    assert index.sync() == 1
+    assert index.get("hall.json")['columns'] == 3
+    # Same content, new mtime: read again
+    os.utime(os.path.join(str(tmp_path), "office.json"), (6000, 6000))
+    assert index.sync() == 1
+    assert index.sync() == 0
+
+def test_sync_drops_removed_and_unreadable_files(index, tmp_path):
+    os.remove(os.path.join(str(tmp_path), "hall.json"))
+    with open(os.path.join(str(tmp_path), "broken.json"), 'w') as f:
+        f.write("{")
+    assert index.sync() == 0
+    assert index.get("hall.json") is None and index.get("broken.json") is None
+    assert index.count() == 2
+
+def test_filters(index):
+    assert names(index.query(min_width=200)) == ["office.json"]
+    assert sorted(names(index.query(max_width=140))) == ["attic.cabd", "hall.json"]
+    assert names(index.query(has_drawers=True)) == ["office.json"]
+    assert index.count(has_drawers=False) == 2
+    assert names(index.query(max_height=220)) == ["attic.cabd"]
+    assert names(index.query(name="ffi")) == ["office.json"]
+    assert names(index.query(name="%")) == []
+    assert index.count(min_columns=2, max_columns=2) == 2
+    with pytest.raises(ValueError):
+        index.query(colour="oak")
+
+@pytest.mark.parametrize("sort, expected", [
+    ('mtime', ["attic.cabd", "office.json", "hall.json"]),
+    ('width', ["office.json", "hall.json", "attic.cabd"]),
+    ('name', ["office.json", "hall.json", "attic.cabd"]),
+    ('columns', ["office.json", "hall.json", "attic.cabd"]),
+])
+def test_sort_keys(index, sort, expected):
+    assert names(index.query(sort=sort)) == expected
+    assert names(index.query(sort=sort, descending=False)) == expected[::-1]
+
+def test_unknown_sort_key(index):
+    with pytest.raises(ValueError):
+        index.query(sort="width; DROP TABLE designs")
+
+def test_paging(index, tmp_path):
+    for i in range(7):
+        write(tmp_path, f"extra{i}.json", design([60]), 100 + i)
+    index.sync()
+    pages = [names(index.query(sort='name', descending=False, limit=4, offset=o)) for o in (0, 4, 8)]
+    assert [len(p) for p in pages] == [4, 4, 2]
+    assert sum(pages, []) == sorted(names(index.query(limit=100)))
+
+def test_update_and_thumbnails(tmp_path):
+    index = DesignIndex(str(tmp_path), thumbnails=True)
+    write(tmp_path, "hall.json", design([60, 80]))
+    write(tmp_path, "hall.cabd", design([60]))
+    assert index.update("hall.json")
+    assert index.update("hall.cabd", thumbnail=False)
+    json_thumb = index.get("hall.json")['thumbnail']
+    assert json_thumb and os.path.exists(json_thumb)
+    assert index.get("hall.cabd")['thumbnail'] is None
+    mtime = index.get("hall.cabd")['mtime']
+    assert not index.set_thumbnail("hall.cabd", b"png", mtime - 1)
+    assert index.set_thumbnail("hall.cabd", b"png", mtime)
+    assert index.get("hall.cabd")['thumbnail'] != json_thumb
+    assert not index.update("missing.json")
+    index.remove("hall.json")
+    assert not os.path.exists(json_thumb)
+    index.close()
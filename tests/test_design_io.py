@@ -0,0 +1,75 @@
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+import pytest
+import cut_list
+import nesting
+from design_io import DesignRecord, iter_designs, read_design, write_archive
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.json")))
+
+@pytest.fixture
+def collection(tmp_path):
+    """The templates, one design whose columns cannot be migrated and one file that is not JSON."""
+    for path in TEMPLATES:
+        shutil.copy(path, str(tmp_path))
+    with open(str(tmp_path / "bad_columns.json"), 'w') as f:
+        json.dump({'total_height': 200, 'columns': [{'shelf_heights': [100]}]}, f)
+    with open(str(tmp_path / "broken.json"), 'w') as f:
+        f.write('{"columns": [')
+    return tmp_path
+
+def test_unreadable_files_are_skipped_or_raise_with_strict(collection, capsys):
+    names = sorted(r.name for r in iter_designs(str(collection)))
+    assert "broken" not in names and "bad_columns" in names
+    assert len(names) == len(TEMPLATES) + 1
+    assert "Skipping" in capsys.readouterr().out
+    with pytest.raises(ValueError, match="broken"):
+        list(iter_designs(str(collection), strict=True))
+
+def test_invalid_columns_raise_value_error_on_first_use(collection):
+    record = read_design(str(collection / "bad_columns.json"))
+    assert record.column_count == 1
+    with pytest.raises(ValueError, match="bad_columns.json: invalid columns"):
+        record.columns
+
+def test_cli_tools_skip_a_design_with_bad_columns(collection, monkeypatch, capsys):
+    for module in (cut_list, nesting):
+        monkeypatch.setattr(sys, 'argv', [module.__name__, str(collection)])
+        module.main()
+        out = capsys.readouterr().out
+        assert "Skipping" in out and "bad_columns.json" in out
+    assert f"{len(TEMPLATES)} design(s)" in out
+
+def test_migration_is_lazy():
+    record = DesignRecord({'columns': [{'width': 60, 'shelves': 2}]}, 'old')
+    assert record.total_width == 60
+    assert not record._migrated
+    assert record.columns[0].shelf_heights == [160.0] # Two compartments between 80 and 240
+
+@pytest.mark.parametrize("name", ["designs.jsonl", "designs.jsonl.gz"])
+def test_archive_round_trip(tmp_path, name):
+    designs = [read_design(p) for p in TEMPLATES]
+    path = str(tmp_path / name)
+    assert write_archive(iter(designs), path) == len(designs)
+    if name.endswith('.gz'):
+        with gzip.open(path, 'rt') as f:
+            assert len(f.readlines()) == len(designs)
+    read = list(iter_designs(path))
+    assert [r.name for r in read] == [d.name for d in designs]
+    assert [r.to_dict() for r in read] == [d.to_dict() for d in designs]
+
+def test_archive_skips_bad_lines(tmp_path, capsys):
+    path = str(tmp_path / "designs.jsonl")
+    with open(path, 'w') as f:
+        f.write(json.dumps({'name': 'a', 'design': {'columns': []}}) + "\n")
+        f.write("not json\n\n")
+        f.write(json.dumps({'columns': [{'width': 40}]}) + "\n")
+    read = list(iter_designs(path))
+    assert [r.name for r in read] == ['a', None]
+    assert f"{path}, line 2" in capsys.readouterr().out
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_designs(path, strict=True))
@@ -0,0 +1,97 @@
+import os
+from simple_designer import CabinetDesigner
+from design_journal import DesignJournal, read_segment
+
+def widths(designer):
+    return [c.width for c in designer.columns]
+
+def journaled(directory, **kwargs):
+    journal = DesignJournal(str(directory), **kwargs)
+    designer = CabinetDesigner()
+    journal.attach(designer)
+    return journal, designer
+
+def crash(journal):
+    """Drops the journal the way a killed process would: the file is closed, nothing else happens."""
+    journal._file.close()
+    journal._file = None
+
+def test_recover_after_crash(tmp_path):
+    journal, designer = journaled(tmp_path)
+    designer.add_column(60)
+    designer.add_column(80)
+    designer.toggle_top(1)
+    crash(journal)
+
+    reopened = DesignJournal(str(tmp_path))
+    assert reopened.seq == journal.seq
+    recovered = reopened.recover()
+    assert recovered.to_dict() == designer.to_dict()
+    # Logging continues after the last record, and the edits can still be undone
+    recovered.add_column(40)
+    assert reopened.seq == journal.seq + 2
+    recovered.undo()
+    assert recovered.to_dict() == designer.to_dict()
+
+def test_torn_last_line_is_ignored(tmp_path):
+    journal, designer = journaled(tmp_path)
+    designer.add_column(60)
+    designer.add_column(80)
+    crash(journal)
+    path = journal.segments()[-1][1]
+    with open(path, 'a') as f:
+        f.write('{"seq":4,"op":"add_column","ar')
+    assert [r['seq'] for r in read_segment(path)] == [1, 2, 3]
+    reopened = DesignJournal(str(tmp_path))
+    assert reopened.seq == 3
+    assert widths(reopened.recover()) == [60, 80]
+
+def test_empty_newest_segment(tmp_path):
+    journal, designer = journaled(tmp_path)
+    designer.add_column(60)
+    crash(journal)
+    # A crash right after a new segment was created, before its snapshot
+    open(os.path.join(str(tmp_path), f"{journal.seq + 1:012d}.jsonl"), 'w').close()
+
+    reopened = DesignJournal(str(tmp_path))
+    assert reopened.seq == journal.seq
+    recovered = reopened.recover()
+    assert widths(recovered) == [60]
+    recovered.add_column(80)
+    seqs = [r['seq'] for r in reopened.records()]
+    assert seqs == sorted(set(seqs))
+
+def test_replay_upto_across_segments(tmp_path):
+    journal, designer = journaled(tmp_path, snapshot_every=3)
+    states = {}
+    for width in (40, 60, 80, 80, 60, 40, 60):
+        designer.add_column(width)
+        states[journal.seq] = widths(designer)
+    assert len(journal.segments()) > 2
+    for seq, expected in states.items():
+        replayed, last = journal.replay(upto=seq)
+        assert last == seq
+        assert widths(replayed) == expected
+    latest, last = journal.replay()
+    assert last == journal.seq and widths(latest) == widths(designer)
+
+def test_keep_segments_prunes_the_oldest(tmp_path):
+    journal, designer = journaled(tmp_path, snapshot_every=2, keep_segments=2)
+    states = {}
+    for width in (40, 60, 80, 80, 60, 40, 60):
+        designer.add_column(width)
+        states[journal.seq] = widths(designer)
+    segments = journal.segments()
+    assert len(segments) == 2
+    first = segments[0][0]
+    assert first > 1
+    assert [r['seq'] for r in journal.records()] == list(range(first, journal.seq + 1))
+    assert widths(journal.replay()[0]) == widths(designer)
+    # The oldest retained segment starts with a snapshot; the points in time before it are gone
+    assert widths(journal.replay(upto=first)[0]) == states[max(s for s in states if s <= first)]
+    try:
+        journal.replay(upto=first - 1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("replay before the retained segments should fail")
@@ -0,0 +1,59 @@
+import os
+import pytest
+import render_cabinet
+from render_cabinet import font_cache_info, get_font, set_font_search_path
+
+@pytest.fixture
+def fonts(monkeypatch):
+    """Records font loads; only files that exist load, like TrueType fonts on a real system."""
+    original = list(render_cabinet.FONT_SEARCH_PATH)
+    render_cabinet._load_pil()
+    real_truetype = render_cabinet.ImageFont.truetype
+    loads = []
+    def truetype(path, size=10, *args, **kwargs):
+        if not isinstance(path, str):
+            return real_truetype(path, size, *args, **kwargs) # Pillow's bundled default font
+        loads.append(path)
+        if not os.path.exists(path):
+            raise IOError(f"cannot open resource {path}")
+        return ("font", path, size)
+    monkeypatch.setattr(render_cabinet.ImageFont, 'truetype', truetype)
+    set_font_search_path([])
+    yield loads
+    set_font_search_path(original)
+
+def test_fonts_are_resolved_once_per_size(fonts):
+    before = font_cache_info()
+    a = get_font(20)
+    assert get_font(20) is a
+    get_font(30)
+    info = font_cache_info()
+    assert info['misses'] - before['misses'] == 2
+    assert info['hits'] - before['hits'] == 1
+    assert info['size'] == 2
+    # The missing font was looked up once per size and the fallback kept
+    assert fonts == [render_cabinet.FONT_NAME] * 2
+
+def test_search_path_comes_first(fonts, tmp_path):
+    (tmp_path / "arial.ttf").write_bytes(b"")
+    set_font_search_path([str(tmp_path / "missing"), str(tmp_path)])
+    font = get_font(10, "arial.ttf")
+    assert font == ("font", str(tmp_path / "arial.ttf"), 10)
+    assert fonts == [str(tmp_path / "missing" / "arial.ttf"), str(tmp_path / "arial.ttf")]
+
+def test_changing_the_search_path_clears_the_cache(fonts, tmp_path):
+    get_font(10)
+    assert font_cache_info()['size'] == 1
+    set_font_search_path([str(tmp_path)])
+    assert font_cache_info()['size'] == 0
+
+def test_renders_load_fonts_once(fonts):
+    from simple_designer import CabinetDesigner
+    designer = CabinetDesigner()
+    designer.add_column(60)
+    set_font_search_path([]) # No TrueType fonts: every size falls back to the bundled font
+    render_cabinet.render_cabinet_to_bytes(designer)
+    first = len(fonts)
+    designer.add_column(80)
+    render_cabinet.render_cabinet_to_bytes(designer)
+    assert first == 3 and len(fonts) == first
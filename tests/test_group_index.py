@@ -0,0 +1,45 @@
+import contextlib
+import io
+import pytest
+from cabinet_model import Column, GroupIndex
+from simple_designer import CabinetDesigner
+
+def test_spans_and_offsets():
+    cols = [Column(60, merge_right=True), Column(80), Column(40, merge_right=True), Column(60, merge_right=True), Column(40)]
+    index = GroupIndex(cols)
+    assert [index.span(g) for g in range(len(index))] == [(0, 1), (2, 4)]
+    assert index.group_of == [0, 0, 1, 1, 1]
+    assert [index.column_x(i) for i in range(5)] == [0, 60, 140, 180, 240]
+    assert index.total_width == 280
+    assert index.group_x(1) == 140 and index.group_width(1) == 140
+
+def test_positions():
+    index = GroupIndex([Column(60, merge_right=True), Column(80), Column(40)])
+    assert index.group_at(0) == 0 and index.group_at(139.9) == 0 and index.group_at(140) == 1
+    assert index.group_at(-1) is None and index.group_at(180) is None
+    assert index.column_at(59.9) == 0 and index.column_at(60) == 1 and index.column_at(179) == 2
+
+def test_merge_on_the_last_column_is_ignored():
+    index = GroupIndex([Column(60), Column(80, merge_right=True)])
+    assert [index.span(g) for g in range(len(index))] == [(0, 0), (1, 1)]
+
+@pytest.fixture
+def designer():
+    designer = CabinetDesigner()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for width in (60, 80, 40):
+            designer.add_column(width)
+    return designer
+
+def test_designer_index_is_reused_until_the_columns_change(designer):
+    index = designer.group_index
+    with contextlib.redirect_stdout(io.StringIO()):
+        designer.move_shelf(0, 0, 5)
+        assert designer.group_index is index
+        designer.toggle_merge(0)
+        merged = designer.group_index
+        assert merged is not index and len(merged) == 2
+        designer.swap_columns(0, 2)
+        assert designer.group_index.offsets == [0, 40, 120, 180]
+        designer.remove_column(0)
+        assert designer.group_index.total_width == 140
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import random
+import pytest
+from simple_designer import CabinetDesigner
+from render_cabinet import IncrementalRenderer, RenderOptions, draw_layout, encode_png
+
+def random_edit(designer, rng):
+    n = len(designer.columns)
+    i = rng.randrange(n)
+    col = designer.columns[i]
+    op = rng.random()
+    if op < 0.35 and col.shelf_heights:
+        designer.move_shelf(i, rng.randrange(len(col.shelf_heights)), rng.choice([-5, -1, 1, 5]))
+    elif op < 0.45:
+        designer.configure_drawers(i, rng.randint(0, 3), rng.choice([10.0, 20.0]))
+    elif op < 0.55:
+        designer.toggle_merge(min(i, n - 2))
+    elif op < 0.62:
+        designer.toggle_top(i)
+    elif op < 0.7:
+        designer.subdivide_compartment(i, rng.randint(0, len(col.shelf_heights)))
+    elif op < 0.75:
+        designer.swap_columns(i, rng.randrange(n))
+    elif op < 0.8:
+        designer.set_shelves_count(i, rng.randint(1, 6))
+    elif op < 0.84:
+        designer.add_column(rng.choice([40, 60, 80]))
+    elif op < 0.88 and n > 3:
+        designer.remove_column(i)
+    elif op < 0.9:
+        designer.undo()
+    else:
+        designer.add_shelf_at_height(i, round(rng.uniform(85, designer.total_height - 3), 1))
+
+@pytest.mark.parametrize("palette", [False, True], ids=["rgb", "palette"])
+def test_incremental_render_matches_full_render(palette):
+    rng = random.Random(4)
+    opts = RenderOptions(palette=palette)
+    designer = CabinetDesigner()
+    renderer = IncrementalRenderer(opts)
+    partial = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(10):
+            designer.add_column(rng.choice([40, 60, 80]))
+        renderer.render(designer)
+        for step in range(50):
+            random_edit(designer, rng)
+            if step % 10 == 0:
+                # Encoding is the slow part: compare the PNG bytes now and then, the pixels every step
+                png = renderer.render_png(designer)
+                full = draw_layout(designer.layout(), opts)
+                assert png == encode_png(full)
+            else:
+                renderer.render(designer)
+                full = draw_layout(designer.layout(), opts)
+            assert renderer.image.mode == full.mode
+            assert renderer.image.tobytes() == full.tobytes(), f"step {step}, span {renderer.last_span}"
+            if renderer.last_span:
+                partial += 1
+    # Most single edits repaint only a strip
+    assert partial > 15
+
+def test_unchanged_design_repaints_nothing():
+    designer = CabinetDesigner()
+    with contextlib.redirect_stdout(io.StringIO()):
+        designer.add_column(60)
+        designer.add_column(80)
+    renderer = IncrementalRenderer()
+    first = renderer.render(designer).tobytes()
+    assert renderer.last_span is None
+    assert renderer.render(designer).tobytes() == first
+    assert renderer.last_span == (0, 0)
@@ -0,0 +1,65 @@
+import random
+from nesting import nest, nest_designs
+from cut_list import design_panels
+from bench_render import synthetic_design
+
+def random_panels(n, seed):
+    rng = random.Random(seed)
+    return [(round(rng.uniform(20, 200), 1), round(rng.uniform(10, 120), 1)) for _ in range(n)]
+
+def size(panel):
+    return panel if isinstance(panel, tuple) else (panel.length, panel.width)
+
+def check_plan(result, panels, grain):
+    """Every panel placed once or reported unplaced, inside its sheet, a kerf away from the others."""
+    kerf = result.kerf
+    seen = []
+    for sheet in result.sheets:
+        for p in sheet.placements:
+            assert p.x >= 0 and p.y >= 0
+            assert p.x + p.length <= sheet.length + 1e-9 and p.y + p.width <= sheet.width + 1e-9
+            l, w = size(p.panel)
+            assert (p.length, p.width) == ((w, l) if p.rotated else (l, w))
+            assert not (grain and p.rotated)
+            seen.append(id(p.panel))
+        placements = sorted(sheet.placements, key=lambda p: p.x)
+        for i, a in enumerate(placements):
+            for b in placements[i + 1:]:
+                if b.x >= a.x + a.length + kerf - 1e-9:
+                    break
+                assert b.y >= a.y + a.width + kerf - 1e-9 or a.y >= b.y + b.width + kerf - 1e-9, (a, b)
+    assert sorted(seen + [id(p) for p in result.unplaced]) == sorted(id(p) for p in panels)
+
+def test_plans_are_valid():
+    rng = random.Random(2)
+    designs = [synthetic_design(rng.randint(3, 10)) for _ in range(20)]
+    panels = [p for d in designs for p in design_panels(d)]
+    for grain in (True, False):
+        check_plan(nest(panels, grain=grain), panels, grain)
+    result = nest_designs(designs)
+    assert sum(len(s.placements) for s in result.sheets) + len(result.unplaced) == len(panels)
+
+def test_improvement_phase_is_valid_and_no_worse():
+    panels = [(l, w) for l, w in random_panels(300, 4)]
+    greedy = nest(panels)
+    improved = nest(panels, time_budget=0.3, workers=1)
+    check_plan(improved, panels, True)
+    assert improved.sheet_count <= greedy.sheet_count
+
+def test_oversized_panels_are_unplaced():
+    panels = [(300, 10), (10, 250), (100, 50)]
+    result = nest(panels)
+    assert result.unplaced == [(300, 10), (10, 250)]
+    # Turned, the second one fits
+    result = nest(panels, grain=False)
+    assert result.unplaced == [(300, 10)]
+    check_plan(result, panels, False)
+
+def test_no_panels():
+    result = nest([])
+    assert result.sheet_count == 0 and result.waste == 0.0
+
+def test_turning_never_needs_more_sheets():
+    for seed in range(3):
+        panels = random_panels(1000, seed)
+        assert nest(panels, grain=False).sheet_count <= nest(panels, grain=True).sheet_count
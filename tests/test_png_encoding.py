@@ -0,0 +1,56 @@
+import io
+import pytest
+from PIL import Image
+from render_cabinet import (PALETTE, IncrementalRenderer, RenderOptions, draw_layout, encode_png,
+                            render_cabinet_to_bytes, render_image, save_render)
+from simple_designer import CabinetDesigner
+
+@pytest.fixture
+def designer(capsys):
+    designer = CabinetDesigner()
+    for width in (60, 80, 40, 60):
+        designer.add_column(width)
+    designer.toggle_drawers(0)
+    designer.toggle_merge(1)
+    capsys.readouterr()
+    return designer
+
+def decode(png):
+    return Image.open(io.BytesIO(png))
+
+def test_palette_render_uses_the_fixed_palette(designer):
+    im = render_image(designer, palette=True)
+    assert im.mode == 'P'
+    used = {color for _, color in im.convert('RGB').getcolors(1 << 16)}
+    assert used <= set(PALETTE)
+
+def test_palette_matches_rgb_without_text(designer):
+    layout = designer.layout()
+    rgb = draw_layout(layout, RenderOptions(details=False))
+    pal = draw_layout(layout, RenderOptions(details=False, palette=True))
+    assert pal.convert('RGB').tobytes() == rgb.tobytes()
+
+def test_palette_png_is_4_bit_and_smaller(designer):
+    pal = render_cabinet_to_bytes(designer, palette=True)
+    rgb = render_cabinet_to_bytes(designer)
+    assert pal[24] == 4 # IHDR bit depth
+    assert len(pal) < len(rgb) / 2
+    assert decode(pal).size == decode(rgb).size
+
+def test_compress_level_changes_size_not_pixels(designer):
+    im = render_image(designer, palette=True)
+    fast, small = encode_png(im, 0), encode_png(im, 9)
+    assert len(small) < len(fast)
+    assert decode(fast).convert('RGB').tobytes() == decode(small).convert('RGB').tobytes()
+
+def test_save_render_reports_the_size(designer, tmp_path, capsys):
+    path = str(tmp_path / "out.png")
+    save_render(designer, path, palette=True, compress_level=9)
+    assert decode(open(path, 'rb').read()).mode == 'P'
+    assert "KB)" in capsys.readouterr().out
+
+def test_incremental_renderer_records_the_png_size(designer):
+    renderer = IncrementalRenderer(RenderOptions(palette=True))
+    png = renderer.render_png(designer)
+    assert renderer.last_png_size == len(png)
+    assert renderer.image.mode == 'P'
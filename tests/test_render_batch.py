@@ -0,0 +1,56 @@
+import glob
+import os
+import shutil
+import pytest
+from render_cabinet import render_batch
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.json")))
+
+@pytest.fixture
+def designs(tmp_path):
+    src = tmp_path / "designs"
+    src.mkdir()
+    for path in TEMPLATES[:3]:
+        shutil.copy(path, str(src))
+    return src
+
+def outputs(directory):
+    return sorted(name for name in os.listdir(str(directory)) if name.endswith(".png"))
+
+def summary(capsys):
+    return capsys.readouterr().out.strip().splitlines()[-1]
+
+def test_renders_every_design_once(designs, tmp_path, capsys):
+    out = tmp_path / "out"
+    assert render_batch(str(designs), str(out), workers=2) == 0
+    assert outputs(out) == sorted(os.path.basename(p)[:-5] + ".png" for p in TEMPLATES[:3])
+    assert summary(capsys).startswith("Rendered 3, skipped 0, failed 0")
+    # Up to date: nothing to do
+    assert render_batch(str(designs), str(out), workers=2) == 0
+    assert summary(capsys).startswith("Rendered 0, skipped 3, failed 0")
+    # force renders again
+    render_batch(str(designs), str(out), workers=1, force=True)
+    assert summary(capsys).startswith("Rendered 3, skipped 0")
+
+def test_only_changed_content_is_rendered_again(designs, tmp_path, capsys):
+    out = tmp_path / "out"
+    render_batch(str(designs), str(out), workers=1)
+    capsys.readouterr()
+    first = sorted(glob.glob(str(designs / "*.json")))[0]
+    second = sorted(glob.glob(str(designs / "*.json")))[1]
+    # A newer file with the same content is still up to date (content hash in the manifest)
+    os.utime(first, None)
+    os.utime(first, (os.path.getmtime(first) + 100, os.path.getmtime(first) + 100))
+    with open(second, 'a') as f:
+        f.write("\n")
+    render_batch(str(designs), str(out), workers=1)
+    assert summary(capsys).startswith("Rendered 1, skipped 2")
+
+def test_glob_pattern_and_failures(designs, tmp_path, capsys):
+    with open(str(designs / "broken.json"), 'w') as f:
+        f.write("{")
+    out = tmp_path / "out"
+    assert render_batch(str(designs / "b*.json"), str(out), workers=1) == 1
+    assert "FAILED" in capsys.readouterr().out
+    assert render_batch(str(tmp_path / "none" / "*.json"), str(out), workers=1) == 0
+    assert "No design files match" in capsys.readouterr().out
@@ -0,0 +1,54 @@
+import builtins
+import io
+import os
+import subprocess
+import sys
+import pytest
+from PIL import Image
+import simple_designer
+from simple_designer import CabinetDesigner
+from render_cabinet import render_cabinet_to_bytes, save_render
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def designer(capsys):
+    designer = CabinetDesigner()
+    designer.add_column(60)
+    designer.add_column(80)
+    designer.toggle_drawers(0)
+    capsys.readouterr()
+    return designer
+
+def pixels(data):
+    return Image.open(io.BytesIO(data)).convert('RGB').tobytes()
+
+def test_importing_the_renderer_does_not_load_pillow():
+    code = "import sys, render_cabinet, simple_designer; print('PIL' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "False"
+
+def test_save_render_writes_the_live_design(designer, tmp_path):
+    path = str(tmp_path / "out.png")
+    save_render(designer, path)
+    with open(path, 'rb') as f:
+        assert pixels(f.read()) == pixels(render_cabinet_to_bytes(designer))
+
+def test_cli_render_runs_in_process(designer, tmp_path, monkeypatch, capsys):
+    out = str(tmp_path / "cli.png")
+    commands = iter([f"render {out}", "exit"])
+    monkeypatch.setattr(builtins, 'input', lambda prompt="": next(commands))
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("render should not start a process")
+    monkeypatch.setattr(subprocess, 'run', no_subprocess)
+    monkeypatch.setattr(subprocess, 'Popen', no_subprocess)
+    monkeypatch.chdir(tmp_path)
+    simple_designer.interactive_mode()
+    assert f"Render saved to {out}" in capsys.readouterr().out
+    assert os.listdir(str(tmp_path)) == ["cli.png"]
+    # The CLI starts from a 60 and an 80 column, like the fixture before its drawer
+    expected = CabinetDesigner()
+    expected.add_column(60)
+    expected.add_column(80)
+    with open(out, 'rb') as f:
+        assert pixels(f.read()) == pixels(render_cabinet_to_bytes(expected))
@@ -0,0 +1,46 @@
+import pytest
+
+def test_lru_eviction_by_size(web):
+    cache = web.RenderCache(10)
+    cache.put('a', b"1234")
+    cache.put('b', b"1234")
+    assert cache.get('a') == b"1234" # Now the most recently used
+    cache.put('c', b"1234")
+    assert cache.get('b') is None
+    assert cache.get('a') == b"1234" and cache.get('c') == b"1234"
+    assert cache.size == 8
+
+def test_replacing_an_entry_keeps_the_size(web):
+    cache = web.RenderCache(10)
+    cache.put('a', b"12345678")
+    cache.put('a', b"12")
+    assert cache.size == 2 and cache.get('a') == b"12"
+
+def test_entries_larger_than_the_budget_are_not_cached(web):
+    cache = web.RenderCache(4)
+    cache.put('a', b"123")
+    cache.put('big', b"12345")
+    assert cache.get('big') is None and cache.get('a') == b"123"
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+def test_image_is_served_by_design_state(client):
+    first = client.get('/image')
+    assert first.status_code == 200 and first.mimetype == 'image/png'
+    assert first.data.startswith(b"\x89PNG")
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    # The browser's copy is still current
+    assert client.get('/image', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/add_column', data={'width': '40'})
+    changed = client.get('/image', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+    # Back to the same design: same key, same bytes
+    client.post('/api/remove_column', data={'index': '2'})
+    again = client.get('/image')
+    assert again.headers['ETag'] == etag and again.data == first.data
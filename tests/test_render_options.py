@@ -0,0 +1,65 @@
+import io
+import json
+import os
+import pytest
+from PIL import Image
+import render_cabinet
+from render_cabinet import MARGIN, SCALE, render_image, render_thumbnail, render_thumbnail_to_bytes
+from simple_designer import CabinetDesigner
+
+@pytest.fixture
+def designer(capsys):
+    designer = CabinetDesigner()
+    for width in (60, 80, 40):
+        designer.add_column(width)
+    designer.toggle_drawers(1)
+    capsys.readouterr()
+    return designer
+
+def test_scale_and_margin_per_call(designer):
+    assert render_image(designer).size == (int(180 * SCALE + 2 * MARGIN), int(240 * SCALE + 2 * MARGIN))
+    assert render_image(designer, scale=2.5, margin=10).size == (470, 620)
+
+def test_thumbnail_fits_the_box(designer):
+    assert render_thumbnail(designer, 200).size[0] <= 200
+    small = render_thumbnail(designer, 200, 100)
+    assert small.size[0] <= 200 and small.size[1] <= 100
+    png = render_thumbnail_to_bytes(designer, 120)
+    assert Image.open(io.BytesIO(png)).size[0] <= 120
+
+def test_thumbnail_loads_no_fonts(designer, monkeypatch):
+    def no_fonts():
+        raise AssertionError("thumbnails have no text")
+    monkeypatch.setattr(render_cabinet, '_load_fonts', no_fonts)
+    render_thumbnail(designer, 200)
+
+def test_thumbnail_leaves_out_details(designer):
+    full = render_image(designer, scale=1, margin=4).convert('RGB')
+    thumb = render_thumbnail(designer, full.size[0]).convert('RGB')
+    # Same geometry, fewer colors: no text, knobs or handles
+    assert thumb.size[0] == full.size[0]
+    assert len(thumb.getcolors(1 << 16)) < len(full.getcolors(1 << 16))
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+def save(web, name, data):
+    with open(os.path.join(web.SAVES_DIR, name), 'w') as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+def test_thumbnail_route(web, client, designer):
+    save(web, "thumb_route.json", designer.to_dict())
+    response = client.get('/thumbnail/thumb_route.json')
+    assert response.status_code == 200 and response.mimetype == 'image/png'
+    assert Image.open(io.BytesIO(response.data)).size[0] <= 200
+    etag = response.headers['ETag']
+    assert client.get('/thumbnail/thumb_route.json', headers={'If-None-Match': etag}).status_code == 304
+    wide = client.get('/thumbnail/thumb_route.json?w=400')
+    assert 200 < Image.open(io.BytesIO(wide.data)).size[0] <= 400
+
+def test_thumbnail_route_errors(web, client):
+    save(web, "thumb_broken.json", "{")
+    assert client.get('/thumbnail/missing.json').status_code == 404
+    assert client.get('/thumbnail/thumb_broken.json?w=big').status_code == 400
+    assert client.get('/thumbnail/thumb_broken.json').status_code == 422
@@ -0,0 +1,69 @@
+import re
+import pytest
+from render_cabinet import (RenderProfile, add_render_hook, profile_render, remove_render_hook,
+                            render_cabinet_to_bytes, render_thumbnail)
+from simple_designer import CabinetDesigner
+
+@pytest.fixture
+def designer(capsys):
+    designer = CabinetDesigner()
+    designer.add_column(60)
+    designer.add_column(80)
+    capsys.readouterr()
+    return designer
+
+def test_profile_render_records_phases_and_counts(designer):
+    with profile_render("preview") as prof:
+        render_cabinet_to_bytes(designer)
+    assert prof.name == "preview"
+    assert {'layout', 'fonts', 'draw', 'encode'} <= set(prof.phases)
+    assert prof.counts['primitives'] > 0
+    assert prof.total >= sum(prof.phases.values()) * 0.99
+    assert "preview" in repr(prof)
+
+def test_thumbnails_have_no_font_phase(designer):
+    with profile_render() as prof:
+        render_thumbnail(designer, 100)
+    assert prof.name == "profile_render"
+    assert 'fonts' not in prof.phases and 'draw' in prof.phases
+
+def test_hooks_see_each_outermost_render(designer):
+    seen = []
+    add_render_hook(seen.append)
+    try:
+        render_cabinet_to_bytes(designer)
+        render_thumbnail(designer)
+    finally:
+        remove_render_hook(seen.append)
+    render_cabinet_to_bytes(designer)
+    assert [p.name for p in seen] == ['render_cabinet_to_bytes', 'render_thumbnail']
+    assert all(isinstance(p, RenderProfile) and p.total > 0 for p in seen)
+
+def test_metrics_aggregates_histograms(web):
+    metrics = web.RenderMetrics()
+    prof = RenderProfile("render_png")
+    prof.phases = {'draw': 0.004}
+    prof.total = 0.03
+    prof.counts = {'primitives': 12}
+    metrics.observe(prof)
+    metrics.observe(prof)
+    text = metrics.prometheus()
+    assert 'cabinet_render_seconds_bucket{render="render_png",phase="draw",le="0.005"} 2' in text
+    assert 'cabinet_render_seconds_bucket{render="render_png",phase="draw",le="0.0025"} 0' in text
+    assert 'cabinet_render_seconds_count{render="render_png",phase="total"} 2' in text
+    assert 'cabinet_render_seconds_bucket{render="render_png",phase="total",le="0.025"} 0' in text
+    assert 'cabinet_render_events_total{render="render_png",event="primitives"} 24' in text
+
+def test_metrics_endpoint(web):
+    client = web.app.test_client()
+    client.get('/image')
+    with profile_render():
+        pass
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert re.search(r'cabinet_render_seconds_count\{render="[^"]+",phase="total"\} [1-9]', text)
+    assert 'render="profile_render",phase="total"' in text
+    assert re.search(r'^cabinet_sessions [1-9]', text, re.M)
+    assert re.search(r'^cabinet_render_cache_misses_total [1-9]', text, re.M)
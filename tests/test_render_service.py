@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+class BlockingRender:
+    """A render func that waits for release() and counts its calls."""
+    def __init__(self, result=b"png", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.gate = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def release(self):
+        self.gate.set()
+
+def run_concurrently(service, key, func, n):
+    results = [None] * n
+    def call(i):
+        try:
+            results[i] = service.render(key, func)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+@pytest.fixture
+def service(web):
+    svc = web.RenderService(web.RenderCache(1 << 20), workers=2, max_queue=1)
+    yield svc
+    svc._pool.shutdown(wait=True)
+
+def test_concurrent_requests_share_one_render(service):
+    func = BlockingRender()
+    threads, results = run_concurrently(service, 'k', func, 8)
+    wait_for(lambda: service.coalesced == 7)
+    func.release()
+    for t in threads:
+        t.join()
+    assert func.calls == 1
+    assert results == [b"png"] * 8
+    assert service.pending == 0
+
+def test_finished_key_is_served_from_the_cache(service):
+    first = BlockingRender(b"first")
+    first.release()
+    assert service.render('k', first) == b"first"
+    second = BlockingRender(b"second")
+    assert service.render('k', second) == b"first"
+    assert second.calls == 0
+
+def test_full_queue_sheds_requests(service):
+    funcs = [BlockingRender() for _ in range(service.max_pending)]
+    threads = []
+    for i, func in enumerate(funcs):
+        threads += run_concurrently(service, f'k{i}', func, 1)[0]
+    wait_for(lambda: service.pending == service.max_pending)
+    extra = BlockingRender()
+    assert service.render('extra', extra) is None
+    assert extra.calls == 0 and service.rejected == 1
+    for func in funcs:
+        func.release()
+    for t in threads:
+        t.join()
+    assert service.pending == 0
+
+def test_errors_reach_every_waiter(service):
+    func = BlockingRender(error=RuntimeError("boom"))
+    threads, results = run_concurrently(service, 'k', func, 5)
+    wait_for(lambda: service.coalesced == 4)
+    func.release()
+    for t in threads:
+        t.join()
+    assert func.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert service._inflight == {}
+    # Not cached: the next request renders again
+    retry = BlockingRender(b"ok")
+    retry.release()
+    assert service.render('k', retry) == b"ok"
+
+def test_image_answers_503_when_shedding(web, monkeypatch):
+    shedding = web.RenderService(web.RenderCache(1 << 20), workers=1, max_queue=0)
+    shedding.max_pending = 0
+    monkeypatch.setattr(web, 'render_service', shedding)
+    response = web.app.test_client().get('/image')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_image_reports_render_errors(web, monkeypatch, caplog):
+    failing = web.RenderService(web.RenderCache(1 << 20), workers=1, max_queue=1)
+    def fail(key, func):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(failing, 'render', fail)
+    monkeypatch.setattr(web, 'render_service', failing)
+    client = web.app.test_client()
+    response = client.get('/image')
+    assert response.status_code == 500
+    response = client.get('/image', headers={'Accept': 'application/json'})
+    assert response.status_code == 500 and response.get_json() == {'error': "Render failed"}
+    failures = [r for r in caplog.records if r.getMessage().startswith("Render of")]
+    assert len(failures) == 2 and failures[0].exc_info[0] is RuntimeError
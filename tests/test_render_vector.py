@@ -0,0 +1,50 @@
+import glob
+import os
+import re
+import xml.etree.ElementTree as ET
+import pytest
+from render_cabinet import RECT_STYLES, load_config
+from cabinet_layout import compute_layout
+from render_vector import render_pdf, render_svg, save_vector
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.json")))
+SVG = "{http://www.w3.org/2000/svg}"
+
+@pytest.fixture(params=TEMPLATES, ids=os.path.basename)
+def config(request):
+    return load_config(request.param)
+
+def test_svg_has_an_element_per_primitive(config):
+    layout = compute_layout(config)
+    root = ET.fromstring(render_svg(layout))
+    rects = root.findall(f"{SVG}rect")[1:] # The first is the background
+    assert len(rects) == sum(p.kind in RECT_STYLES for p in layout.primitives)
+    texts = [t.text for t in root.findall(f"{SVG}text")]
+    assert texts == [p.text for p in layout.primitives if p.kind in ('width_label', 'height_label', 'title')]
+
+def test_svg_styles():
+    style = ET.fromstring(render_svg(load_config(TEMPLATES[0]))).find(f"{SVG}style").text
+    assert "text{font-family:Arial,Helvetica,sans-serif}" in style
+    assert ".width_label{font-size:20px;text-anchor:middle}" in style
+    assert ".title{font-size:30px}" in style
+    assert "{{" not in style
+    for kind in RECT_STYLES:
+        assert f".{kind}{{fill:#" in style
+
+def test_pdf_cross_reference_offsets(config):
+    pdf = render_pdf(config)
+    assert pdf.startswith(b"%PDF-") and pdf.endswith(b"%%EOF\n")
+    xref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[xref:].startswith(b"xref")
+    offsets = [int(m) for m in re.findall(rb"(\d{10}) 00000 n", pdf)]
+    for num, offset in enumerate(offsets, 1):
+        assert pdf[offset:].startswith(f"{num} 0 obj".encode())
+
+def test_save_vector(tmp_path):
+    config = load_config(TEMPLATES[0])
+    for fmt in ('.svg', '.pdf'):
+        path = str(tmp_path / ("out" + fmt))
+        save_vector(config, path, fmt)
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert data.startswith(b"<svg" if fmt == '.svg' else b"%PDF")
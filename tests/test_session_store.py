@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import pytest
+
+@pytest.fixture
+def store_factory(web, tmp_path):
+    def make(ttl=60, spill=False, journal=False):
+        return web.SessionStore(ttl, str(tmp_path / "spill") if spill else None,
+                                str(tmp_path / "journal") if journal else None)
+    return make
+
+def expire_all(store):
+    """Makes the next get() sweep and find every session idle for longer than ttl."""
+    for entry in store._sessions.values():
+        entry.last_access -= store.ttl + 1
+    store._last_sweep -= store.SWEEP_INTERVAL + 1
+
+def test_idle_sessions_are_evicted(store_factory):
+    store = store_factory(ttl=10)
+    old = store.get('a')
+    old.designer.add_column(40)
+    expire_all(store)
+    fresh = store.get('b')
+    assert 'a' not in store._sessions and len(store) == 1
+    # Without spill or journal an evicted session starts over
+    assert store.get('a') is not old
+    assert len(store.get('a').designer.columns) == 2
+    assert fresh is store.get('b')
+
+def test_evicted_session_is_reloaded_from_its_spill_file(store_factory):
+    store = store_factory(ttl=10, spill=True)
+    entry = store.get('a')
+    entry.designer.add_column(40)
+    store.save('a', entry)
+    expire_all(store)
+    store.get('b')
+    assert 'a' not in store._sessions
+    reloaded = store.get('a')
+    assert reloaded is not entry
+    assert [c.width for c in reloaded.designer.columns] == [60, 80, 40]
+
+def test_newer_spill_file_from_another_worker_replaces_the_session(store_factory):
+    store = store_factory(spill=True)
+    entry = store.get('a')
+    store.save('a', entry)
+    path = store._spill_path('a')
+    data = entry.designer.to_dict()
+    data['columns'] = data['columns'][:1]
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    os.utime(path, ns=(entry.spill_mtime + 10**9, entry.spill_mtime + 10**9))
+    assert store.get('a') is entry
+    assert [c.width for c in entry.designer.columns] == [60]
+    # An unchanged file is not read again
+    designer = entry.designer
+    assert store.get('a').designer is designer
+
+def test_evicted_journal_is_detached_outside_the_store_lock(store_factory):
+    store = store_factory(ttl=10, journal=True)
+    entry = store.get('a')
+    entry.designer.add_column(40)
+    expire_all(store)
+    entry.lock.acquire()
+    done = threading.Event()
+    def sweep():
+        store.get('b')
+        done.set()
+    thread = threading.Thread(target=sweep)
+    thread.start()
+    try:
+        # The sweeping request waits for the session's lock, the store stays usable
+        assert not done.wait(0.1)
+        assert store._lock.acquire(timeout=1)
+        store._lock.release()
+    finally:
+        entry.lock.release()
+    thread.join(5)
+    assert done.is_set()
+    assert entry.designer.journal is None
+    recovered = store.get('a')
+    assert [c.width for c in recovered.designer.columns] == [60, 80, 40]
+
+def test_unrecoverable_journal_starts_a_new_design(store_factory, tmp_path, caplog):
+    store = store_factory(journal=True)
+    directory = tmp_path / "journal" / "a"
+    directory.mkdir()
+    with open(str(directory / "000000000001.jsonl"), 'w') as f:
+        f.write('{"seq":1,"op":"format_disk","args":[]}\n')
+    entry = store.get('a')
+    assert [c.width for c in entry.designer.columns] == [60, 80]
+    assert "Could not recover session a" in caplog.text
@@ -0,0 +1,88 @@
+import io
+import random
+import contextlib
+import pytest
+from cabinet_layout import THICKNESS, layout_of
+from shelf_planner import plan_shelves, parse_item, _item_types, _Planner, CLEARANCE
+from simple_designer import CabinetDesigner
+
+def designer(widths, merges=()):
+    d = CabinetDesigner()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for w in widths:
+            d.add_column(w)
+        for i in merges:
+            d.toggle_merge(i)
+    return d
+
+def check_plan(design, items, plan):
+    """Clearances, shelf runs and item counts of a plan, and shelves at least 2cm apart."""
+    groups = {g.start: g for g in layout_of(design).groups}
+    for c in plan.compartments:
+        assert c.clear >= max(h for h, _, _ in c.items) + CLEARANCE - 1e-9
+        assert sum(w * n for _, w, n in c.items) <= groups[c.column].width - 2 * THICKNESS + 1e-6
+    counts = {}
+    for h, w, n in [i for c in plan.compartments for i in c.items] + plan.unplaced:
+        counts[(h, w)] = counts.get((h, w), 0) + n
+    assert counts == {(h, w): n for h, w, n in _item_types(items)}
+    for column, shelves in plan.shelves.items():
+        bounds = [design.bottom_height] + shelves + [design.total_height]
+        assert all(b - a >= 2 for a, b in zip(bounds, bounds[1:]))
+        for c in plan.compartments:
+            if c.column == column:
+                above = min(b for b in bounds if b > c.bottom + 1e-9)
+                assert above - THICKNESS - c.bottom >= c.clear - 1e-9
+
+def least_height(run, height, types):
+    """Least height any sequence of compartments needs for all items, or None: exhaustive."""
+    planner = _Planner(types, CLEARANCE)
+    total = planner.bounds[-1]
+
+    def search(k, used):
+        if used > height + 1e-9:
+            return None
+        if k == total:
+            return used
+        results = [search(e, used + planner.step[planner.type_at(k)]) for e in planner.ends(k, run)]
+        results = [r for r in results if r is not None]
+        return min(results) if results else None
+    return search(0, 0.0)
+
+def test_single_column_is_optimal():
+    rng = random.Random(3)
+    d = designer([80])
+    for _ in range(150):
+        items = [(rng.choice([10, 15, 18, 21, 24, 30]), rng.randint(1, 40), rng.choice([3, 5, 8]))
+                 for _ in range(rng.randint(1, 4))]
+        plan = plan_shelves(d, items)
+        check_plan(d, items, plan)
+        best = least_height(80 - 2 * THICKNESS, d.total_height - d.bottom_height, _item_types(items))
+        if best is None:
+            assert plan.unplaced
+        else:
+            assert not plan.unplaced
+            assert sum(c.clear + THICKNESS for c in plan.compartments) == pytest.approx(best)
+
+def test_wall_plans_are_valid():
+    rng = random.Random(1)
+    d = designer([80, 60, 40, 80, 80, 60], merges=[3])
+    for _ in range(30):
+        items = [(rng.choice([15, 18, 24, 28, 32, 40]) + rng.random() * 3, rng.randint(1, 120), rng.choice([2, 3, 5, 8]))
+                 for _ in range(rng.randint(1, 8))]
+        check_plan(d, items, plan_shelves(d, items))
+
+def test_oversized_items_do_not_block_the_rest():
+    d = designer([60, 80])
+    items = [(300, 1), (20, 2, 100), (32, 40), (24, 60)]
+    plan = plan_shelves(d, items)
+    assert sorted(plan.unplaced) == [(20.0, 100.0, 2), (300.0, 3.0, 1)]
+    check_plan(d, items, plan)
+
+def test_fit_shelves_is_one_undo_step():
+    d = designer([60, 80])
+    before = d.to_dict()
+    with contextlib.redirect_stdout(io.StringIO()):
+        d.fit_shelves([parse_item("32x40"), parse_item("24x60x3")])
+        assert d.to_dict() != before
+        d.undo()
+    assert d.to_dict() == before
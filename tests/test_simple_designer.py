@@ -0,0 +1,78 @@
+import contextlib
+import io
+import json
+import pytest
+from simple_designer import CabinetDesigner
+from cabinet_layout import compute_layout
+
+@pytest.fixture
+def designer():
+    designer = CabinetDesigner()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for width in (60, 80, 40):
+            designer.add_column(width)
+    return designer
+
+def fresh_layout(designer):
+    return compute_layout(json.loads(json.dumps(designer.to_dict())))
+
+def same_geometry(a, b):
+    return [(p.kind, p.x, p.y, p.w, p.h, p.text) for p in a.primitives] == \
+           [(p.kind, p.x, p.y, p.w, p.h, p.text) for p in b.primitives]
+
+def test_layout_is_cached_without_hashing_the_state(designer, monkeypatch):
+    layout = designer.layout()
+    def no_hash():
+        raise AssertionError("layout() should not serialize the design")
+    monkeypatch.setattr(designer, 'state_hash', no_hash)
+    assert designer.layout() is layout
+
+EDITS = [
+    lambda d: d.move_shelf(0, 0, 5),
+    lambda d: d.toggle_top(1),
+    lambda d: d.toggle_merge(0),
+    lambda d: d.configure_drawers(2, 2, 20.0),
+    lambda d: d.add_shelf_at_height(1, 200.0),
+    lambda d: d.remove_shelf_by_index(1, 0),
+    lambda d: d.subdivide_compartment(0, 1),
+    lambda d: d.swap_columns(0, 2),
+    lambda d: d.remove_column(1),
+    lambda d: d.add_column(80),
+    lambda d: d.set_plinth_height(12),
+    lambda d: d.set_height(220),
+    lambda d: d.set_shelves_count(0, 5),
+    lambda d: d.undo(),
+    lambda d: (d.undo(), d.layout(), d.redo()),
+    lambda d: d.load_dict({'columns': [{'width': 40}]}),
+]
+
+@pytest.mark.parametrize("edit", EDITS, ids=range(len(EDITS)))
+def test_every_edit_refreshes_the_layout(designer, edit):
+    designer.move_shelf(2, 1, -5) # Something to undo
+    before = designer.layout()
+    with contextlib.redirect_stdout(io.StringIO()):
+        edit(designer)
+    after = designer.layout()
+    assert after is not before
+    assert same_geometry(after, fresh_layout(designer))
+
+def test_refused_edit_keeps_the_layout(designer):
+    layout = designer.layout()
+    with contextlib.redirect_stdout(io.StringIO()):
+        designer.add_column(55)
+        designer.move_shelf(9, 0, 5)
+    assert designer.layout() is layout
+
+def test_columns_assigned_outside_the_designer(designer):
+    designer.layout()
+    designer.columns = designer.columns + [designer.columns[0].copy()]
+    assert same_geometry(designer.layout(), fresh_layout(designer))
+
+def test_state_hash_follows_the_design(designer):
+    h = designer.state_hash()
+    assert designer.state_hash() == h
+    with contextlib.redirect_stdout(io.StringIO()):
+        designer.toggle_top(0)
+        assert designer.state_hash() != h
+        designer.undo()
+    assert designer.state_hash() == h
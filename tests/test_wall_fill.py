@@ -0,0 +1,78 @@
+import pytest
+from wall_fill import (iter_fills, ranked_fills, best_fills, count_fills, WallFill,
+                       MODULE_COST, CHANGE_COST, GAP_COST, DRAWER_COST)
+
+CASES = [
+    dict(),
+    dict(max_gap=20),
+    dict(min_drawers=2),
+    dict(min_drawers=1, max_drawers=2),
+    dict(max_80=1),
+    dict(symmetric=True),
+    dict(symmetric=True, min_drawers=3, max_80=2, max_gap=30),
+    dict(symmetric=True, min_drawers=1, max_drawers=1),
+]
+
+def brute_force(width, max_gap=0, min_drawers=0, max_drawers=None, max_80=None, symmetric=False):
+    """(modules, cost) of every valid fill, by listing every sequence."""
+    with_drawers = min_drawers > 0 or max_drawers is not None
+    types = [(w, d) for w in (40, 60, 80) for d in ((False, True) if with_drawers else (False,))]
+    sequences = []
+
+    def extend(seq, used):
+        if width - used <= max_gap:
+            sequences.append(tuple(seq))
+        for t in types:
+            if used + t[0] <= width:
+                extend(seq + [t], used + t[0])
+    extend([], 0)
+
+    fills = []
+    for seq in sequences:
+        drawers = sum(d for _, d in seq)
+        if drawers < min_drawers or (max_drawers is not None and drawers > max_drawers):
+            continue
+        if max_80 is not None and sum(w == 80 for w, _ in seq) > max_80:
+            continue
+        if symmetric and seq != seq[::-1]:
+            continue
+        changes = sum(a[0] != b[0] for a, b in zip(seq, seq[1:]))
+        gap = width - sum(w for w, _ in seq)
+        cost = len(seq) * MODULE_COST + drawers * DRAWER_COST + changes * CHANGE_COST + gap * GAP_COST
+        fills.append((seq, round(cost, 9)))
+    return fills
+
+@pytest.mark.parametrize("width", [0, 40, 100, 240, 300, 380])
+@pytest.mark.parametrize("constraints", CASES)
+def test_matches_brute_force(width, constraints):
+    expected = brute_force(width, **constraints)
+    listed = [(f.modules, round(f.cost, 9)) for f in iter_fills(width, **constraints)]
+    assert sorted(listed) == sorted(expected)
+    assert count_fills(width, **constraints) == len(expected)
+    ranked = [round(f.cost, 9) for f in ranked_fills(width, **constraints)]
+    assert ranked == sorted(cost for _, cost in expected)
+
+def test_best_fills_are_the_cheapest():
+    fills = best_fills(360, 5, min_drawers=2)
+    assert len(fills) == 5
+    cheapest = sorted(cost for _, cost in brute_force(360, min_drawers=2))[:5]
+    assert [round(f.cost, 9) for f in fills] == cheapest
+    assert all(sum(f.widths) == 360 and f.drawer_units >= 2 for f in fills)
+
+def test_no_fill():
+    assert best_fills(50) == []
+    assert count_fills(50) == 0
+
+def test_to_designer_keeps_modules():
+    fill = best_fills(360, 1, min_drawers=2)[0]
+    columns = fill.to_dict()['columns']
+    assert [c['width'] for c in columns] == fill.widths
+    assert [len(c['drawers']) > 0 for c in columns] == [d for _, d in fill.modules]
+    # A fresh design, not a list of undoable edits
+    assert not fill.to_designer().history.can_undo
+
+def test_to_designer_custom_widths():
+    fill = WallFill(((50, False), (100, True)), 0, 0.0)
+    assert [c['width'] for c in fill.to_dict()['columns']] == [50, 100]
+    with pytest.raises(ValueError):
+        fill.to_designer(drawers=5, drawer_height=20.0)
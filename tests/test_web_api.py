@@ -0,0 +1,61 @@
+import pytest
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+def test_state(client):
+    body = client.get('/api/state').get_json()
+    assert [c['width'] for c in body['design']['columns']] == [60, 80]
+    assert body['image_url'].endswith(f"v={body['state']}")
+
+def test_json_mutation_returns_only_the_changes(client):
+    before = client.get('/api/state').get_json()
+    response = client.post('/api/add_column', json={'width': 40})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['state'] != before['state']
+    assert body['changes']['column_count'] == 3
+    assert list(body['changes']['columns']) == ['2']
+    assert body['changes']['columns']['2']['width'] == 40
+    assert 'design' not in body
+
+    body = client.post('/api/move_shelf', json={'col_index': 1, 'shelf_index': 0, 'amount': 5}).get_json()
+    assert list(body['changes']) == ['columns'] and list(body['changes']['columns']) == ['1']
+    body = client.post('/api/set_plinth_height', json={'height': 12}).get_json()
+    assert body['changes'] == {'plinth_height': 12.0}
+    assert client.get('/api/state').get_json()['state'] == body['state']
+
+def test_refused_change_has_no_changes(client):
+    state = client.get('/api/state').get_json()['state']
+    body = client.post('/api/add_column', json={'width': 55}).get_json()
+    assert body['changes'] == {} and body['state'] == state
+
+def test_malformed_json_parameters_are_a_400(client):
+    response = client.post('/api/add_column', json={'width': 'wide'})
+    assert response.status_code == 400 and 'error' in response.get_json()
+    assert client.post('/api/remove_column', json={}).status_code == 400
+
+def test_form_posts_redirect(client):
+    response = client.post('/api/add_column', data={'width': '40'})
+    assert response.status_code == 302
+    # Malformed form values are ignored
+    assert client.post('/api/add_column', data={'width': 'wide'}).status_code == 302
+    assert len(client.get('/api/state').get_json()['design']['columns']) == 3
+
+def test_accept_header_selects_json(client):
+    response = client.post('/api/toggle_top', data={'index': '0'}, headers={'Accept': 'application/json'})
+    assert response.status_code == 200
+    assert response.get_json()['changes']['columns']['0']['has_top'] is False
+
+def test_reset(client):
+    client.post('/api/add_column', json={'width': 40})
+    body = client.post('/api/reset', json={}).get_json()
+    assert body['changes'] == {'column_count': 2}
+    assert len(client.get('/api/state').get_json()['design']['columns']) == 2
+
+def test_sessions_are_separate(web):
+    a, b = web.app.test_client(), web.app.test_client()
+    a.post('/api/add_column', json={'width': 40})
+    assert len(a.get('/api/state').get_json()['design']['columns']) == 3
+    assert len(b.get('/api/state').get_json()['design']['columns']) == 2
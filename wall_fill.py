@@ -0,0 +1,268 @@
+"""
+Wall-fill solver: which 40/60/80cm module sequences fill a wall.
+
+A fill is a left-to-right sequence of base modules, each either a plain
+(door) unit or a drawer unit, whose widths add up to the wall width (or fall
+short of it by at most max_gap cm). Constraints: minimum and maximum number of
+drawer units, maximum number of 80cm modules, and symmetry (the sequence reads
+the same from both ends).
+
+The search runs over states (width left, drawer units still needed, 80s and
+drawer units still allowed, previous module) with memoized counts and best
+completion costs, so branches that cannot end in a valid fill are never
+entered. Results stream lazily:
+
+    best_fills(360, k=5, min_drawers=2)      # the 5 cheapest fills, cheapest first
+    iter_fills(1000, symmetric=True)         # every fill, in order, one at a time
+    count_fills(1000)                        # how many there are, without listing them
+
+Cost (lower is better) per fill: module_cost per module, drawer_cost more per
+drawer unit, change_cost per neighbouring modules of different widths and
+gap_cost per cm of wall left empty.
+"""
+
+import heapq
+import argparse
+from itertools import islice
+from cabinet_model import Column, Drawer
+
+MODULE_WIDTHS = (40, 60, 80)
+MODULE_COST = 1.0
+CHANGE_COST = 0.5
+GAP_COST = 0.1
+DRAWER_COST = 0.25
+DRAWERS_PER_UNIT = 3
+DRAWER_HEIGHT = 20.0
+INF = float('inf')
+
+class WallFill:
+    """One solution: modules as (width, is_drawer_unit) pairs from left to right."""
+    __slots__ = ('modules', 'gap', 'cost')
+
+    def __init__(self, modules, gap, cost):
+        self.modules = modules
+        self.gap = gap
+        self.cost = cost
+
+    @property
+    def widths(self):
+        return [w for w, _ in self.modules]
+
+    @property
+    def drawer_units(self):
+        return sum(1 for _, d in self.modules if d)
+
+    def to_designer(self, total_height=240.0, bottom_height=80.0, plinth_height=8.0,
+                    drawers=DRAWERS_PER_UNIT, drawer_height=DRAWER_HEIGHT):
+        """
+        A new CabinetDesigner with these modules, three evenly spaced sections
+        each. Columns are built directly, so fills of custom widths keep them.
+        """
+        from simple_designer import CabinetDesigner
+        if drawers * drawer_height > bottom_height - plinth_height:
+            raise ValueError(f"{drawers} drawers of {drawer_height:g}cm do not fit a "
+                             f"{bottom_height - plinth_height:g}cm base.")
+        designer = CabinetDesigner()
+        designer.total_height = total_height
+        designer.bottom_height = bottom_height
+        designer.plinth_height = plinth_height
+        for width, drawer_unit in self.modules:
+            designer.columns.append(Column(width, drawers=[Drawer(float(drawer_height))] * drawers if drawer_unit else None))
+            designer._set_evenly_spaced_shelves(len(designer.columns) - 1, 3)
+        return designer
+
+    def to_dict(self, **options):
+        """Config dict of the fill, as saved by save_config; options as for to_designer()."""
+        return self.to_designer(**options).to_dict()
+
+    def __repr__(self):
+        labels = " ".join(f"{w}{'D' if d else ''}" for w, d in self.modules)
+        return f"WallFill([{labels}], gap={self.gap:g}, cost={self.cost:g})"
+
+class _Search:
+    """
+    The fills of one problem. With mult=2 it searches half of a symmetric
+    fill: each module stands for itself and its mirror image, around an
+    optional middle module mid.
+    """
+    def __init__(self, types, max_gap, costs, start, mult=1, mid=None):
+        self.types = types
+        self.max_gap = max_gap
+        self.module_cost, self.drawer_cost, self.change_cost, self.gap_cost = costs
+        self.start = start
+        self.mult = mult
+        self.mid = mid
+        self._best = {}
+        self._count = {}
+
+    def _change(self, a, b):
+        return self.change_cost if a is not None and self.types[a][0] != self.types[b][0] else 0.0
+
+    def children(self, state):
+        """(type index, step cost, next state) for every module that can come next."""
+        rem, need, eighties, drawers, last = state
+        m = self.mult
+        for t, (w, d) in enumerate(self.types):
+            if m * w > rem:
+                continue
+            e = eighties - m if w == 80 and eighties is not None else eighties
+            dl = drawers - m if d and drawers is not None else drawers
+            if (e is not None and e < 0) or (dl is not None and dl < 0):
+                continue
+            step = m * (self.module_cost + (self.drawer_cost if d else 0.0) + self._change(last, t))
+            yield t, step, (rem - m * w, max(0, need - m) if d else need, e, dl, t)
+
+    def final_cost(self, state):
+        """Cost of ending the fill in state, or INF when that would not be valid."""
+        rem, need, _, _, last = state
+        if rem > self.max_gap or need > 0:
+            return INF
+        cost = self.gap_cost * rem
+        if self.mid is not None:
+            # The middle module is not mirrored: counted once, with a join on either side
+            cost += self.module_cost + 2 * self._change(last, self.mid)
+            if self.types[self.mid][1]:
+                cost += self.drawer_cost
+        return cost
+
+    def best(self, state):
+        """Lowest cost of any valid completion of state (INF if there is none)."""
+        value = self._best.get(state)
+        if value is None:
+            value = self.final_cost(state)
+            for _, step, nxt in self.children(state):
+                value = min(value, step + self.best(nxt))
+            self._best[state] = value
+        return value
+
+    def count(self, state):
+        value = self._count.get(state)
+        if value is None:
+            value = 1 if self.final_cost(state) < INF else 0
+            for _, _, nxt in self.children(state):
+                value += self.count(nxt)
+            self._count[state] = value
+        return value
+
+    def fill(self, path, rem, cost):
+        modules = [self.types[t] for t in path]
+        if self.mult == 2:
+            middle = [self.types[self.mid]] if self.mid is not None else []
+            modules = modules + middle + modules[::-1]
+        return WallFill(tuple(modules), rem, cost)
+
+    def ranked(self):
+        """Yields every fill, cheapest first (best-first search guided by best())."""
+        if self.best(self.start) == INF:
+            return
+        # Among equal costs the newest entry pops first, so the search dives to a
+        # complete fill instead of widening over thousands of equally good prefixes
+        tie = 0
+        heap = [(self.best(self.start), tie, 0.0, self.start, (), False)]
+        while heap:
+            f, _, g, state, path, done = heapq.heappop(heap)
+            if done:
+                yield self.fill(path, state[0], f)
+                continue
+            final = self.final_cost(state)
+            if final < INF:
+                tie -= 1
+                heapq.heappush(heap, (g + final, tie, g + final, state, path, True))
+            for t, step, nxt in self.children(state):
+                rest = self.best(nxt)
+                if rest < INF:
+                    tie -= 1
+                    heapq.heappush(heap, (g + step + rest, tie, g + step, nxt, path + (t,), False))
+
+    def ordered(self):
+        """Yields every fill in sequence order, entering only branches that have one."""
+        stack = [(self.start, (), 0.0, False)]
+        while stack:
+            state, path, g, done = stack.pop()
+            if done:
+                yield self.fill(path, state[0], g)
+                continue
+            # Pushed in reverse, so shorter fills and narrower modules come first
+            branches = [(nxt, path + (t,), g + step, False) for t, step, nxt in self.children(state) if self.count(nxt)]
+            stack.extend(reversed(branches))
+            final = self.final_cost(state)
+            if final < INF:
+                stack.append((state, path, g + final, True))
+
+def _searches(width, widths=MODULE_WIDTHS, max_gap=0, min_drawers=0, max_drawers=None, max_80=None,
+              symmetric=False, module_cost=MODULE_COST, drawer_cost=DRAWER_COST, change_cost=CHANGE_COST,
+              gap_cost=GAP_COST):
+    """The _Search (one per possible middle module, for symmetric fills) covering a problem."""
+    if width < 0 or max_gap < 0:
+        raise ValueError("Wall width and max_gap must not be negative.")
+    if any(w <= 0 for w in widths):
+        raise ValueError(f"Module widths must be positive, got {widths!r}.")
+    # Drawer units only matter when a constraint counts them
+    with_drawers = min_drawers > 0 or max_drawers is not None
+    types = tuple((w, d) for w in sorted(set(widths)) for d in ((False, True) if with_drawers else (False,)))
+    costs = (module_cost, drawer_cost, change_cost, gap_cost)
+    if not symmetric:
+        return [_Search(types, max_gap, costs, (width, min_drawers, max_80, max_drawers, None))]
+    searches = []
+    for mid in [None] + list(range(len(types))):
+        w, d = types[mid] if mid is not None else (0, False)
+        e = max_80 - 1 if w == 80 and max_80 is not None else max_80
+        dl = max_drawers - 1 if d and max_drawers is not None else max_drawers
+        if w > width or (e is not None and e < 0) or (dl is not None and dl < 0):
+            continue
+        start = (width - w, max(0, min_drawers - 1) if d else min_drawers, e, dl, None)
+        searches.append(_Search(types, max_gap, costs, start, 2, mid))
+    return searches
+
+def iter_fills(width, **constraints):
+    """
+    Yields every valid fill of a wall width cm wide as WallFill objects, one
+    at a time in sequence order. constraints: widths, max_gap, min_drawers,
+    max_drawers, max_80, symmetric (and the cost weights, which only set .cost).
+    """
+    for search in _searches(width, **constraints):
+        yield from search.ordered()
+
+def ranked_fills(width, **constraints):
+    """Yields every valid fill, cheapest first; constraints as for iter_fills()."""
+    streams = [search.ranked() for search in _searches(width, **constraints)]
+    return heapq.merge(*streams, key=lambda f: f.cost)
+
+def best_fills(width, k=10, **constraints):
+    """The k cheapest fills, cheapest first."""
+    return list(islice(ranked_fills(width, **constraints), k))
+
+def count_fills(width, **constraints):
+    """Number of valid fills, counted without listing them."""
+    return sum(search.count(search.start) for search in _searches(width, **constraints))
+
+def main():
+    parser = argparse.ArgumentParser(description="List the 40/60/80cm module sequences that fill a wall")
+    parser.add_argument("width", type=float, help="Wall width in cm")
+    parser.add_argument("--top", type=int, default=10, help="Show the N best fills (default: 10)")
+    parser.add_argument("--max-gap", type=float, default=0, help="Allowed unfilled width in cm (default: 0)")
+    parser.add_argument("--min-drawers", type=int, default=0, help="At least this many drawer units")
+    parser.add_argument("--max-drawers", type=int, help="At most this many drawer units")
+    parser.add_argument("--max-80", type=int, help="At most this many 80cm modules")
+    parser.add_argument("--symmetric", action="store_true", help="Only fills that read the same from both ends")
+    parser.add_argument("--count", action="store_true", help="Also print the number of valid fills")
+    parser.add_argument("--save", metavar="FILE", help="Save the best fill as a design file")
+    args = parser.parse_args()
+
+    constraints = dict(max_gap=args.max_gap, min_drawers=args.min_drawers, max_drawers=args.max_drawers,
+                       max_80=args.max_80, symmetric=args.symmetric)
+    if args.count:
+        print(f"{count_fills(args.width, **constraints)} valid fill(s).")
+    fills = best_fills(args.width, args.top, **constraints)
+    if not fills:
+        print(f"No fill of {args.width:g}cm meets the constraints.")
+        return
+    for n, fill in enumerate(fills, 1):
+        labels = " ".join(f"{w}{'D' if d else ''}" for w, d in fill.modules)
+        gap = f", {fill.gap:g}cm gap" if fill.gap else ""
+        print(f"{n:>3}. cost {fill.cost:5.1f}  {labels}{gap}")
+    if args.save:
+        fills[0].to_designer().save_config(args.save)
+
+if __name__ == "__main__":
+    main()
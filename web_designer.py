@@ -1,201 +1,726 @@
 import os
+import json
 import time
-from flask import Flask, render_template, request, redirect, url_for, send_file
+import uuid
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, redirect, url_for, make_response, session, jsonify
 from simple_designer import CabinetDesigner
-from render_cabinet import render_cabinet
+from design_journal import DesignJournal
+from design_index import DesignIndex, THUMB_WIDTH
+from design_io import read_design
+from design_binary import BINARY_EXT
+from render_cabinet import IncrementalRenderer, RenderOptions, render_thumbnail_to_bytes, add_render_hook
+from render_vector import render_svg
 
 app = Flask(__name__)
+# Signs the session cookie. Set CABINET_SECRET_KEY when running several worker processes.
+app.secret_key = os.environ.get('CABINET_SECRET_KEY') or os.urandom(24)
 
-# Initialize Designer
-designer = CabinetDesigner()
-# Start with some default state
-if not designer.columns:
-    designer.add_column(60)
-    designer.add_column(80)
-
-TEMP_CONFIG = "temp_web_config.json"
 SAVES_DIR = "saved_designs"
-STATIC_DIR = "static"
-RENDER_OUTPUT = os.path.join(STATIC_DIR, "cabinet_preview.png")
+RENDER_CACHE_BYTES = 32 * 1024 * 1024 # Memory budget for cached previews
+SESSION_TTL = 60 * 60 # Seconds of inactivity before a session's designer is dropped from memory
+# Optional directory where session designs are written on every change, so they
+# survive eviction and can be shared by several worker processes.
+SESSION_SPILL_DIR = os.environ.get('CABINET_SESSION_DIR')
+# Optional directory of per-session command journals (see design_journal): every
+# change is appended as one line, and a restarted server recovers the designs.
+SESSION_JOURNAL_DIR = os.environ.get('CABINET_JOURNAL_DIR')
+JOURNAL_KEEP_SEGMENTS = 4
+GALLERY_PAGE_SIZE = 30 # Saved designs listed per page
+RENDER_WORKERS = 2 # Threads doing Pillow work; more requests than this wait in the render queue
+RENDER_QUEUE = 16 # Renders waiting for a worker beyond which previews answer 503
 
-# Ensure static and saves dirs exist
-if not os.path.exists(STATIC_DIR):
-    os.makedirs(STATIC_DIR)
+# Ensure saves dir exists
 if not os.path.exists(SAVES_DIR):
     os.makedirs(SAVES_DIR)
 
+class RenderCache:
+    """
+    In-memory LRU cache of rendered previews, keyed by design state hash.
+    Entries are evicted least-recently-used first once the total size exceeds max_bytes.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+class RenderService:
+    """
+    Runs renders on a bounded pool of worker threads, in front of a RenderCache.
+    A request for a cached key returns at once; requests for a key already being
+    rendered wait for that render instead of starting their own (single flight).
+    With workers + max_queue renders pending, render() sheds the request by
+    returning None, so load beyond the pool turns into quick 503s rather than
+    piling up Pillow work.
+    """
+    def __init__(self, cache, workers, max_queue):
+        self.cache = cache
+        self.max_pending = workers + max_queue
+        self.rendered = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self._inflight = {} # key -> Future of the render
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return len(self._inflight)
+
+    def _run(self, key, func):
+        try:
+            data = func()
+            # Cached before leaving _inflight, so a request always finds one of them
+            self.cache.put(key, data)
+            return data
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                self.rendered += 1
+
+    def render(self, key, func):
+        """
+        Returns the bytes for key: from the cache, from the render in flight
+        for it, or from func() run on a worker. None when the queue is full.
+        Exceptions raised by func() reach every request waiting for it.
+        """
+        with self._lock:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            elif len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                return None
+            else:
+                future = self._inflight[key] = self._pool.submit(self._run, key, func)
+        return future.result()
+
+class RenderMetrics:
+    """
+    Aggregates the RenderProfile of every render (see render_cabinet.add_render_hook)
+    into histograms per entry point and phase, served as Prometheus text on /metrics.
+    """
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        self._histograms = {} # (render, phase) -> [bucket counts..., +Inf count, sum]
+        self._counters = {} # (render, counter) -> total
+        self._lock = threading.Lock()
+
+    def observe(self, profile):
+        phases = dict(profile.phases, total=profile.total)
+        with self._lock:
+            for phase, seconds in phases.items():
+                hist = self._histograms.get((profile.name, phase))
+                if hist is None:
+                    hist = self._histograms[(profile.name, phase)] = [0] * (len(self.BUCKETS) + 1) + [0.0]
+                for i, bound in enumerate(self.BUCKETS):
+                    if seconds <= bound:
+                        hist[i] += 1
+                hist[-2] += 1
+                hist[-1] += seconds
+            for name, n in profile.counts.items():
+                key = (profile.name, name)
+                self._counters[key] = self._counters.get(key, 0) + n
+
+    def count(self, name, counter, n=1):
+        """Adds n to a counter of a render entry point, e.g. failed renders."""
+        with self._lock:
+            self._counters[(name, counter)] = self._counters.get((name, counter), 0) + n
+
+    def prometheus(self):
+        lines = ["# HELP cabinet_render_seconds Render time per entry point and phase.",
+                 "# TYPE cabinet_render_seconds histogram"]
+        with self._lock:
+            for (name, phase), hist in sorted(self._histograms.items()):
+                labels = f'render="{name}",phase="{phase}"'
+                for bound, count in zip(self.BUCKETS, hist):
+                    lines.append(f'cabinet_render_seconds_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'cabinet_render_seconds_bucket{{{labels},le="+Inf"}} {hist[-2]}')
+                lines.append(f'cabinet_render_seconds_sum{{{labels}}} {hist[-1]:.6f}')
+                lines.append(f'cabinet_render_seconds_count{{{labels}}} {hist[-2]}')
+            lines += ["# HELP cabinet_render_events_total Primitives drawn, partial repaints and errors per entry point.",
+                      "# TYPE cabinet_render_events_total counter"]
+            for (name, counter), n in sorted(self._counters.items()):
+                lines.append(f'cabinet_render_events_total{{render="{name}",event="{counter}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+def new_designer():
+    designer = CabinetDesigner()
+    # Start with some default state
+    designer.add_column(60)
+    designer.add_column(80)
+    return designer
+
+class DesignSession:
+    """A browser session's designer, its preview renderer and the lock serializing its requests."""
+    __slots__ = ('designer', 'renderer', 'lock', 'last_access', 'spill_mtime', 'journal')
+
+    def __init__(self, designer, journal=None):
+        self.designer = designer
+        # Palette renders: several times smaller PNGs for the preview
+        self.renderer = IncrementalRenderer(RenderOptions(palette=True))
+        self.lock = threading.RLock()
+        self.last_access = time.monotonic()
+        self.spill_mtime = None
+        self.journal = journal
+        if journal is not None and journal.designer is not designer:
+            journal.attach(designer)
+
+    def set_designer(self, designer):
+        """Replaces the designer, logging the new state to the journal."""
+        self.designer = designer
+        if self.journal is not None:
+            self.journal.attach(designer)
+
+class SessionStore:
+    """
+    Designers per session id, kept in memory and evicted after ttl seconds without a request.
+    With spill_dir set, every change is written to <spill_dir>/<sid>.json: an evicted
+    session is reloaded from there, and a newer file written by another worker
+    process replaces the in-memory copy.
+    With journal_dir set, every change is appended to the session's journal in
+    <journal_dir>/<sid>/, and a session missing from memory (after eviction or
+    a restart) is recovered from it. Journals are meant for a single process.
+    """
+    SWEEP_INTERVAL = 60 # Seconds between scans for expired sessions
+
+    def __init__(self, ttl, spill_dir=None, journal_dir=None):
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.journal_dir = journal_dir
+        self._sessions = {}
+        self._opening = {} # sid -> lock held while that session is loaded
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        for directory in (spill_dir, journal_dir):
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+    def _open_session(self, sid):
+        """Builds the entry of a session not in memory: from its journal, its spill file, or new."""
+        designer, mtime = self._read_spill(sid)
+        journal = None
+        if self.journal_dir:
+            journal = DesignJournal(os.path.join(self.journal_dir, sid), keep_segments=JOURNAL_KEEP_SEGMENTS)
+            if designer is None and journal.segments():
+                try:
+                    designer = journal.recover()
+                except (ValueError, TypeError, KeyError) as e:
+                    app.logger.warning("Could not recover session %s from its journal: %s", sid, e)
+        entry = DesignSession(designer or new_designer(), journal)
+        entry.spill_mtime = mtime
+        return entry
+
+    def _spill_path(self, sid):
+        return os.path.join(self.spill_dir, sid + ".json")
+
+    def _read_spill(self, sid):
+        """Returns (designer, mtime) from the spill file, or (None, None)."""
+        if not self.spill_dir:
+            return None, None
+        path = self._spill_path(sid)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        designer = CabinetDesigner()
+        designer.load_dict(data)
+        return designer, mtime
+
+    def get(self, sid):
+        now = time.monotonic()
+        expired = ()
+        with self._lock:
+            if now - self._last_sweep > self.SWEEP_INTERVAL:
+                expired = self._sweep(now)
+            entry = self._sessions.get(sid)
+            if entry is None:
+                opening = self._opening.setdefault(sid, threading.Lock())
+            else:
+                entry.last_access = now
+        self._detach(expired)
+        if entry is None:
+            # Loading a session reads files and replays its journal: done outside the
+            # store lock, once per session, while requests for other sessions go on
+            with opening:
+                with self._lock:
+                    entry = self._sessions.get(sid)
+                if entry is None:
+                    entry = self._open_session(sid)
+                    with self._lock:
+                        self._sessions[sid] = entry
+                        self._opening.pop(sid, None)
+                return entry
+
+        if self.spill_dir:
+            # Another worker process may have changed this session since
+            with entry.lock:
+                try:
+                    mtime = os.stat(self._spill_path(sid)).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if mtime is not None and mtime != entry.spill_mtime:
+                    designer, mtime = self._read_spill(sid)
+                    if designer is not None:
+                        entry.set_designer(designer)
+                        entry.spill_mtime = mtime
+        return entry
+
+    def save(self, sid, entry):
+        """Writes the session's design to the spill directory, if one is configured."""
+        if not self.spill_dir:
+            return
+        path = self._spill_path(sid)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry.designer.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        entry.spill_mtime = os.stat(path).st_mtime_ns
+
+    def _sweep(self, now):
+        """Drops the sessions idle for longer than ttl; called under the store lock, returns their entries."""
+        self._last_sweep = now
+        expired = [sid for sid, e in self._sessions.items() if now - e.last_access > self.ttl]
+        return [self._sessions.pop(sid) for sid in expired]
+
+    def _detach(self, entries):
+        for entry in entries:
+            if entry.journal is not None:
+                # Waits for a request still using the session, so it is done outside the store lock
+                with entry.lock:
+                    entry.journal.detach()
+
+    def __len__(self):
+        return len(self._sessions)
+
+render_cache = RenderCache(RENDER_CACHE_BYTES)
+render_service = RenderService(render_cache, RENDER_WORKERS, RENDER_QUEUE)
+render_metrics = RenderMetrics()
+add_render_hook(render_metrics.observe)
+sessions = SessionStore(SESSION_TTL, SESSION_SPILL_DIR, SESSION_JOURNAL_DIR)
+# Metadata of the saved designs; files added or changed while the app was down are picked up here
+design_index = DesignIndex(SAVES_DIR, thumbnails=True)
+design_index.sync()
+
+def current_session():
+    """Returns (session id, DesignSession) for the request, starting a new session if needed."""
+    sid = session.get('sid')
+    if not sid or not sid.isalnum():
+        sid = uuid.uuid4().hex
+        session['sid'] = sid
+    return sid, sessions.get(sid)
+
+def wants_json():
+    """True for API clients: JSON request bodies, ?format=json or an Accept header preferring JSON."""
+    if request.is_json or request.args.get('format') == 'json':
+        return True
+    accept = request.accept_mimetypes
+    return accept.best_match(['application/json', 'text/html']) == 'application/json' and \
+        accept['application/json'] > accept['text/html']
+
+def param(name, default=None):
+    """Reads a request parameter from the JSON body or the submitted form."""
+    if request.is_json:
+        value = (request.get_json(silent=True) or {}).get(name, default)
+        return default if value is None else str(value)
+    return request.form.get(name, default)
+
+def design_delta(before, after):
+    """The fields of a design dict that differ between two states; columns by index."""
+    changes = {}
+    for key in ('total_height', 'bottom_height', 'plinth_height'):
+        if before.get(key) != after.get(key):
+            changes[key] = after.get(key)
+    old_cols, new_cols = before['columns'], after['columns']
+    if len(old_cols) != len(new_cols):
+        changes['column_count'] = len(new_cols)
+    columns = {str(i): c for i, c in enumerate(new_cols) if i >= len(old_cols) or old_cols[i] != c}
+    if columns:
+        changes['columns'] = columns
+    return changes
+
+def state_response(designer, changes=None):
+    state = designer.state_hash()
+    body = {'state': state, 'image_url': url_for('image', v=state)}
+    if changes is None:
+        body['design'] = designer.to_dict()
+    else:
+        body['changes'] = changes
+    return jsonify(body)
+
+def designer_action(func):
+    """
+    Route decorator for design changes: runs func(designer) on the session's
+    designer under its lock and persists the session. If func returns a
+    CabinetDesigner, it replaces the session's designer.
+
+    Browser form posts are redirected to the index, and malformed values are
+    ignored. JSON clients get the changed design fields and the preview URL
+    for the new state in one response, or a 400 for malformed values.
+    """
+    @functools.wraps(func)
+    def wrapper():
+        json_client = wants_json()
+        sid, entry = current_session()
+        with entry.lock:
+            before = entry.designer.to_dict() if json_client else None
+            try:
+                result = func(entry.designer)
+            except (TypeError, ValueError) as e:
+                if json_client:
+                    return jsonify({'error': f"Invalid parameters: {e}"}), 400
+                result = None
+            if isinstance(result, CabinetDesigner):
+                entry.set_designer(result)
+            sessions.save(sid, entry)
+            if json_client:
+                return state_response(entry.designer, design_delta(before, entry.designer.to_dict()))
+        return redirect(url_for('index'))
+    return wrapper
+
+def saved_designs_page(args, limit=GALLERY_PAGE_SIZE):
+    """
+    One page of the saved-design index for the query args' filters (min_width,
+    max_width, min_height, max_height, min_columns, max_columns, min_drawers,
+    max_drawers, name, has_drawers), sort and desc, page. Returns (rows, has_next_page).
+    """
+    filters = {}
+    for key in ('min_width', 'max_width', 'min_height', 'max_height'):
+        if args.get(key):
+            filters[key] = float(args[key])
+    for key in ('min_columns', 'max_columns', 'min_drawers', 'max_drawers'):
+        if args.get(key):
+            filters[key] = int(args[key])
+    if args.get('name'):
+        filters['name'] = args['name']
+    if args.get('has_drawers'):
+        filters['has_drawers'] = args['has_drawers'].lower() in ('1', 'true', 'yes')
+    page = max(0, int(args.get('page', 0)))
+    # One row more than the page tells whether another page follows
+    rows = design_index.query(sort=args.get('sort', 'mtime'), descending=args.get('desc', '1') != '0',
+                              limit=limit + 1, offset=page * limit, **filters)
+    return rows[:limit], len(rows) > limit
+
 @app.route('/')
 def index():
-    saved_files = [f for f in os.listdir(SAVES_DIR) if f.endswith('.json')]
-    return render_template('index.html', designer=designer, enumerate=enumerate, len=len, time=time, saved_files=saved_files)
+    args = request.args.to_dict()
+    gallery_error = None
+    try:
+        saved, more = saved_designs_page(args)
+    except ValueError as e:
+        # Bad filters or sort: say so, and list the designs as by default
+        gallery_error = f"Invalid gallery filter ({e}); showing all saved designs."
+        args = {}
+        saved, more = saved_designs_page(args)
+    # Page links keep the current filters
+    page = int(args.get('page', 0))
+    prev_url = url_for('index', **dict(args, page=page - 1)) if page > 0 else None
+    next_url = url_for('index', **dict(args, page=page + 1)) if more else None
+    sid, entry = current_session()
+    with entry.lock:
+        designer = entry.designer
+        return render_template('index.html', designer=designer, enumerate=enumerate, len=len, state=designer.state_hash(),
+                               saved_designs=saved, prev_url=prev_url, next_url=next_url, gallery_error=gallery_error)
+
+@app.route('/api/designs')
+def list_designs():
+    """Saved designs with their metadata, filtered and sorted as for the gallery (see saved_designs_page)."""
+    try:
+        limit = min(200, max(1, int(request.args.get('limit', GALLERY_PAGE_SIZE))))
+        rows, more = saved_designs_page(request.args, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    for row in rows:
+        row.pop('thumbnail')
+        row['thumbnail_url'] = url_for('thumbnail', name=row['name'])
+    return jsonify({'designs': rows, 'next_page': more})
+
+def busy_response():
+    """503 for a render shed because the render queue is full; clients retry after a second."""
+    response = make_response("Too many renders in progress, try again shortly", 503)
+    response.headers['Retry-After'] = '1'
+    return response
 
 @app.route('/image')
 def image():
-    # Save config
-    designer.save_config(TEMP_CONFIG)
-    # Render
-    render_cabinet(TEMP_CONFIG, RENDER_OUTPUT)
-    # Return file with cache busting is handled in frontend by adding query param
-    return send_file(RENDER_OUTPUT, mimetype='image/png')
+    fmt = request.args.get('format', 'png')
+    if fmt not in ('png', 'svg'):
+        return "Unsupported format", 400
+    sid, entry = current_session()
+    with entry.lock:
+        designer = entry.designer
+        key = designer.state_hash() if fmt == 'png' else f"{designer.state_hash()}.{fmt}"
+        # The browser already holds this exact render
+        if request.if_none_match.contains(key):
+            response = make_response('', 304)
+        else:
+            try:
+                if fmt == 'svg':
+                    data = render_service.render(key, lambda: render_svg(designer).encode('utf-8'))
+                else:
+                    # Repaints only the columns touched since this session's previous preview.
+                    # The session stays locked until it is done, so the design cannot change under it.
+                    data = render_service.render(key, lambda: entry.renderer.render_png(designer))
+            except Exception:
+                app.logger.exception("Render of %s failed", key)
+                render_metrics.count('image', 'error')
+                if wants_json():
+                    return jsonify({'error': "Render failed"}), 500
+                return "Render failed", 500
+            if data is None:
+                return busy_response()
+            response = make_response(data)
+            response.mimetype = 'image/svg+xml' if fmt == 'svg' else 'image/png'
+    response.set_etag(key)
+    # Always revalidate, the design behind this URL can change
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/thumbnail/<name>')
+def thumbnail(name):
+    """Small preview of a saved design, for the saved-designs gallery. ?w= sets the width in pixels."""
+    name = os.path.basename(name)
+    filepath = os.path.join(SAVES_DIR, name)
+    if not name.endswith(('.json', BINARY_EXT)) or not os.path.exists(filepath):
+        return "Not found", 404
+    try:
+        width = min(800, max(32, int(request.args.get('w', 200))))
+    except ValueError:
+        return "Invalid width", 400
+    mtime = os.stat(filepath).st_mtime_ns
+    key = f"thumb:{name}:{mtime}:{width}"
+    if request.if_none_match.contains(key):
+        response = make_response('', 304)
+    else:
+        png = render_cache.get(key)
+        if png is None and width == THUMB_WIDTH:
+            # Written by the index when the design was saved
+            row = design_index.get(name)
+            if row and row['thumbnail'] and row['mtime'] == mtime:
+                try:
+                    with open(row['thumbnail'], 'rb') as f:
+                        png = f.read()
+                    render_cache.put(key, png)
+                except IOError:
+                    png = None
+        if png is None:
+            try:
+                png = render_service.render(key, lambda: render_thumbnail_to_bytes(read_design(filepath), width))
+            except (IOError, ValueError, KeyError, TypeError):
+                return "Invalid design file", 422
+            if png is None:
+                return busy_response()
+            if width == THUMB_WIDTH:
+                design_index.set_thumbnail(name, png, mtime)
+        response = make_response(png)
+        response.mimetype = 'image/png'
+    response.set_etag(key)
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/metrics')
+def metrics():
+    lines = [render_metrics.prometheus(),
+             "# TYPE cabinet_render_cache_hits_total counter",
+             f"cabinet_render_cache_hits_total {render_cache.hits}",
+             "# TYPE cabinet_render_cache_misses_total counter",
+             f"cabinet_render_cache_misses_total {render_cache.misses}",
+             "# TYPE cabinet_render_cache_bytes gauge",
+             f"cabinet_render_cache_bytes {render_cache.size}",
+             "# TYPE cabinet_render_queue_pending gauge",
+             f"cabinet_render_queue_pending {render_service.pending}",
+             "# TYPE cabinet_renders_total counter",
+             f"cabinet_renders_total {render_service.rendered}",
+             "# TYPE cabinet_render_coalesced_total counter",
+             f"cabinet_render_coalesced_total {render_service.coalesced}",
+             "# TYPE cabinet_render_rejected_total counter",
+             f"cabinet_render_rejected_total {render_service.rejected}",
+             "# TYPE cabinet_sessions gauge",
+             f"cabinet_sessions {len(sessions)}", ""]
+    response = make_response("\n".join(lines))
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4'
+    return response
+
+@app.route('/api/state')
+def state():
+    sid, entry = current_session()
+    with entry.lock:
+        return state_response(entry.designer)
 
 @app.route('/api/save', methods=['POST'])
 def save():
-    filename = request.form.get('filename')
+    filename = param('filename')
     if filename:
+        filename = os.path.basename(filename)
         if not filename.endswith('.json'):
             filename += '.json'
         filepath = os.path.join(SAVES_DIR, filename)
-        designer.save_config(filepath)
+        sid, entry = current_session()
+        with entry.lock:
+            entry.designer.save_config(filepath)
+            data = entry.designer.to_dict()
+        # The thumbnail is rendered on its first request, through the render pool
+        design_index.update(filename, data, thumbnail=False)
+    if wants_json():
+        return jsonify({'saved': filename})
     return redirect(url_for('index'))
 
 @app.route('/api/load', methods=['POST'])
-def load():
-    filename = request.form.get('filename')
+@designer_action
+def load(designer):
+    filename = param('filename')
     if filename:
-        filepath = os.path.join(SAVES_DIR, filename)
+        filepath = os.path.join(SAVES_DIR, os.path.basename(filename))
         if os.path.exists(filepath):
             designer.load_config(filepath)
-    return redirect(url_for('index'))
 
 @app.route('/api/reset', methods=['POST'])
-def reset():
-    global designer
-    designer = CabinetDesigner()
-    designer.add_column(60)
-    designer.add_column(80)
-    return redirect(url_for('index'))
+@designer_action
+def reset(designer):
+    # Loaded into the session's designer so the reset can be undone
+    designer.load_dict(new_designer().to_dict())
+
+@app.route('/api/undo', methods=['POST'])
+@designer_action
+def undo(designer):
+    designer.undo()
+
+@app.route('/api/redo', methods=['POST'])
+@designer_action
+def redo(designer):
+    designer.redo()
 
 @app.route('/api/set_height', methods=['POST'])
-def set_height():
-    try:
-        h = float(request.form.get('height'))
-        designer.set_height(h)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def set_height(designer):
+    h = float(param('height'))
+    designer.set_height(h)
 
 @app.route('/api/add_column', methods=['POST'])
-def add_column():
-    try:
-        width = int(request.form.get('width'))
-        designer.add_column(width)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def add_column(designer):
+    width = int(param('width'))
+    designer.add_column(width)
 
 @app.route('/api/remove_column', methods=['POST'])
-def remove_column():
-    try:
-        idx = int(request.form.get('index'))
-        designer.remove_column(idx)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def remove_column(designer):
+    idx = int(param('index'))
+    designer.remove_column(idx)
 
 @app.route('/api/move_column', methods=['POST'])
-def move_column():
-    try:
-        idx = int(request.form.get('index'))
-        direction = request.form.get('direction')
-        if direction == 'left' and idx > 0:
-            designer.swap_columns(idx, idx-1)
-        elif direction == 'right' and idx < len(designer.columns) - 1:
-            designer.swap_columns(idx, idx+1)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def move_column(designer):
+    idx = int(param('index'))
+    direction = param('direction')
+    if direction == 'left' and idx > 0:
+        designer.swap_columns(idx, idx-1)
+    elif direction == 'right' and idx < len(designer.columns) - 1:
+        designer.swap_columns(idx, idx+1)
 
 @app.route('/api/toggle_top', methods=['POST'])
-def toggle_top():
-    try:
-        idx = int(request.form.get('index'))
-        designer.toggle_top(idx)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def toggle_top(designer):
+    idx = int(param('index'))
+    designer.toggle_top(idx)
 
 @app.route('/api/toggle_merge', methods=['POST'])
-def toggle_merge():
-    try:
-        idx = int(request.form.get('index'))
-        designer.toggle_merge(idx)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def toggle_merge(designer):
+    idx = int(param('index'))
+    designer.toggle_merge(idx)
 
 @app.route('/api/set_plinth_height', methods=['POST'])
-def set_plinth_height():
-    try:
-        h = float(request.form.get('height'))
-        designer.set_plinth_height(h)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def set_plinth_height(designer):
+    h = float(param('height'))
+    designer.set_plinth_height(h)
 
 @app.route('/api/set_shelves_count', methods=['POST'])
-def set_shelves_count():
-    try:
-        idx = int(request.form.get('index'))
-        count = int(request.form.get('count'))
-        designer.set_shelves_count(idx, count)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def set_shelves_count(designer):
+    idx = int(param('index'))
+    count = int(param('count'))
+    designer.set_shelves_count(idx, count)
 
 @app.route('/api/add_shelf', methods=['POST'])
-def add_shelf():
-    try:
-        idx = int(request.form.get('index'))
-        height = float(request.form.get('height'))
-        designer.add_shelf_at_height(idx, height)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def add_shelf(designer):
+    idx = int(param('index'))
+    height = float(param('height'))
+    designer.add_shelf_at_height(idx, height)
 
 @app.route('/api/remove_shelf', methods=['POST'])
-def remove_shelf():
-    try:
-        col_idx = int(request.form.get('col_index'))
-        shelf_idx = int(request.form.get('shelf_index'))
-        designer.remove_shelf_by_index(col_idx, shelf_idx)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def remove_shelf(designer):
+    col_idx = int(param('col_index'))
+    shelf_idx = int(param('shelf_index'))
+    designer.remove_shelf_by_index(col_idx, shelf_idx)
 
 @app.route('/api/move_shelf', methods=['POST'])
-def move_shelf():
-    try:
-        col_idx = int(request.form.get('col_index'))
-        shelf_idx = int(request.form.get('shelf_index'))
-        amount = float(request.form.get('amount'))
-        designer.move_shelf(col_idx, shelf_idx, amount)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def move_shelf(designer):
+    col_idx = int(param('col_index'))
+    shelf_idx = int(param('shelf_index'))
+    amount = float(param('amount'))
+    designer.move_shelf(col_idx, shelf_idx, amount)
 
 @app.route('/api/subdivide_compartment', methods=['POST'])
-def subdivide_compartment():
-    try:
-        col_idx = int(request.form.get('col_index'))
-        space_id = int(request.form.get('space_id'))
-        designer.subdivide_compartment(col_idx, space_id)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def subdivide_compartment(designer):
+    col_idx = int(param('col_index'))
+    space_id = int(param('space_id'))
+    designer.subdivide_compartment(col_idx, space_id)
 
 @app.route('/api/configure_drawers', methods=['POST'])
-def configure_drawers():
-    try:
-        idx = int(request.form.get('index'))
-        count = int(request.form.get('count'))
-        height = float(request.form.get('height', 20.0))
-        designer.configure_drawers(idx, count, height)
-    except ValueError:
-        pass
-    return redirect(url_for('index'))
+@designer_action
+def configure_drawers(designer):
+    idx = int(param('index'))
+    count = int(param('count'))
+    height = float(param('height', 20.0))
+    designer.configure_drawers(idx, count, height)
 
 if __name__ == '__main__':
     # Make sure we can import local modules
     import sys
     sys.path.append(os.getcwd())
-    app.run(debug=True, port=5000)
+    app.run(debug=True, port=5000, threaded=True)